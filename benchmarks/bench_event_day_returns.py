@@ -0,0 +1,88 @@
+"""event_day_returns ベンチマーク: 旧 .loc ループ vs 前日比1回 + 位置での抜き出し。
+
+    python benchmarks/bench_event_day_returns.py [--tickers 50] [--years 20]
+
+営業日 × --tickers の価格フレームと、CPI（毎月中旬）+ FOMC（年8回）相当のイベント日を作り、
+両実装の時間を比較する。両者が同じ値（NaNの位置も含め）を返すことも確認する。
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from sector_event_radar.impact import event_day_returns
+
+FOMC_MONTHS = (1, 3, 5, 6, 7, 9, 10, 12)
+
+
+def _loop_event_day_returns(prices, event_dates):
+    """旧実装"""
+    idx = pd.to_datetime(prices.index).normalize()
+    prices2 = prices.copy()
+    prices2.index = idx
+    returns = {c: [] for c in prices2.columns}
+    for d in event_dates:
+        dts = pd.Timestamp(d)
+        if dts not in prices2.index:
+            continue
+        loc = prices2.index.get_loc(dts)
+        if isinstance(loc, slice) or isinstance(loc, np.ndarray):
+            continue
+        if loc == 0:
+            continue
+        prev_dt = prices2.index[loc - 1]
+        for c in prices2.columns:
+            prev = prices2.loc[prev_dt, c]
+            cur = prices2.loc[dts, c]
+            if pd.isna(prev) or pd.isna(cur) or prev == 0:
+                returns[c].append(float("nan"))
+            else:
+                returns[c].append(float(cur / prev - 1.0))
+    return returns
+
+
+def _event_dates(first_year: int, years: int):
+    out = []
+    for y in range(first_year, first_year + years):
+        for m in range(1, 13):
+            out.append(date(y, m, 13))  # CPI（週末なら非取引日 → スキップ）
+            if m in FOMC_MONTHS:
+                out.append(date(y, m, 20))
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tickers", type=int, default=50)
+    ap.add_argument("--years", type=int, default=20)
+    args = ap.parse_args()
+
+    first_year = 2006
+    idx = pd.bdate_range(f"{first_year}-01-01", f"{first_year + args.years - 1}-12-31")
+    rng = np.random.default_rng(0)
+    vals = 100 * rng.lognormal(0, 0.015, size=(len(idx), args.tickers)).cumprod(axis=0)
+    vals[rng.random(vals.shape) < 0.01] = np.nan
+    prices = pd.DataFrame(vals, index=idx, columns=[f"T{i:03d}" for i in range(args.tickers)])
+    events = _event_dates(first_year, args.years)
+
+    t0 = time.perf_counter()
+    old = _loop_event_day_returns(prices, events)
+    old_sec = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = event_day_returns(prices, events)
+    new_sec = time.perf_counter() - t0
+
+    for c in prices.columns:
+        np.testing.assert_array_equal(np.array(old[c]), np.array(new[c]))
+    print(f"tickers={args.tickers} sessions={len(idx)} events={len(events)} used={len(new['T000'])}")
+    print(f"loop (.loc per event x ticker): {old_sec:8.3f}s")
+    print(f"vectorized:                     {new_sec:8.3f}s  ({old_sec / new_sec:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""ICS描画ベンチマーク: カレンダーごとに events_to_ics vs write_calendars の1パス。
+
+    python benchmarks/bench_ics_render.py [--events 10000]
+
+--events 件のイベント（4カテゴリ、日本語タイトル・長いDESCRIPTIONを含む）を作り、
+旧方式（全体 + カテゴリ別に events_to_ics を5回呼んで文字列をファイルに書く）と
+write_calendars で5ファイルへ直接書く方式の時間を比較する。出力が同じことも確認する。
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sector_event_radar.ics import events_to_ics, write_calendars
+from sector_event_radar.models import Event
+
+CATEGORIES = ("macro", "bellwether", "flows", "shock")
+STAMP = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _events(n: int):
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        Event(
+            canonical_key=f"bench:{i}",
+            title=(f"米国CPI発表 {i}" if i % 3 == 0 else f"Export controls update {i}") + " — details" * (i % 5),
+            start_at=base + timedelta(hours=i),
+            category=CATEGORIES[i % 4], sector_tags=["semis", "NVDA", "TSM"], risk_score=i % 100,
+            confidence=0.8, source_name="bench", source_id=str(i),
+            source_url=f"https://example.com/news/{i}?ref=calendar",
+            evidence="effective March 15, 2026; " * (1 + i % 4), action="add",
+        )
+        for i in range(n)
+    ]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=10_000)
+    args = ap.parse_args()
+
+    evs = _events(args.events)
+    targets = [("sector_events_all.ics", "Sector Event Radar", None)] + [
+        (f"sector_events_{c}.ics", f"SER - {c}", c) for c in CATEGORIES
+    ]
+
+    with tempfile.TemporaryDirectory() as d:
+        old_dir, new_dir = Path(d, "old"), Path(d, "new")
+        old_dir.mkdir()
+        new_dir.mkdir()
+
+        t0 = time.perf_counter()
+        for filename, name, cat in targets:
+            text = events_to_ics([e for e in evs if cat is None or e.category == cat], cal_name=name, dtstamp=STAMP)
+            (old_dir / filename).write_bytes(text.encode("utf-8"))
+        old_sec = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        handles = [open(new_dir / filename, "wb") for filename, _, _ in targets]
+        try:
+            write_calendars(evs, [(h, name, cat) for h, (_, name, cat) in zip(handles, targets)], dtstamp=STAMP)
+        finally:
+            for h in handles:
+                h.close()
+        new_sec = time.perf_counter() - t0
+
+        for filename, _, _ in targets:
+            assert (old_dir / filename).read_bytes() == (new_dir / filename).read_bytes(), filename
+        size = sum((new_dir / f).stat().st_size for f, _, _ in targets)
+
+    print(f"events={args.events} calendars={len(targets)} bytes={size}")
+    print(f"events_to_ics per calendar: {old_sec:8.3f}s")
+    print(f"write_calendars one pass:   {new_sec:8.3f}s  ({old_sec / new_sec:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""_list_events_from_db ベンチマーク: 旧相関サブクエリ vs インデックス + ROW_NUMBER()。
+
+    python benchmarks/bench_latest_source.py [--sources 100000] [--per-event 5]
+
+event_sources を --sources 件（1イベントあたり --per-event 件）作り、
+インデックス無し + 旧クエリ と 現行スキーマ + 現行クエリ の時間を比較する。
+両者が同じ最新sourceを返すことも確認する（seen_atは一意にしてある）。
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from sector_event_radar.db import connect, init_db
+from sector_event_radar.run_daily import _list_events_from_db
+
+OLD_SQL = """
+SELECT e.canonical_key, es.source_url, es.evidence
+  FROM events e
+  LEFT JOIN event_sources es
+    ON e.canonical_key = es.canonical_key
+   AND es.seen_at = (
+       SELECT MAX(es2.seen_at) FROM event_sources es2
+        WHERE es2.canonical_key = e.canonical_key
+   )
+ WHERE e.status = 'active'
+   AND e.start_at >= ?
+   AND e.start_at <= ?
+ ORDER BY e.start_at ASC
+"""
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _populate(conn, n_sources: int, per_event: int) -> None:
+    n_events = max(1, n_sources // per_event)
+    conn.executemany(
+        "INSERT INTO events VALUES (?, ?, ?, NULL, 'shock', ?, 50, 0.8, 'active', ?)",
+        [
+            (f"shock:k{i}", f"Event {i}", (BASE + timedelta(hours=i)).isoformat(),
+             json.dumps(["semis"]), BASE.isoformat())
+            for i in range(n_events)
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO event_sources VALUES (?, 'claude_extract', ?, ?, ?, ?)",
+        [
+            (f"shock:k{j % n_events}", f"s{j}", f"https://example.com/{j}",
+             f"evidence {j}", (BASE + timedelta(seconds=j)).isoformat())
+            for j in range(n_sources)
+        ],
+    )
+    conn.commit()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sources", type=int, default=100_000)
+    ap.add_argument("--per-event", type=int, default=5)
+    args = ap.parse_args()
+
+    n_events = max(1, args.sources // args.per_event)
+    start, end = BASE, BASE + timedelta(hours=n_events)
+
+    old = connect(":memory:")
+    init_db(old)
+    old.execute("DROP INDEX idx_event_sources_key_seen")  # 旧スキーマ相当
+    _populate(old, args.sources, args.per_event)
+
+    new = connect(":memory:")
+    init_db(new)
+    _populate(new, args.sources, args.per_event)
+
+    t0 = time.perf_counter()
+    old_rows = old.execute(OLD_SQL, (start.isoformat(), end.isoformat())).fetchall()
+    old_sec = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new_events = _list_events_from_db(new, start, end)
+    new_sec = time.perf_counter() - t0
+
+    assert [r["source_url"] for r in old_rows] == [str(e.source_url) for e in new_events]
+    print(f"events={n_events} sources={args.sources}")
+    print(f"old correlated subquery (no index): {old_sec:8.3f}s")
+    print(f"indexed ROW_NUMBER() + Event build: {new_sec:8.3f}s  ({old_sec / new_sec:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""prefilter Stage A ベンチマーク: 旧 _kw_score vs KeywordMatcher。
+
+    python benchmarks/bench_prefilter_stage_a.py [--articles 300]
+
+keywords 50 / 500 / 5000 語で、同じ記事セットのスコア計算時間を比較する。
+両者のスコアが一致することも確認する。
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import time
+
+from sector_event_radar.keyword_matcher import KeywordMatcher
+from sector_event_radar.prefilter import _kw_score
+
+
+def _make_keywords(n: int, rng: random.Random) -> dict:
+    kws = {}
+    while len(kws) < n:
+        words = [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        kws[" ".join(words)] = round(rng.uniform(0.5, 3.0), 2)
+    return kws
+
+
+def _make_articles(n: int, keywords: dict, rng: random.Random) -> list:
+    vocab = list(keywords)
+    filler = ["the", "market", "chip", "supply", "export", "rate", "fed", "demand", "said"]
+    texts = []
+    for _ in range(n):
+        words = []
+        for _ in range(400):  # 見出し+本文の抜粋程度
+            words.append(rng.choice(vocab) if rng.random() < 0.02 else rng.choice(filler))
+        texts.append(" ".join(words).title())
+    return texts
+
+
+def _bench(fn, texts) -> tuple:
+    t0 = time.perf_counter()
+    scores = [fn(t) for t in texts]
+    return time.perf_counter() - t0, scores
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--articles", type=int, default=300)
+    args = ap.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'keywords':>8} {'old_sec':>9} {'build_sec':>9} {'new_sec':>9} {'speedup':>8}")
+    for n_kw in (50, 500, 5000):
+        keywords = _make_keywords(n_kw, rng)
+        texts = _make_articles(args.articles, keywords, rng)
+
+        old_sec, old_scores = _bench(lambda t: _kw_score(t, keywords), texts)
+        t0 = time.perf_counter()
+        matcher = KeywordMatcher(keywords)
+        build_sec = time.perf_counter() - t0
+        new_sec, new_scores = _bench(matcher.score, texts)
+
+        assert old_scores == new_scores, "score mismatch"
+        print(f"{n_kw:>8} {old_sec:>9.3f} {build_sec:>9.3f} {new_sec:>9.3f} {old_sec / new_sec:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -35,8 +35,9 @@ def reaction_ratio(prices: pd.Series, event_dates: List[date]) -> float:
         return float("nan")
 
     idx_dates = set([d for d in event_dates])
-    r_event = r[r.index.date.astype(object).isin(idx_dates)]
-    r_non = r[~r.index.date.astype(object).isin(idx_dates)]
+    is_event = pd.Index(r.index.date).isin(idx_dates)
+    r_event = r[is_event]
+    r_non = r[~is_event]
 
     if r_event.empty or r_non.empty:
         return float("nan")
@@ -44,6 +45,14 @@ def reaction_ratio(prices: pd.Series, event_dates: List[date]) -> float:
     return float(r_event.mean() / r_non.mean())
 
 
+def reaction_ratios(prices: pd.DataFrame, event_dates: List[date]) -> Dict[str, float]:
+    """横持ちの価格（PriceStore.get_prices）の列ごとに reaction_ratio。
+
+    mapping × ticker ごとに価格を取り直さず、ストアから1回読んだフレームを使い回す。
+    """
+    return {str(c): reaction_ratio(prices[c], event_dates) for c in prices.columns}
+
+
 def detect_mapping_changes(
     mapping_key: str,
     ticker: str,
@@ -0,0 +1,49 @@
+"""既出記事URL用のBloomフィルタ。
+
+run開始時に articles テーブルから作り直し、「既に処理済みか？」をメモリだけで判定する。
+- 負（含まれない）は確定。正（含まれる）は error_rate の確率で誤判定
+- 誤判定した記事はその日スキップされるだけ（翌日以降も同じURLは誤判定し続ける）
+  ので error_rate は十分小さく（既定 1e-6）取る
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import Iterable
+
+
+class BloomFilter:
+    """ビット配列 + ダブルハッシング（blake2bの128bitを2つの64bitに分割）。"""
+
+    def __init__(self, capacity: int, error_rate: float = 1e-6) -> None:
+        if not 0.0 < error_rate < 1.0:
+            raise ValueError("error_rate must be in (0, 1)")
+        capacity = max(1, int(capacity))
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.n_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.n_hashes = max(1, int(round(self.n_bits / capacity * math.log(2))))
+        self._bits = bytearray((self.n_bits + 7) // 8)
+        self.count = 0
+
+    def _indexes(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.n_bits
+        for i in range(self.n_hashes):
+            yield (h1 + i * h2) % m
+
+    def add(self, key: str) -> None:
+        bits = self._bits
+        for idx in self._indexes(key):
+            bits[idx >> 3] |= 1 << (idx & 7)
+        self.count += 1
+
+    def update(self, keys: Iterable[str]) -> None:
+        for k in keys:
+            self.add(k)
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[idx >> 3] & (1 << (idx & 7)) for idx in self._indexes(key))
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime
 from typing import Optional, Tuple
 
@@ -13,10 +14,10 @@ def _date_yyyy_mm_dd(dt: datetime) -> str:
 
 
 def _macro_entity_subtype_from_title(title: str, cfg: AppConfig) -> Optional[Tuple[str, str]]:
-    for pat, rule in cfg.macro_rules_compiled():
-        if pat.search(title):
-            return (rule.entity.lower(), rule.sub_type.lower())
-    return None
+    rule = cfg.macro_matcher().match(title)
+    if rule is None:
+        return None
+    return (rule.entity.lower(), rule.sub_type.lower())
 
 
 def _entity_from_tags(tags: list[str]) -> Optional[str]:
@@ -77,3 +78,32 @@ def make_canonical_key(event: Event, cfg: AppConfig, disambiguate_unscheduled: b
     sub_type = slugify_ascii(sub_type, max_len=48)
 
     return f"{category}:{entity}:{sub_type}:{d}"
+
+
+def canonical_config_signature(cfg: AppConfig) -> str:
+    """canonical_key の生成に効く設定（macro_title_map）の短いハッシュ。"""
+    sig = [(p, r.entity, r.sub_type) for p, r in cfg.macro_title_map.items()]
+    return short_hash(json.dumps(sig, ensure_ascii=False), 16)
+
+
+def event_fingerprint(event: Event, salt: str = "") -> str:
+    """(source_name, source_id) ごとの変化検出用ハッシュ。
+
+    upsert の結果（events / event_sources の行）を左右するフィールドだけを使う。
+    salt には canonical_config_signature() を渡す（設定が変わればkeyも変わりうるので全件やり直す）。
+    """
+    payload = [
+        salt,
+        event.canonical_key,
+        event.title,
+        event.start_at.isoformat(),
+        event.end_at.isoformat() if event.end_at else None,
+        event.category,
+        event.sector_tags,
+        int(event.risk_score),
+        float(event.confidence),
+        str(event.source_url) if event.source_url else None,
+        event.evidence,
+        event.action,
+    ]
+    return short_hash(json.dumps(payload, ensure_ascii=False), 16)
@@ -10,10 +10,11 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime, timezone
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import requests
 
+from ..http_client import HttpClient
 from ..models import Event
 
 logger = logging.getLogger(__name__)
@@ -40,6 +41,7 @@ def fetch_federal_register_bis_events(
     start_date: str,
     end_date: str,
     timeout_sec: int = 20,
+    client: Optional[HttpClient] = None,
 ) -> Tuple[List[Event], List[str]]:
     """Federal Register APIからBIS関連の規制イベントを取得。
 
@@ -47,6 +49,7 @@ def fetch_federal_register_bis_events(
         start_date: "YYYY-MM-DD" 取得開始日（publication_date基準）
         end_date: "YYYY-MM-DD" 取得終了日
         timeout_sec: HTTPタイムアウト
+        client: 共有HttpClient（Noneならrequests.getを直接使う）
 
     Returns:
         (events, errors) タプル。部分失敗設計準拠。
@@ -71,7 +74,8 @@ def fetch_federal_register_bis_events(
             "order": "newest",
         }
 
-        resp = requests.get(
+        http_get = client.get if client is not None else requests.get
+        resp = http_get(
             _API_BASE,
             params=params,
             timeout=timeout_sec,
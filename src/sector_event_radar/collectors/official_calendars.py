@@ -16,16 +16,20 @@ Data sources (all free, auto-updating, authoritative):
 """
 from __future__ import annotations
 
+import io
 import logging
 import re
 from collections import Counter
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from zoneinfo import ZoneInfo
 
 import requests
 
 from ..config import AppConfig, MacroTitleRule
+from ..http_client import HttpClient, get_parsed
+from ..macro_matcher import MacroMatcher, match_rule
 from ..models import Event
 
 logger = logging.getLogger(__name__)
@@ -46,6 +50,11 @@ _HTTP_HEADERS = {
     "Accept-Language": "en-US,en;q=0.9",
 }
 
+# Version of the parsed payloads kept in the HTTP cache. Bump when a parser or its
+# dump format changes so a 304 re-parses the stored body instead of serving stale data.
+_ICS_PARSER_VERSION = "ics-dated-2"
+_BLS_HTML_PARSER_VERSION = "bls-html-1"
+
 # BLS HTML schedule pages (fallback when .ics is blocked)
 BLS_HTML_SCHEDULES: Dict[str, Dict[str, str]] = {
     "cpi": {
@@ -90,35 +99,6 @@ _RISK_BY_SUBTYPE: Dict[str, int] = {
 
 # ── ICS VEVENT parser ────────────────────────────────────
 
-def _unfold_ics(text: str) -> str:
-    """RFC5545 line unfolding: CRLF + LWSP → continuation."""
-    return re.sub(r'\r?\n[ \t]', '', text)
-
-
-def _parse_vevent_blocks(ics_text: str) -> List[Dict[str, str]]:
-    """Extract VEVENT blocks from ICS text into list of {prop: value} dicts."""
-    unfolded = _unfold_ics(ics_text)
-    events: List[Dict[str, str]] = []
-    in_event = False
-    current: Dict[str, str] = {}
-
-    for line in unfolded.splitlines():
-        line = line.strip()
-        if line == "BEGIN:VEVENT":
-            in_event = True
-            current = {}
-        elif line == "END:VEVENT":
-            if current:
-                events.append(current)
-            in_event = False
-            current = {}
-        elif in_event and ":" in line:
-            key_part, _, value = line.partition(":")
-            current[key_part] = value
-
-    return events
-
-
 def _parse_datetime_flexible(val: str) -> Optional[datetime]:
     """Parse ICS datetime string with multiple format support.
 
@@ -149,23 +129,8 @@ def _parse_datetime_flexible(val: str) -> Optional[datetime]:
     return None
 
 
-def _parse_dtstart(vevent: Dict[str, str]) -> Optional[datetime]:
-    """Parse DTSTART from a VEVENT dict. Handles timezone variants.
-
-    Patterns seen:
-      BLS:  DTSTART;TZID=US-Eastern:20260310T083000
-      BEA:  DTSTART:20260327T123000Z
-      Also: DTSTART;VALUE=DATE:20260310  (date-only)
-      Also: DTSTART:20260310T0830       (no seconds)
-    """
-    dtstart_key = None
-    dtstart_val = None
-    for k, v in vevent.items():
-        if k.startswith("DTSTART"):
-            dtstart_key = k
-            dtstart_val = v
-            break
-
+def _parse_dtstart_prop(dtstart_key: str, dtstart_val: str) -> Optional[datetime]:
+    """Parse one DTSTART property: key with parameters (e.g. "DTSTART;TZID=US-Eastern") + value."""
     if not dtstart_key or not dtstart_val:
         return None
 
@@ -209,12 +174,90 @@ def _parse_dtstart(vevent: Dict[str, str]) -> Optional[datetime]:
         return None
 
 
-def _get_summary(vevent: Dict[str, str]) -> str:
-    """Extract SUMMARY from VEVENT dict."""
-    for k, v in vevent.items():
-        if k.startswith("SUMMARY"):
-            return v.strip()
-    return ""
+def _iter_unfolded_lines(raw_lines: Iterable[str]) -> Iterator[str]:
+    """RFC5545 line unfolding on the fly: a line starting with SPACE/TAB continues the previous one.
+
+    Lines are whatever raw_lines yields; only a trailing CR/LF is stripped. Unlike
+    str.splitlines(), nothing here breaks on U+2028, form feed, etc. — RFC5545 lines
+    end in CRLF, and those characters may legitimately appear inside a value.
+    """
+    pending: Optional[str] = None
+    for raw in raw_lines:
+        line = raw.rstrip("\r\n")
+        if pending is not None and line[:1] in (" ", "\t"):
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending
+        pending = line
+    if pending is not None:
+        yield pending
+
+
+def _iter_vevents(
+    raw_lines: Iterable[str],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[Tuple[str, datetime]]:
+    """Stream (SUMMARY, DTSTART) for VEVENTs that have both and whose DTSTART is in [start, end].
+
+    Only SUMMARY and DTSTART (with its TZID parameter) are kept per VEVENT; other
+    properties are skipped without building a dict. A bound of None is open.
+    """
+    in_event = False
+    summary_key = summary = dtstart_key = dtstart_val = None
+    for line in _iter_unfolded_lines(raw_lines):
+        line = line.strip()
+        if line == "BEGIN:VEVENT":
+            in_event = True
+            summary_key = summary = dtstart_key = dtstart_val = None
+        elif line == "END:VEVENT":
+            if in_event and summary and summary.strip() and dtstart_key:
+                dt = _parse_dtstart_prop(dtstart_key, dtstart_val)
+                if dt and (start is None or dt >= start) and (end is None or dt <= end):
+                    yield summary.strip(), dt
+            in_event = False
+        elif in_event and ":" in line:
+            # A repeated property keeps the first name seen; repeats of that name overwrite the value
+            if line.startswith("SUMMARY"):
+                key, _, value = line.partition(":")
+                if summary_key is None or key == summary_key:
+                    summary_key, summary = key, value
+            elif line.startswith("DTSTART"):
+                key, _, value = line.partition(":")
+                if dtstart_key is None or key == dtstart_key:
+                    dtstart_key, dtstart_val = key, value
+
+
+def _parse_ics_response(resp, start: Optional[datetime] = None) -> List[Tuple[str, datetime]]:
+    """HTTP response → [(SUMMARY, DTSTART)] for VEVENTs that have both and start on/after start.
+
+    The body is already buffered (the HTTP cache keeps it), so lines are read lazily
+    through StringIO instead of unfolding/splitting the whole multi-year feed up front.
+    newline=None accepts CRLF, LF and bare CR line endings alike.
+    """
+    return list(_iter_vevents(io.StringIO(resp.text, newline=None), start=start))
+
+
+# ── HTTP cache (de)serialization of parsed results ────────
+# Parsed results are cached filtered by the window start only: the collection
+# window slides forward every day, so a 304 must still be able to answer
+# tomorrow's window (later start, later end). Past events are never needed again.
+
+def _dt_dump(dt: datetime) -> List[str]:
+    return [dt.replace(tzinfo=None).isoformat(), getattr(dt.tzinfo, "key", "UTC")]
+
+
+def _dt_load(val: List[str]) -> datetime:
+    return datetime.fromisoformat(val[0]).replace(tzinfo=ZoneInfo(val[1]))
+
+
+def _dump_dated(pairs: List[Tuple[str, datetime]]) -> list:
+    return [[summary, *_dt_dump(dt)] for summary, dt in pairs]
+
+
+def _load_dated(rows: list) -> List[Tuple[str, datetime]]:
+    return [(r[0], _dt_load(r[1:])) for r in rows]
 
 
 # ── Event matching ────────────────────────────────────────
@@ -224,34 +267,34 @@ def _match_and_build_event(
     dt: datetime,
     source_name: str,
     source_url: str,
-    macro_rules: List[Tuple[re.Pattern, MacroTitleRule]],
+    macro_rules: Union[MacroMatcher, List[Tuple[re.Pattern, MacroTitleRule]]],
 ) -> Optional[Event]:
-    """Match VEVENT summary against precompiled macro rules → Event or None."""
-    for pat, rule in macro_rules:
-        if pat.search(summary):
-            sub_type = rule.sub_type.lower()
-            risk = _RISK_BY_SUBTYPE.get(sub_type, 35)
-
-            evidence = f"{source_name}: {summary}, {dt.strftime('%Y-%m-%d %H:%M %Z')}"
-            if len(evidence) > 280:
-                evidence = evidence[:277] + "..."
-
-            return Event(
-                canonical_key=None,
-                title=summary,
-                start_at=dt,
-                end_at=None,
-                category="macro",
-                sector_tags=[],
-                risk_score=risk,
-                confidence=0.95,
-                source_name=source_name,
-                source_url=source_url,
-                source_id=f"{source_name}:{sub_type}:{dt.strftime('%Y-%m-%d')}",
-                evidence=evidence,
-                action="add",
-            )
-    return None
+    """Match VEVENT summary against the shared macro matcher (or precompiled rules) → Event or None."""
+    rule = match_rule(macro_rules, summary)
+    if rule is None:
+        return None
+    sub_type = rule.sub_type.lower()
+    risk = _RISK_BY_SUBTYPE.get(sub_type, 35)
+
+    evidence = f"{source_name}: {summary}, {dt.strftime('%Y-%m-%d %H:%M %Z')}"
+    if len(evidence) > 280:
+        evidence = evidence[:277] + "..."
+
+    return Event(
+        canonical_key=None,
+        title=summary,
+        start_at=dt,
+        end_at=None,
+        category="macro",
+        sector_tags=[],
+        risk_score=risk,
+        confidence=0.95,
+        source_name=source_name,
+        source_url=source_url,
+        source_id=f"{source_name}:{sub_type}:{dt.strftime('%Y-%m-%d')}",
+        evidence=evidence,
+        action="add",
+    )
 
 
 # ── Public API ────────────────────────────────────────────
@@ -263,6 +306,7 @@ def fetch_ics_macro_events(
     start: datetime,
     end: datetime,
     timeout: int = 30,
+    client: Optional[HttpClient] = None,
 ) -> List[Event]:
     """Fetch and parse a government .ics feed → macro Events.
 
@@ -273,28 +317,28 @@ def fetch_ics_macro_events(
         start: only include events on or after this datetime
         end: only include events on or before this datetime
         timeout: HTTP request timeout
+        client: shared HttpClient (None → plain requests.get)
     """
     logger.info("%s: fetching %s", source_name.upper(), ics_url)
-    resp = requests.get(ics_url, headers=_HTTP_HEADERS, timeout=timeout)
-    resp.raise_for_status()
-
-    vevents = _parse_vevent_blocks(resp.text)
-    logger.info("%s: parsed %d VEVENT blocks", source_name.upper(), len(vevents))
+    vevents = get_parsed(
+        client, ics_url, partial(_parse_ics_response, start=start),
+        source=source_name,
+        dump=_dump_dated,
+        load=_load_dated,
+        parser_version=_ICS_PARSER_VERSION,
+        headers=_HTTP_HEADERS,
+        timeout=timeout,
+    )
+    logger.info("%s: parsed %d dated VEVENT blocks from %s", source_name.upper(), len(vevents), start.date())
 
-    # Compile rules once per call (not per event)
-    macro_rules = cfg.macro_rules_compiled()
+    # Shared matcher: compiled once per config, title lookups memoized
+    macro_rules = cfg.macro_matcher()
 
     events: List[Event] = []
     matched_counter: Counter = Counter()
     unmatched_counter: Counter = Counter()
 
-    for ve in vevents:
-        summary = _get_summary(ve)
-        dt = _parse_dtstart(ve)
-
-        if not summary or not dt:
-            continue
-
+    for summary, dt in vevents:
         if dt < start or dt > end:
             continue
 
@@ -429,6 +473,7 @@ def fetch_bls_html_events(
     start: datetime,
     end: datetime,
     timeout: int = 30,
+    client: Optional[HttpClient] = None,
 ) -> List[Event]:
     """Fallback: parse BLS HTML schedule pages for CPI/NFP/PPI release dates."""
     events: List[Event] = []
@@ -440,10 +485,15 @@ def fetch_bls_html_events(
 
         try:
             logger.info("BLS HTML fallback: fetching %s from %s", sub_type.upper(), url)
-            resp = requests.get(url, headers=_HTTP_HEADERS, timeout=timeout)
-            resp.raise_for_status()
-
-            dates = _parse_bls_html_table(resp.text)
+            dates = get_parsed(
+                client, url, lambda resp: _parse_bls_html_table(resp.text),
+                source=f"bls_html:{sub_type}",
+                dump=lambda dts: [_dt_dump(dt) for dt in dts],
+                load=lambda rows: [_dt_load(r) for r in rows],
+                parser_version=_BLS_HTML_PARSER_VERSION,
+                headers=_HTTP_HEADERS,
+                timeout=timeout,
+            )
 
             for dt in dates:
                 if dt < start or dt > end:
@@ -572,14 +622,19 @@ def fetch_official_macro_events(
     cfg: AppConfig,
     start: datetime,
     end: datetime,
+    client: Optional[HttpClient] = None,
 ) -> Tuple[List[Event], List[str]]:
     """Main entry: collect from BLS + BEA + FOMC. Each source independent try/except.
 
+    client is passed through to every HTTP fetch (None → plain requests.get).
+
     Returns:
         (events, errors) tuple matching partial failure design
     """
     events: List[Event] = []
     errors: List[str] = []
+    # Only forward client when set, so call signatures stay as before for client=None
+    http_kw = {"client": client} if client is not None else {}
 
     # BLS — mode-based dispatch
     bls_mode = getattr(cfg, 'bls_mode', 'static')
@@ -587,12 +642,12 @@ def fetch_official_macro_events(
     if bls_mode == "ics":
         # Try .ics first, fall back to HTML, then static
         try:
-            bls = fetch_ics_macro_events(BLS_ICS_URL, "bls", cfg, start, end)
+            bls = fetch_ics_macro_events(BLS_ICS_URL, "bls", cfg, start, end, **http_kw)
             events.extend(bls)
         except Exception as e:
             logger.warning("BLS .ics failed: %s — trying HTML fallback", e)
             try:
-                bls = fetch_bls_html_events(start, end)
+                bls = fetch_bls_html_events(start, end, **http_kw)
                 events.extend(bls)
             except Exception as e2:
                 logger.warning("BLS HTML fallback also failed: %s — falling back to static", e2)
@@ -617,7 +672,7 @@ def fetch_official_macro_events(
 
     # BEA
     try:
-        bea = fetch_ics_macro_events(BEA_ICS_URL, "bea", cfg, start, end)
+        bea = fetch_ics_macro_events(BEA_ICS_URL, "bea", cfg, start, end, **http_kw)
         events.extend(bea)
     except Exception as e:
         msg = f"BEA collector failed: {e}"
@@ -7,33 +7,69 @@ from __future__ import annotations
 
 import logging
 import xml.etree.ElementTree as ET
+from importlib.util import find_spec
 from typing import List, Optional
 
 import requests
 
+from ..http_client import HttpClient, get_parsed
 from ..models import Article
 
 logger = logging.getLogger(__name__)
 
-try:
-    import feedparser
+# feedparser は最初のフィードをパースするときにimport
+_HAS_FEEDPARSER = find_spec("feedparser") is not None
+feedparser = None
 
-    _HAS_FEEDPARSER = True
-except ImportError:
-    _HAS_FEEDPARSER = False
 
+def _load_feedparser() -> bool:
+    """feedparserをimport。importできなければ False（ElementTreeでパース）。"""
+    global _HAS_FEEDPARSER, feedparser
+    if _HAS_FEEDPARSER and feedparser is None:
+        try:
+            import feedparser
+        except ImportError:
+            _HAS_FEEDPARSER = False
+    return _HAS_FEEDPARSER
 
-def fetch_rss(url: str, timeout_sec: int = 20) -> List[Article]:
+
+def fetch_rss(
+    url: str,
+    timeout_sec: int = 20,
+    client: Optional[HttpClient] = None,
+    cache_source: Optional[str] = None,
+) -> List[Article]:
     """RSSまたはAtomフィードを取得してArticleリストを返す。
 
     feedparser利用可能時: feedparserでパース（堅牢、Atom/namespace/不正XML対応）
     feedparser未インストール時: ElementTree直パース（既存動作）
+    client: 共有HttpClient（Noneならrequests.getを直接使う）。
+        client.cacheがあれば条件付きGET、304ならパース済みArticleをキャッシュから返す
+    cache_source: キャッシュ統計のsource名（省略時はURL）
     """
-    r = requests.get(url, timeout=timeout_sec, headers={"User-Agent": "sector-event-radar/0.1"})
-    r.raise_for_status()
-    raw = r.text
+    return get_parsed(
+        client, url, _parse_response,
+        source=cache_source or url,
+        dump=lambda arts: [a.model_dump() for a in arts],
+        load=lambda rows: [Article.model_validate(r) for r in rows],
+        parser_version=_parser_version(),
+        timeout=timeout_sec,
+        headers={"User-Agent": "sector-event-radar/0.1"},
+    )
+
+
+# HTTPキャッシュに保存するパース結果のバージョン。パーサーやArticleの形を変えたら上げる
+_PARSER_VERSION = "rss-1"
 
-    if _HAS_FEEDPARSER:
+
+def _parser_version() -> str:
+    # feedparser と ElementTree で結果が違うので、どちらでパースするかも含める（304ではimportしない）
+    return f"{_PARSER_VERSION}:{'feedparser' if _HAS_FEEDPARSER else 'etree'}"
+
+
+def _parse_response(r: requests.Response) -> List[Article]:
+    raw = r.text
+    if _load_feedparser():
         return _parse_with_feedparser(raw)
     else:
         return _parse_with_etree(raw)
@@ -41,6 +77,8 @@ def fetch_rss(url: str, timeout_sec: int = 20) -> List[Article]:
 
 def _parse_with_feedparser(raw: str) -> List[Article]:
     """feedparserで堅牢パース。RSS2/Atom/RDF/不正XMLすべて対応。"""
+    if not _load_feedparser():
+        raise ImportError("feedparser is not installed")
     d = feedparser.parse(raw)
 
     if d.bozo and not d.entries:
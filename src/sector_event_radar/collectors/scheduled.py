@@ -24,6 +24,8 @@ from zoneinfo import ZoneInfo
 
 import requests
 
+from ..http_client import HttpClient
+from ..macro_matcher import match_rule
 from ..models import Event
 
 logger = logging.getLogger(__name__)
@@ -62,8 +64,10 @@ def fetch_tradingeconomics_events(
     end: str,
     country: str = "united states",
     importance: int = 3,
+    client: Optional[HttpClient] = None,
 ) -> List[Event]:
     """Trading Economics Economic Calendar -> macro Events"""
+    http_get = client.get if client is not None else requests.get
     url = f"{TE_BASE}/calendar/country/{country}/{start}/{end}"
     params = {"c": api_key, "f": "json"}
     if importance > 0:
@@ -71,7 +75,7 @@ def fetch_tradingeconomics_events(
 
     logger.info("TE: fetching %s -> %s (importance>=%d)", start, end, importance)
 
-    resp = requests.get(url, params=params, timeout=30)
+    resp = http_get(url, params=params, timeout=30)
     resp.raise_for_status()
     data = resp.json()
 
@@ -143,8 +147,10 @@ def fetch_fmp_earnings_events(
     start: str,
     end: str,
     tickers: Optional[List[str]] = None,
+    client: Optional[HttpClient] = None,
 ) -> List[Event]:
     """FMP Earnings Calendar -> bellwether Events"""
+    http_get = client.get if client is not None else requests.get
     if tickers is None:
         tickers = ["NVDA", "TSM", "ASML", "AMD", "AVGO",
                     "MSFT", "GOOGL", "AMZN", "META"]
@@ -169,7 +175,7 @@ def fetch_fmp_earnings_events(
         }
 
         logger.info("FMP: fetching %s -> %s", chunk_start_str, chunk_end_str)
-        resp = requests.get(url, params=params, timeout=30)
+        resp = http_get(url, params=params, timeout=30)
         resp.raise_for_status()
         chunk_data = resp.json()
 
@@ -236,14 +242,15 @@ def fetch_fmp_earnings_events(
 
 # ── FMP: Economic Calendar (macro) ──────────────────────
 
-def _match_macro_event(event_name: str, macro_rules: list) -> Optional[tuple]:
+def _match_macro_event(event_name: str, macro_rules) -> Optional[tuple]:
     """macro_title_mapの正規表現でイベント名をマッチング。
     マッチしたら (entity, sub_type) を返す。マッチしなければ None。
+    macro_rules は MacroMatcher か [(re.Pattern, MacroTitleRule), ...]。
     """
-    for pattern, rule in macro_rules:
-        if pattern.search(event_name):
-            return (rule.entity, rule.sub_type)
-    return None
+    rule = match_rule(macro_rules, event_name)
+    if rule is None:
+        return None
+    return (rule.entity, rule.sub_type)
 
 
 # sub_typeベースのrisk_score（イベント名の表記揺れに依存しない）
@@ -284,8 +291,9 @@ def fetch_fmp_macro_events(
     api_key: str,
     start: str,
     end: str,
-    macro_rules: list,
+    macro_rules,
     country: str = "US",
+    client: Optional[HttpClient] = None,
 ) -> List[Event]:
     """FMP Economic Calendar -> macro Events
 
@@ -293,10 +301,12 @@ def fetch_fmp_macro_events(
         api_key: FMP API key
         start: YYYY-MM-DD
         end: YYYY-MM-DD
-        macro_rules: AppConfig.macro_rules_compiled() の戻り値
-            [(re.Pattern, MacroTitleRule), ...]
+        macro_rules: AppConfig.macro_matcher()
+            （旧形式の AppConfig.macro_rules_compiled() の戻り値も可）
         country: フィルタ対象国コード (default: "US")
+        client: 共有HttpClient（Noneならrequests.getを直接使う）
     """
+    http_get = client.get if client is not None else requests.get
     start_dt = datetime.strptime(start, "%Y-%m-%d")
     end_dt = datetime.strptime(end, "%Y-%m-%d")
 
@@ -315,7 +325,7 @@ def fetch_fmp_macro_events(
         }
 
         logger.info("FMP macro: fetching %s -> %s", chunk_start_str, chunk_end_str)
-        resp = requests.get(url, params=params, timeout=30)
+        resp = http_get(url, params=params, timeout=30)
         resp.raise_for_status()
         chunk_data = resp.json()
 
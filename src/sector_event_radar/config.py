@@ -6,12 +6,25 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 import yaml
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+from .keyword_matcher import KeywordMatcher
+from .macro_matcher import MacroMatcher
 
 
 class PrefilterConfig(BaseModel):
     stage_a_threshold: float = 4.0
     stage_b_top_k: int = 30
+    stage_b_model: str = "refit"  # refit: 毎run fit（旧方式） / persistent: events.dbの累積IDF
+    compare_stage_b: bool = False  # 永続モデルも更新し、refitとのランキング差をログに出す（refit時は採点に使わない）
+    stage_b_doc_ttl_days: float = 90  # 永続モデルの計上済み記事キーをこの日数見かけなければ削除（0以下で削除しない）
+
+
+class NearDupConfig(BaseModel):
+    """RSS記事の近似重複（同じ配信記事の別URL転載）をprefilter前に1本に束ねる"""
+    enabled: bool = False
+    max_distance: int = 7  # SimHash(64bit)のハミング距離がこれ以下なら同じ記事とみなす（短いRSS要約は数bitずれる）
+    lookback_days: float = 14  # 過去runの処理済み記事とも照合する期間（0以下で照合しない）
 
 
 class MacroTitleRule(BaseModel):
@@ -29,6 +42,47 @@ class LlmConfig(BaseModel):
     """Claude抽出のコスト・安全ガードレール"""
     max_articles_per_run: int = 10  # 1回のrun_dailyでClaude APIに送る最大記事数
     model: str = "claude-haiku-4-5-20251001"
+    backend: str = "messages"  # messages: 記事ごとに並列リクエスト / batch: Message Batchesで一括
+    batch_poll_sec: float = 30  # batch: 完了ポーリング間隔
+    batch_timeout_sec: float = 3600  # batch: これを過ぎても終わらなければ全記事失敗扱い（翌日再試行）
+    workers: int = 4  # 並列抽出ワーカー数
+    pack: bool = False  # 短い記事を複数まとめて1リクエストで抽出（article_index付きスキーマ）
+    pack_token_budget: int = 3000  # 1パックの記事テキスト合計の入力トークン見積り上限
+    pack_max_articles: int = 5  # 1パックの最大記事数
+    prompt_cache: bool = True  # SYSTEM_PROMPTとツール定義をプロンプトキャッシュ（cache_control）に載せる
+    requests_per_min: float = 50  # 全ワーカー合計のリクエスト上限（0で無制限）
+    input_tokens_per_min: float = 50_000  # 全ワーカー合計の入力トークン上限（0で無制限）
+    cache: bool = True  # 抽出結果キャッシュ（events.db内 llm_cache、同一内容の記事はAPIを呼ばない）
+    cache_ttl_days: float = 30  # これより古いキャッシュは削除（0で無期限）
+    cache_max_entries: int = 5000  # 件数上限（最後に使われたのが古い順に削除、0で無制限）
+
+
+class CollectorsConfig(BaseModel):
+    """Phase 1 collectorの並列実行設定"""
+    max_workers: int = 4  # 同時に走らせるcollector数
+    deadline_sec: float = 120.0  # collector 1つあたりの締切（実行開始から）
+    deadlines: Dict[str, float] = Field(default_factory=dict)  # collector名ごとの上書き（例: {"fmp": 300}）
+    straggler_grace_sec: float = 30.0  # 締切超過で走り続けるcollectorを、共有HttpClient/キャッシュを閉じる前に待つ時間
+
+    def deadline_for(self, name: str) -> float:
+        return float(self.deadlines.get(name, self.deadline_sec))
+
+
+class HttpConfig(BaseModel):
+    """共有HttpClientの設定（全collector/Claude抽出で1つを使い回す）"""
+    pool_maxsize: int = 10  # ホストあたりのkeep-aliveコネクション数
+    per_host_limit: int = 4  # ホストあたりの同時リクエスト数
+    max_retries: int = 2  # 接続エラー/429/5xx のリトライ回数
+    backoff_sec: float = 1.0  # 初回バックオフ（以降2倍）
+    cache: bool = True  # RSS/.ics/BLS HTMLの条件付きGETキャッシュ（events.db内 http_cache）
+
+
+class DbConfig(BaseModel):
+    """events.db アクセスの設定"""
+    seen_bloom: bool = False  # 既出記事判定をメモリ上のBloomフィルタで行う（run開始時にarticlesから再構築）
+    seen_bloom_error_rate: float = 1e-6  # 偽陽性率（誤って既出扱いされる新着記事の割合）
+    pragmas: Dict[str, Any] = Field(default_factory=dict)  # db.DEFAULT_PRAGMASへの上書き（例: {"mmap_size": 0}）
+    skip_unchanged: bool = True  # (source_name, source_id) の指紋が前回と同じイベントはcanonical_key生成〜upsertを省く
 
 
 class SourcesConfig(BaseModel):
@@ -38,6 +92,7 @@ class SourcesConfig(BaseModel):
 class AppConfig(BaseModel):
     keywords: Dict[str, float] = Field(default_factory=dict)
     prefilter: PrefilterConfig = Field(default_factory=PrefilterConfig)
+    near_dup: NearDupConfig = Field(default_factory=NearDupConfig)
     macro_title_map: Dict[str, MacroTitleRule] = Field(default_factory=dict)
     sources: SourcesConfig = Field(default_factory=SourcesConfig)
     bellwether_tickers: List[str] = Field(
@@ -50,6 +105,14 @@ class AppConfig(BaseModel):
     bls_mode: str = "static"
     bls_static: Optional[Dict[str, Any]] = None
     llm: LlmConfig = Field(default_factory=LlmConfig)
+    collectors: CollectorsConfig = Field(default_factory=CollectorsConfig)
+    http: HttpConfig = Field(default_factory=HttpConfig)
+    db: DbConfig = Field(default_factory=DbConfig)
+
+    # keywords から構築したStage Aマッチャ（keywordsが変わったら作り直す）
+    _kw_matcher: Optional[Tuple[tuple, KeywordMatcher]] = PrivateAttr(default=None)
+    # macro_title_map から構築したマッチャ（同上）
+    _macro_matcher: Optional[Tuple[tuple, MacroMatcher]] = PrivateAttr(default=None)
 
     @classmethod
     def load(cls, path: str | Path) -> "AppConfig":
@@ -57,8 +120,20 @@ class AppConfig(BaseModel):
         data = yaml.safe_load(p.read_text(encoding="utf-8"))
         return cls.model_validate(data)
 
+    def keyword_matcher(self) -> KeywordMatcher:
+        """prefilter Stage A用のAho–Corasickマッチャ。configごとに1回だけ構築する。"""
+        sig = tuple(self.keywords.items())
+        if self._kw_matcher is None or self._kw_matcher[0] != sig:
+            self._kw_matcher = (sig, KeywordMatcher(self.keywords))
+        return self._kw_matcher[1]
+
+    def macro_matcher(self) -> MacroMatcher:
+        """macro_title_map のタイトルマッチャ。configごとに1回だけコンパイルする。"""
+        sig = tuple((p, r.entity, r.sub_type) for p, r in self.macro_title_map.items())
+        if self._macro_matcher is None or self._macro_matcher[0] != sig:
+            self._macro_matcher = (sig, MacroMatcher(self.macro_title_map.items()))
+        return self._macro_matcher[1]
+
     def macro_rules_compiled(self) -> List[Tuple[re.Pattern, MacroTitleRule]]:
-        compiled: List[Tuple[re.Pattern, MacroTitleRule]] = []
-        for pattern, rule in self.macro_title_map.items():
-            compiled.append((re.compile(pattern), rule))
-        return compiled
+        """[(コンパイル済みパターン, ルール), ...]（macro_matcher() のものを共有）"""
+        return list(self.macro_matcher().rules)
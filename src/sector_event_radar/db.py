@@ -3,9 +3,10 @@ from __future__ import annotations
 import json
 import sqlite3
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
+from .bloom import BloomFilter
 from .models import Event
 
 
@@ -57,20 +58,183 @@ CREATE TABLE IF NOT EXISTS articles (
   relevance_score REAL NOT NULL,
   fetched_at TEXT NOT NULL
 );
-"""
 
+CREATE TABLE IF NOT EXISTS applied_migrations (
+  name TEXT PRIMARY KEY,
+  rows_affected INTEGER NOT NULL,
+  applied_at TEXT NOT NULL
+);
+"""
 
-def connect(db_path: str) -> sqlite3.Connection:
+# 接続プロファイル
+# - WAL + synchronous=NORMAL: commitごとのfsyncをやめ、チェックポイント時だけ同期
+# - mmap/cache: events.dbは数十MB規模なので丸ごとメモリに載る
+# WALファイルは最後の接続のclose時にチェックポイントされ消える
+# （GitHub ActionsでReleaseに上げるのは .sqlite 1ファイルだけなので、run_dailyは必ずcloseする）
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # 負数はKiB指定 → 64MiB
+    "temp_store": "MEMORY",
+    "busy_timeout": 30_000,
+}
+
+
+def connect(db_path: str, pragmas: Optional[Dict[str, Any]] = None) -> sqlite3.Connection:
+    """pragmas=None なら DEFAULT_PRAGMAS を適用。{} で素のSQLite設定のまま開く。"""
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
+    for name, value in (DEFAULT_PRAGMAS if pragmas is None else pragmas).items():
+        conn.execute(f"PRAGMA {name} = {value}")
     return conn
 
 
+# スキーマバージョン（PRAGMA user_version）。
+# 各ステップは冪等なSQLで、user_versionより新しいものだけを順に適用する。
+# スキーマを変えるときはステップを末尾に追加し、既存ステップは書き換えない。
+_SCHEMA_STEPS: List[str] = [
+    # v1: 初期スキーマ + よく使う検索向けのインデックス
+    SCHEMA_SQL + """
+    CREATE INDEX IF NOT EXISTS idx_events_start_at ON events(start_at);
+    CREATE INDEX IF NOT EXISTS idx_events_status ON events(status);
+    """,
+    # v2: イベントごとの最新sourceを引くためのインデックス（_list_events_from_db）
+    """
+    CREATE INDEX IF NOT EXISTS idx_event_sources_key_seen ON event_sources(canonical_key, seen_at);
+    """,
+    # v3: 処理済み記事のSimHash（近似重複の判定用、near_dup.py）
+    """
+    CREATE TABLE IF NOT EXISTS article_simhash (
+      url TEXT PRIMARY KEY,
+      simhash INTEGER NOT NULL,
+      seen_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_article_simhash_seen_at ON article_simhash(seen_at);
+    """,
+    # v4: 営業日カレンダーのキャッシュ（session_calendar.py、窓内の平日休場日をJSON配列で）
+    """
+    CREATE TABLE IF NOT EXISTS session_calendars (
+      name TEXT PRIMARY KEY,
+      start_date TEXT NOT NULL,
+      end_date TEXT NOT NULL,
+      holidays TEXT NOT NULL,
+      built_at TEXT NOT NULL
+    );
+    """,
+    # v5: 終値のローカルストア（price_store.py）。price_rangesはtickerごとの取得済み期間
+    """
+    CREATE TABLE IF NOT EXISTS prices (
+      ticker TEXT NOT NULL,
+      date TEXT NOT NULL,
+      close REAL NOT NULL,
+      PRIMARY KEY (ticker, date)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS price_ranges (
+      ticker TEXT PRIMARY KEY,
+      start_date TEXT NOT NULL,
+      end_date TEXT NOT NULL,
+      fetched_at TEXT NOT NULL
+    );
+    """,
+    # v6: 書き出したICSファイルごとの内容ハッシュと収録canonical_keyのダイジェスト
+    """
+    CREATE TABLE IF NOT EXISTS ics_manifest (
+      filename TEXT PRIMARY KEY,
+      content_hash TEXT NOT NULL,
+      keys_digest TEXT NOT NULL,
+      written_at TEXT NOT NULL
+    );
+    """,
+    # v7: collectorのレコードごとの指紋（前回と同じ内容ならupsertを省く、canonical.event_fingerprint）
+    """
+    CREATE TABLE IF NOT EXISTS event_fingerprints (
+      source_name TEXT NOT NULL,
+      source_id TEXT NOT NULL,
+      fingerprint TEXT NOT NULL,
+      seen_at TEXT NOT NULL,
+      PRIMARY KEY (source_name, source_id)
+    ) WITHOUT ROWID;
+    """,
+    # v8: 条件付きGETのレスポンスキャッシュ（http_cache.py）。以前はHttpCacheが自前で作っていた
+    # （parser_version列なし）。中身はキャッシュなので作り直す
+    """
+    DROP TABLE IF EXISTS http_cache;
+    CREATE TABLE http_cache (
+      url TEXT PRIMARY KEY,
+      source TEXT NOT NULL,
+      etag TEXT,
+      last_modified TEXT,
+      body BLOB NOT NULL,
+      parsed TEXT,
+      parser_version TEXT NOT NULL DEFAULT '',
+      fetched_at TEXT NOT NULL
+    );
+    """,
+    # v9: prefilter Stage Bの永続TF-IDF（stage_b_model.py）。以前はStageBModel.loadが自前で作っていた。
+    # stage_b_docs に最後に見かけた時刻を足し、古い記事キーを消せるようにする（既存キーは今見かけたことにする）
+    """
+    CREATE TABLE IF NOT EXISTS stage_b_df (
+      bucket INTEGER PRIMARY KEY,
+      df INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS stage_b_meta (
+      key TEXT PRIMARY KEY,
+      value TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS stage_b_docs (
+      doc_key TEXT PRIMARY KEY
+    );
+    CREATE TABLE IF NOT EXISTS stage_b_docs_v9 (
+      doc_key TEXT PRIMARY KEY,
+      seen_at TEXT NOT NULL
+    );
+    INSERT OR IGNORE INTO stage_b_docs_v9 (doc_key, seen_at)
+      SELECT doc_key, strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') FROM stage_b_docs;
+    DROP TABLE stage_b_docs;
+    ALTER TABLE stage_b_docs_v9 RENAME TO stage_b_docs;
+    CREATE INDEX IF NOT EXISTS idx_stage_b_docs_seen_at ON stage_b_docs(seen_at);
+    """,
+    # v10: Claude抽出結果のキャッシュ（llm/extract_cache.py）。以前はExtractCacheが自前で作っていた
+    """
+    CREATE TABLE IF NOT EXISTS llm_cache (
+      cache_key TEXT PRIMARY KEY,
+      model TEXT NOT NULL,
+      prompt_version TEXT NOT NULL,
+      content_hash TEXT NOT NULL,
+      tool_output TEXT NOT NULL,
+      created_at TEXT NOT NULL,
+      used_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_llm_cache_used_at ON llm_cache(used_at);
+    """,
+]
+SCHEMA_VERSION = len(_SCHEMA_STEPS)
+
+
 def init_db(conn: sqlite3.Connection) -> None:
-    conn.executescript(SCHEMA_SQL)
-    # よく使う検索向けのインデックス（壊さない範囲で追加）
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_start_at ON events(start_at);")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_status ON events(status);")
+    """スキーマを最新にする。適用済みバージョンならPRAGMA 1回で終わる。"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    for v, sql in enumerate(_SCHEMA_STEPS[version:], start=version + 1):
+        conn.executescript(sql)
+        conn.execute(f"PRAGMA user_version = {v}")
+    conn.commit()
+
+
+def migration_applied(conn: sqlite3.Connection, name: str) -> bool:
+    cur = conn.execute("SELECT 1 FROM applied_migrations WHERE name = ?", (name,))
+    return cur.fetchone() is not None
+
+
+def record_migration(conn: sqlite3.Connection, name: str, rows_affected: int) -> None:
+    conn.execute(
+        """INSERT INTO applied_migrations (name, rows_affected, applied_at) VALUES (?, ?, ?)
+           ON CONFLICT(name) DO UPDATE SET rows_affected = excluded.rows_affected,
+                                           applied_at = excluded.applied_at""",
+        (name, int(rows_affected), _now_iso()),
+    )
     conn.commit()
 
 
@@ -79,8 +243,12 @@ def _iso(dt: datetime) -> str:
     return dt.isoformat()
 
 
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    return _now().isoformat()
 
 
 def get_event_row(conn: sqlite3.Connection, canonical_key: str):
@@ -180,9 +348,7 @@ def upsert_event(conn: sqlite3.Connection, event: Event) -> str:
     return "merged"
 
 
-def _upsert_event_source(conn: sqlite3.Connection, event: Event, now_iso: str) -> None:
-    conn.execute(
-        """
+_UPSERT_SOURCE_SQL = """
         INSERT INTO event_sources (canonical_key, source_name, source_id, source_url, evidence, seen_at)
         VALUES (?, ?, ?, ?, ?, ?)
         ON CONFLICT(source_name, source_id)
@@ -190,18 +356,230 @@ def _upsert_event_source(conn: sqlite3.Connection, event: Event, now_iso: str) -
                       source_url=excluded.source_url,
                       evidence=excluded.evidence,
                       seen_at=excluded.seen_at
-        """,
-        (
-            event.canonical_key,
-            event.source_name,
-            event.source_id,
-            str(event.source_url) if event.source_url else None,
-            event.evidence,
-            now_iso,
-        ),
+        """
+
+
+def _event_source_params(event: Event, now_iso: str) -> tuple:
+    return (
+        event.canonical_key,
+        event.source_name,
+        event.source_id,
+        str(event.source_url) if event.source_url else None,
+        event.evidence,
+        now_iso,
     )
 
 
+def _upsert_event_source(conn: sqlite3.Connection, event: Event, now_iso: str) -> None:
+    conn.execute(_UPSERT_SOURCE_SQL, _event_source_params(event, now_iso))
+
+
+_EVENT_COLUMNS = (
+    "canonical_key", "title", "start_at", "end_at", "category", "sector_tags",
+    "risk_score", "confidence", "status", "updated_at",
+)
+
+
+def upsert_events(
+    conn: sqlite3.Connection,
+    events: Iterable[Event],
+    changed: Optional[Set[str]] = None,
+) -> Dict[str, int]:
+    """upsert_event のバッチ版。判定は upsert_event と完全に同じ。
+
+    - 全canonical_keyの既存行を1回（チャンク化IN句）で先読み
+    - inserted/updated/merged/cancelled の判定はメモリ上の行状態で行う
+      （同じkeyが複数回来ても、前のイベントを反映した状態で次を判定する）
+    - 書き込みは executemany で1トランザクション・1commit
+    - changed を渡すと events の行が変わった（inserted/updated/cancelled）keyを追加する
+    - event_sources.seen_at は入力順に1マイクロ秒ずつ進める。最新sourceの判定（seen_at降順）が
+      1件ずつ upsert_event を呼んだときと同じ「後に処理した方」になる
+    return {"inserted": n, "updated": n, "merged": n, "cancelled": n, "ignored": n}
+    """
+    events = list(events)
+    for ev in events:
+        if not ev.canonical_key:
+            raise ValueError("event.canonical_key is required before upsert")
+
+    stats = {"inserted": 0, "updated": 0, "merged": 0, "cancelled": 0, "ignored": 0}
+    now = _now()
+    now_iso = _iso(now)
+
+    # 既存行の先読み
+    keys = list(dict.fromkeys(ev.canonical_key for ev in events if ev.action != "ignore"))
+    rows: Dict[str, dict] = {}
+    for i in range(0, len(keys), _IN_CHUNK):
+        chunk = keys[i:i + _IN_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        cur = conn.execute(
+            f"SELECT {', '.join(_EVENT_COLUMNS)} FROM events WHERE canonical_key IN ({placeholders})",
+            chunk,
+        )
+        for r in cur:
+            rows[r[0]] = dict(zip(_EVENT_COLUMNS, r))
+
+    inserted: Set[str] = set()  # このバッチで新規INSERTするkey
+    dirty: Set[str] = set()  # 既存行のうち書き換えるkey
+    source_params: List[tuple] = []
+
+    for event in events:
+        if event.action == "ignore":
+            stats["ignored"] += 1
+            continue
+
+        key = event.canonical_key
+        row = rows.get(key)
+        start_iso = _iso(event.start_at)
+        end_iso = _iso(event.end_at) if event.end_at else None
+
+        if row is None:
+            rows[key] = {
+                "canonical_key": key,
+                "title": event.title,
+                "start_at": start_iso,
+                "end_at": end_iso,
+                "category": event.category,
+                "sector_tags": json.dumps(event.sector_tags, ensure_ascii=False),
+                "risk_score": int(event.risk_score),
+                "confidence": float(event.confidence),
+                "status": "cancelled" if event.action == "cancel" else "active",
+                "updated_at": now_iso,
+            }
+            inserted.add(key)
+            result = "cancelled" if event.action == "cancel" else "inserted"
+        elif event.action == "cancel":
+            row["status"] = "cancelled"
+            row["updated_at"] = now_iso
+            dirty.add(key)
+            result = "cancelled"
+        else:
+            # updateトリガー: start/end変更 or risk_score±20以上
+            start_changed = row["start_at"] != start_iso
+            end_changed = (row["end_at"] or None) != end_iso
+            risk_big_change = abs(int(row["risk_score"]) - int(event.risk_score)) >= 20
+            if start_changed or end_changed or risk_big_change:
+                row.update(
+                    title=event.title,
+                    start_at=start_iso,
+                    end_at=end_iso,
+                    category=event.category,
+                    sector_tags=json.dumps(event.sector_tags, ensure_ascii=False),
+                    risk_score=int(event.risk_score),
+                    confidence=float(event.confidence),
+                    status="active",
+                    updated_at=now_iso,
+                )
+                dirty.add(key)
+                result = "updated"
+            else:
+                result = "merged"
+
+        seen_iso = _iso(now + timedelta(microseconds=len(source_params)))
+        source_params.append(_event_source_params(event, seen_iso))
+        stats[result] += 1
+        if changed is not None and result != "merged":
+            changed.add(key)
+
+    with conn:
+        conn.executemany(
+            f"INSERT INTO events ({', '.join(_EVENT_COLUMNS)}) VALUES ({', '.join('?' * len(_EVENT_COLUMNS))})",
+            [tuple(rows[k][c] for c in _EVENT_COLUMNS) for k in keys if k in inserted],
+        )
+        conn.executemany(
+            f"UPDATE events SET {', '.join(c + ' = ?' for c in _EVENT_COLUMNS[1:])} WHERE canonical_key = ?",
+            [
+                tuple(rows[k][c] for c in _EVENT_COLUMNS[1:]) + (k,)
+                for k in keys if k in dirty and k not in inserted
+            ],
+        )
+        conn.executemany(_UPSERT_SOURCE_SQL, source_params)
+
+    return stats
+
+
+def latest_sources(conn, keys: Iterable[str]) -> Dict[str, Tuple[Optional[str], str]]:
+    """canonical_key → 最新source の (source_url, evidence)。ICSのURL/DESCRIPTIONに出る値。
+
+    最新の選び方は run_daily._list_events_from_db と同じ（seen_at降順、同時刻はrowid降順）。
+    """
+    uniq = list(dict.fromkeys(keys))
+    out: Dict[str, Tuple[Optional[str], str]] = {}
+    for i in range(0, len(uniq), _IN_CHUNK):
+        chunk = uniq[i:i + _IN_CHUNK]
+        cur = conn.execute(
+            f"""SELECT canonical_key, source_url, evidence FROM (
+                    SELECT canonical_key, source_url, evidence,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY canonical_key ORDER BY seen_at DESC, rowid DESC
+                           ) AS rn
+                      FROM event_sources
+                     WHERE canonical_key IN ({",".join("?" * len(chunk))})
+                ) WHERE rn = 1""",
+            chunk,
+        )
+        for key, url, evidence in cur:
+            out[key] = (url, evidence)
+    return out
+
+
+def load_event_fingerprints(conn, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+    """(source_name, source_id) → 前回upsertしたときの指紋。チャンク化した行値IN句で引く。"""
+    uniq = list(dict.fromkeys(keys))
+    out: Dict[Tuple[str, str], str] = {}
+    step = _IN_CHUNK // 2
+    for i in range(0, len(uniq), step):
+        chunk = uniq[i:i + step]
+        cur = conn.execute(
+            "SELECT source_name, source_id, fingerprint FROM event_fingerprints "
+            f"WHERE (source_name, source_id) IN (VALUES {','.join(['(?, ?)'] * len(chunk))})",
+            [v for pair in chunk for v in pair],
+        )
+        for name, sid, fp in cur:
+            out[(name, sid)] = fp
+    return out
+
+
+def record_event_fingerprints(conn, rows: Iterable[Tuple[str, str, str]]) -> int:
+    """(source_name, source_id, fingerprint) をまとめて記録。1トランザクション・1commit。"""
+    now_iso = _now_iso()
+    params = [(name, sid, fp, now_iso) for name, sid, fp in rows]
+    if not params:
+        return 0
+    with conn:
+        conn.executemany(
+            """INSERT INTO event_fingerprints (source_name, source_id, fingerprint, seen_at)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT(source_name, source_id) DO UPDATE SET
+                   fingerprint = excluded.fingerprint,
+                   seen_at = excluded.seen_at""",
+            params,
+        )
+    return len(params)
+
+
+def load_ics_manifest(conn) -> Dict[str, Tuple[str, str]]:
+    """filename → (content_hash, keys_digest)"""
+    return {
+        r[0]: (r[1], r[2])
+        for r in conn.execute("SELECT filename, content_hash, keys_digest FROM ics_manifest")
+    }
+
+
+def save_ics_manifest(conn, rows: Iterable[Tuple[str, str, str]]) -> None:
+    """(filename, content_hash, keys_digest) をまとめて記録。"""
+    now_iso = _now_iso()
+    with conn:
+        conn.executemany(
+            """INSERT INTO ics_manifest (filename, content_hash, keys_digest, written_at)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT(filename) DO UPDATE SET
+                   content_hash = excluded.content_hash,
+                   keys_digest = excluded.keys_digest,
+                   written_at = excluded.written_at""",
+            [(f, h, d, now_iso) for f, h, d in rows],
+        )
+
+
 def is_article_seen(conn, url: str) -> bool:
     """articlesテーブルで既処理記事をチェック"""
     cur = conn.execute("SELECT 1 FROM articles WHERE url = ?", (url,))
@@ -211,15 +589,83 @@ def is_article_seen(conn, url: str) -> bool:
 def mark_article_seen(conn, url: str, content_hash: str, relevance_score: float) -> None:
     """Claude抽出済み記事をarticlesテーブルに記録。
     再クロール時はcontent_hash/relevance_score/fetched_atを更新。"""
-    from datetime import datetime, timezone
-    conn.execute(
-        """INSERT INTO articles
-           (url, content_hash, relevance_score, fetched_at)
-           VALUES (?, ?, ?, ?)
-           ON CONFLICT(url) DO UPDATE SET
-               content_hash = excluded.content_hash,
-               relevance_score = excluded.relevance_score,
-               fetched_at = excluded.fetched_at""",
-        (url, content_hash, relevance_score, datetime.now(timezone.utc).isoformat()),
-    )
-    conn.commit()
+    mark_articles_seen(conn, [(url, content_hash, relevance_score)])
+
+
+# SQLiteの変数上限（古いビルドは999）に余裕を持たせたIN句のチャンクサイズ
+_IN_CHUNK = 500
+
+
+def seen_urls(conn, urls: Iterable[str]) -> Set[str]:
+    """urlsのうちarticlesテーブルに記録済みのものを返す（チャンク化したIN句でまとめて引く）。"""
+    uniq = list(dict.fromkeys(urls))
+    found: Set[str] = set()
+    for i in range(0, len(uniq), _IN_CHUNK):
+        chunk = uniq[i:i + _IN_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        cur = conn.execute(f"SELECT url FROM articles WHERE url IN ({placeholders})", chunk)
+        found.update(r[0] for r in cur)
+    return found
+
+
+def mark_articles_seen(conn, rows: Iterable[Tuple[str, str, float]]) -> int:
+    """(url, content_hash, relevance_score) をまとめて記録。1トランザクション・1commit。"""
+    now_iso = _now_iso()
+    params = [(url, h, float(score), now_iso) for url, h, score in rows]
+    if not params:
+        return 0
+    with conn:
+        conn.executemany(
+            """INSERT INTO articles
+               (url, content_hash, relevance_score, fetched_at)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT(url) DO UPDATE SET
+                   content_hash = excluded.content_hash,
+                   relevance_score = excluded.relevance_score,
+                   fetched_at = excluded.fetched_at""",
+            params,
+        )
+    return len(params)
+
+
+def _to_signed64(v: int) -> int:
+    # SQLiteのINTEGERは符号付き64bit
+    return v - (1 << 64) if v >= 1 << 63 else v
+
+
+def record_article_simhashes(conn, rows: Iterable[Tuple[str, int]]) -> int:
+    """(url, simhash) をまとめて記録。1トランザクション・1commit。"""
+    now_iso = _now_iso()
+    params = [(url, _to_signed64(fp), now_iso) for url, fp in rows]
+    if not params:
+        return 0
+    with conn:
+        conn.executemany(
+            """INSERT INTO article_simhash (url, simhash, seen_at) VALUES (?, ?, ?)
+               ON CONFLICT(url) DO UPDATE SET
+                   simhash = excluded.simhash,
+                   seen_at = excluded.seen_at""",
+            params,
+        )
+    return len(params)
+
+
+def load_article_simhashes(conn, since: Optional[datetime] = None) -> List[Tuple[str, int]]:
+    """since以降に記録された (url, simhash)。simhashは0〜2^64-1に戻して返す。"""
+    sql = "SELECT url, simhash FROM article_simhash"
+    params: tuple = ()
+    if since is not None:
+        sql += " WHERE seen_at >= ?"
+        params = (_iso(since),)
+    return [(url, fp & 0xFFFFFFFFFFFFFFFF) for url, fp in conn.execute(sql, params)]
+
+
+def build_seen_bloom(conn, error_rate: float = 1e-6, headroom: int = 10_000) -> BloomFilter:
+    """articlesテーブルの全URLからBloomフィルタを作る（run開始時に1回）。
+
+    headroom: このrunで追加されうる件数の見込み（容量 = 既存件数 + headroom）
+    """
+    n = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+    bloom = BloomFilter(capacity=n + headroom, error_rate=error_rate)
+    bloom.update(r[0] for r in conn.execute("SELECT url FROM articles"))
+    return bloom
@@ -1,20 +1,18 @@
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 from typing import List, Optional
 
 from zoneinfo import ZoneInfo
 
+from . import session_calendar
 from .models import Event
+from .session_calendar import SessionCalendar
 
-try:
-    import pandas as pd
-    import exchange_calendars as ecals
-
-    _HAS_EXCHANGE_CAL = True
-except Exception:
-    _HAS_EXCHANGE_CAL = False
+logger = logging.getLogger(__name__)
 
 
 NY_TZ = ZoneInfo("America/New_York")
@@ -36,16 +34,37 @@ def _add_months(y: int, m: int, add: int) -> tuple[int, int]:
     return y2, m2
 
 
-def generate_opex_events(start_year: int, start_month: int, months: int) -> List[Event]:
+@lru_cache(maxsize=8)
+def _xnys_for_years(first_year: int, last_year: int) -> Optional[SessionCalendar]:
+    """calendar未指定時のフォールバック: exchange_calendarsからその場で作る（プロセス内で使い回す）。"""
+    if not session_calendar._HAS_EXCHANGE_CAL:
+        return None
+    try:
+        return session_calendar.build_from_exchange_calendars(
+            "XNYS", date(first_year, 1, 1), date(last_year, 12, 31),
+        )
+    except Exception as e:
+        logger.warning("XNYS calendar unavailable, OPEX not holiday-adjusted: %s", e)
+        return None
+
+
+def generate_opex_events(
+    start_year: int, start_month: int, months: int,
+    calendar: Optional[SessionCalendar] = None,
+) -> List[Event]:
     """Spec M5:
     第3金曜日(OPEX)を計算し、XNYSの休場日なら前営業日にずらす。
+
+    calendar: 営業日カレンダー（run_dailyはevents.dbにキャッシュしたものを渡す）。
+        Noneならexchange_calendarsから作る。窓の外の月は補正しない。
     """
     if months <= 0:
         return []
 
-    cal = None
-    if _HAS_EXCHANGE_CAL:
-        cal = ecals.get_calendar("XNYS")
+    cal = calendar
+    if cal is None:
+        last_year, _ = _add_months(start_year, start_month, months - 1)
+        cal = _xnys_for_years(start_year, last_year)
 
     out: List[Event] = []
     for i in range(months):
@@ -54,10 +73,10 @@ def generate_opex_events(start_year: int, start_month: int, months: int) -> List
         adj = tf
 
         if cal is not None:
-            ts = pd.Timestamp(tf)
-            if not cal.is_session(ts):
-                prev = cal.date_to_session(ts, direction="previous")
-                adj = prev.date()
+            if cal.covers(tf):
+                adj = cal.previous_session(tf)
+            else:
+                logger.warning("OPEX %s outside %s calendar window, not adjusted", tf, cal.name)
 
         # OPEXは「その日」イベントとして扱い、時刻は16:00 ETに固定（要TZ）
         start_at = datetime(adj.year, adj.month, adj.day, 16, 0, tzinfo=NY_TZ)
@@ -0,0 +1,124 @@
+"""永続HTTPレスポンスキャッシュ（条件付きGET用）。
+
+BLS/BEA .ics・BLS HTMLスケジュール・RSSは滅多に変わらないのに毎run全量DLしていた。
+ETag/Last-Modified と本文、さらに「パース済み結果(JSON)」を events.db の
+http_cache テーブルに保存し、次回は If-None-Match / If-Modified-Since を送る。
+304なら本文DLもパースも丸ごとスキップしてパース済み結果を返す。
+
+- DBファイルはevents.dbと共有（GitHub ActionsでReleaseに保存されるのはこの1ファイルだけ）
+- collectorはスレッドで並列実行されるので、専用コネクション + Lock で直列化
+- source単位で hits / misses / bytes_saved を集計しrun summaryに出す
+- パース済み結果には呼び出し側のparser_versionを添える。collectorのparse/dumpを変えたら
+  バージョンを上げれば、304でも古いパース結果ではなく保存済み本文から作り直される
+- テーブルは db._SCHEMA_STEPS で作る（open時に init_db）
+- close() 後は常にミス・保存しない（締切超過で走り続けるcollectorが閉じた接続に触らない）
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from .db import init_db
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: bytes
+    parsed: Optional[str]  # JSON文字列（collectorが保存したパース済み結果）
+    parser_version: str = ""  # parsedを作ったときのparser_version
+
+
+class HttpCache:
+    """events.db内のhttp_cacheテーブル。スレッドセーフ。"""
+
+    def __init__(self, db_path: str) -> None:
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        init_db(self._conn)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._closed = False
+
+    # ── lookup / store ──
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        with self._lock:
+            if self._closed:
+                return None
+            row = self._conn.execute(
+                "SELECT etag, last_modified, body, parsed, parser_version FROM http_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(
+            etag=row[0], last_modified=row[1], body=bytes(row[2]), parsed=row[3], parser_version=row[4],
+        )
+
+    def put(
+        self,
+        url: str,
+        source: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        body: bytes,
+        parsed: Any = None,
+        parser_version: str = "",
+    ) -> None:
+        """新しい本文と、それに対応するパース済み結果（JSON化可能な値）を保存。"""
+        parsed_json = json.dumps(parsed, ensure_ascii=False) if parsed is not None else None
+        with self._lock:
+            if self._closed:
+                return
+            self._conn.execute(
+                """INSERT INTO http_cache
+                   (url, source, etag, last_modified, body, parsed, parser_version, fetched_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(url) DO UPDATE SET
+                       source = excluded.source,
+                       etag = excluded.etag,
+                       last_modified = excluded.last_modified,
+                       body = excluded.body,
+                       parsed = excluded.parsed,
+                       parser_version = excluded.parser_version,
+                       fetched_at = excluded.fetched_at""",
+                (url, source, etag, last_modified, body, parsed_json, parser_version, _now_iso()),
+            )
+            self._conn.commit()
+
+    def put_parsed(self, url: str, parsed: Any, parser_version: str = "") -> None:
+        """本文に対応するパース済み結果（JSON化可能な値）を保存。"""
+        with self._lock:
+            if self._closed:
+                return
+            self._conn.execute(
+                "UPDATE http_cache SET parsed = ?, parser_version = ? WHERE url = ?",
+                (json.dumps(parsed, ensure_ascii=False), parser_version, url),
+            )
+            self._conn.commit()
+
+    # ── stats ──
+
+    def record(self, source: str, hit: bool, bytes_saved: int = 0) -> None:
+        with self._lock:
+            st = self._stats.setdefault(source, {"hits": 0, "misses": 0, "bytes_saved": 0})
+            st["hits" if hit else "misses"] += 1
+            st["bytes_saved"] += bytes_saved
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {k: dict(v) for k, v in sorted(self._stats.items())}
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._conn.close()
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
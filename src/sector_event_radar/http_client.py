@@ -0,0 +1,313 @@
+"""共有HTTPクライアント — 全collector/LLM抽出器で1つを使い回す。
+
+- requests.Session + HTTPAdapter でホストごとにkeep-aliveコネクションをプール
+- ホストごとの同時接続数上限（並列collectorが同じホストを叩きすぎない）
+- 統一リトライ/バックオフ（接続エラー・timeout・429/5xx、Retry-After尊重）
+- transport差し替え可能（テストでは StubTransport を mount してネットワークに出ない）
+- HttpCache を渡すと get_parsed() が条件付きGETになり、304ならパースもスキップ
+
+各collectorは client=None のとき従来どおり requests.get を直接呼ぶ。
+"""
+from __future__ import annotations
+
+import io
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .http_cache import HttpCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = "sector-event-radar/0.1"
+
+# リトライ対象ステータス（429 + 一時的な5xx）
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+T = TypeVar("T")
+
+
+class HttpClient:
+    """スレッドセーフな共有HTTPクライアント。
+
+    Args:
+        pool_maxsize: ホストあたりのkeep-aliveコネクション数
+        per_host_limit: ホストあたりの同時リクエスト数上限
+        max_retries: リトライ回数（初回を含まない）。呼び出し単位で上書き可
+        backoff_sec: 初回バックオフ。以降2倍、backoff_max_secで頭打ち
+        transport: http/https に mount する Adapter（テスト用スタブ等）
+        cache: 条件付きGET用の永続キャッシュ（get_parsedで使う）
+        sleep: バックオフ用sleep関数（テストで差し替え）
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 10,
+        per_host_limit: int = 4,
+        max_retries: int = 2,
+        backoff_sec: float = 1.0,
+        backoff_max_sec: float = 30.0,
+        retry_statuses: frozenset = RETRY_STATUSES,
+        user_agent: str = DEFAULT_USER_AGENT,
+        transport: Optional[BaseAdapter] = None,
+        cache: Optional[HttpCache] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_sec = backoff_sec
+        self.backoff_max_sec = backoff_max_sec
+        self.retry_statuses = retry_statuses
+        self.cache = cache
+        self._sleep = sleep
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent
+        adapter = transport or HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._host_locks: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    # ── public ──
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(
+        self, method: str, url: str, max_retries: Optional[int] = None, **kwargs
+    ) -> requests.Response:
+        """リトライ付きリクエスト。最終的なレスポンスを返す（raise_for_statusは呼び出し側）。
+
+        接続エラー/timeoutはリトライを使い切ったら例外をそのまま送出する。
+        """
+        retries = self.max_retries if max_retries is None else max(0, int(max_retries))
+        backoff = self.backoff_sec
+        host = urlsplit(url).netloc
+
+        for attempt in range(retries + 1):
+            try:
+                with self._host_semaphore(host):
+                    resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= retries:
+                    raise
+                logger.warning(
+                    "HTTP %s %s failed (attempt %d): %s, retrying in %.1fs",
+                    method, host, attempt + 1, e, backoff,
+                )
+                self._sleep(backoff)
+                backoff = min(backoff * 2, self.backoff_max_sec)
+                continue
+
+            if resp.status_code not in self.retry_statuses or attempt >= retries:
+                return resp
+
+            sleep_s = _retry_after(resp) or backoff
+            logger.warning(
+                "HTTP %s %s -> %d (attempt %d), retrying in %.1fs",
+                method, host, resp.status_code, attempt + 1, sleep_s,
+            )
+            resp.close()
+            self._sleep(min(sleep_s, self.backoff_max_sec))
+            backoff = min(backoff * 2, self.backoff_max_sec)
+
+        raise AssertionError("unreachable")
+
+    def get_parsed(
+        self,
+        url: str,
+        parse: Callable[[requests.Response], T],
+        source: str,
+        dump: Optional[Callable[[T], Any]] = None,
+        load: Optional[Callable[[Any], T]] = None,
+        parser_version: str = "",
+        **kwargs,
+    ) -> T:
+        """GET → parse(resp)。cacheがあれば条件付きGETにし、304ならパース済み結果を返す。
+
+        dump/load はパース結果 ⇔ JSON化可能な値 の変換（省略時はそのまま保存）。
+        parser_version はparse/dumpの出力形式のバージョン。保存済みのパース結果と
+        違えば304でも保存済み本文をパースし直す。
+        ETag/Last-Modifiedどちらも返さないサーバーはキャッシュしない。
+        キャッシュの読み書き失敗（sqlite3.Error）はログして無視する（取得・パースできた結果は返す）。
+        """
+        if self.cache is None:
+            resp = self.get(url, **kwargs)
+            resp.raise_for_status()
+            return parse(resp)
+
+        key = requests.Request("GET", url, params=kwargs.get("params")).prepare().url
+        entry = self._cache_io("lookup", source, self.cache.get, key)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        resp = self.get(url, headers=headers, **kwargs)
+
+        if resp.status_code == 304 and entry is not None:
+            self._cache_io("record", source, self.cache.record, source, True, len(entry.body))
+            logger.info("HTTP cache hit (304): %s", source)
+            if entry.parsed is not None and entry.parser_version == parser_version:
+                data = json.loads(entry.parsed)
+                return load(data) if load else data
+            # パース済み結果が無い or パーサーが変わった → 保存済み本文をパース
+            parsed = parse(_response_with_body(resp, entry.body))
+            self._cache_io("store", source, self.cache.put_parsed,
+                           key, dump(parsed) if dump else parsed, parser_version)
+            return parsed
+
+        resp.raise_for_status()
+        self._cache_io("record", source, self.cache.record, source, False)
+        parsed = parse(resp)
+
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._cache_io("store", source, self.cache.put, key, source, etag, last_modified,
+                           resp.content, dump(parsed) if dump else parsed, parser_version)
+        return parsed
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "HttpClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ── internal ──
+
+    @staticmethod
+    def _cache_io(op: str, source: str, fn: Callable[..., T], *args) -> Optional[T]:
+        """HttpCacheの操作を best-effort で呼ぶ（events.dbがロック中・破損でもcollectorは続ける）。"""
+        try:
+            return fn(*args)
+        except sqlite3.Error as e:
+            logger.warning("HTTP cache %s failed for %s: %s", op, source, e)
+            return None
+
+    def _host_semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._host_locks.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_locks[host] = sem
+            return sem
+
+
+def get_parsed(
+    client: Optional[HttpClient],
+    url: str,
+    parse: Callable[[requests.Response], T],
+    source: str,
+    dump: Optional[Callable[[T], Any]] = None,
+    load: Optional[Callable[[Any], T]] = None,
+    parser_version: str = "",
+    **kwargs,
+) -> T:
+    """collector用: clientがあれば HttpClient.get_parsed、無ければ requests.get + parse。"""
+    if client is None:
+        resp = requests.get(url, **kwargs)
+        resp.raise_for_status()
+        return parse(resp)
+    return client.get_parsed(
+        url, parse, source, dump=dump, load=load, parser_version=parser_version, **kwargs,
+    )
+
+
+def _response_with_body(template: requests.Response, body: bytes) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.headers = CaseInsensitiveDict(template.headers)
+    resp._content = body
+    resp._content_consumed = True
+    resp.encoding = template.encoding or "utf-8"
+    resp.url = template.url
+    resp.request = template.request
+    return resp
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    val = resp.headers.get("retry-after")
+    if not val:
+        return None
+    try:
+        return max(0.0, float(val))
+    except ValueError:
+        return None
+
+
+# ── テスト用スタブtransport ──────────────────────────────
+
+StubBody = Union[bytes, str]
+StubHandler = Callable[[requests.PreparedRequest], Tuple[int, Dict[str, str], StubBody]]
+
+
+class StubTransport(BaseAdapter):
+    """ネットワークに出ないAdapter。HttpClient(transport=StubTransport()) で使う。
+
+    URLはクエリ込みの完全一致 → クエリ抜きの一致の順で引く。未登録URLは404。
+    固定レスポンスの代わりに handler(request) -> (status, headers, body) も登録できる。
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.routes: Dict[Tuple[str, str], Union[StubHandler, Tuple[int, Dict[str, str], StubBody]]] = {}
+        self.calls: List[requests.PreparedRequest] = []
+
+    def add(
+        self,
+        url: str,
+        body: StubBody = b"",
+        status: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        method: str = "GET",
+        handler: Optional[StubHandler] = None,
+    ) -> None:
+        self.routes[(method.upper(), url)] = handler or (status, dict(headers or {}), body)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.calls.append(request)
+        route = self.routes.get((request.method, request.url))
+        if route is None:
+            route = self.routes.get((request.method, request.url.split("?", 1)[0]))
+        if route is None:
+            status, headers, body = 404, {}, b"not found"
+        elif callable(route):
+            status, headers, body = route(request)
+        else:
+            status, headers, body = route
+
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+
+        resp = requests.Response()
+        resp.status_code = status
+        resp.headers = CaseInsensitiveDict(headers)
+        resp.raw = io.BytesIO(body)
+        resp._content = body
+        resp._content_consumed = True
+        resp.encoding = "utf-8"
+        resp.url = request.url
+        resp.request = request
+        return resp
+
+    def close(self) -> None:
+        pass
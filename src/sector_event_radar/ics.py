@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import io
 from datetime import datetime, timezone
-from typing import Iterable, List, Optional
+from typing import BinaryIO, Iterable, List, Mapping, Optional, Sequence, Tuple
 from uuid import uuid4
 
 from .models import Event
@@ -37,38 +38,34 @@ def _fold_line(line: str) -> str:
     """RFC5545 §3.1: 長い行を75オクテットで折り返す。
     最初の行は75オクテット、継続行はSPACE+74オクテット。
     UTF-8マルチバイトの途中で切らない。
+
+    ASCIIのみの行は文字数 = バイト数なので文字列のまま切る。
+    それ以外は切る位置が継続バイト（0b10xxxxxx）なら文字の先頭まで戻す（decodeの試行はしない）。
     """
+    if line.isascii():
+        if len(line) <= 75:
+            return line
+        return "\r\n ".join([line[:75]] + [line[i:i + 74] for i in range(75, len(line), 74)])
+
     encoded = line.encode("utf-8")
-    if len(encoded) <= 75:
+    n = len(encoded)
+    if n <= 75:
         return line
 
-    parts = []
+    chunks = []
     pos = 0
-    first = True
-
-    while pos < len(encoded):
-        max_bytes = 75 if first else 74
-        end = min(pos + max_bytes, len(encoded))
-        chunk = encoded[pos:end]
-
-        # UTF-8マルチバイトの途中で切れないよう調整
-        if end < len(encoded):
-            while len(chunk) > 0:
-                try:
-                    chunk.decode("utf-8")
-                    break
-                except UnicodeDecodeError:
-                    chunk = chunk[:-1]
-
-        text = chunk.decode("utf-8")
-        if first:
-            parts.append(text)
-            first = False
+    max_bytes = 75
+    while pos < n:
+        end = pos + max_bytes
+        if end >= n:
+            end = n
         else:
-            parts.append(" " + text)
-        pos += len(chunk)
-
-    return "\r\n".join(parts)
+            while encoded[end] & 0xC0 == 0x80:
+                end -= 1
+        chunks.append(encoded[pos:end])
+        pos = end
+        max_bytes = 74
+    return b"\r\n ".join(chunks).decode("utf-8")
 
 
 def _format_summary(ev: Event) -> str:
@@ -110,40 +107,91 @@ def _format_description(ev: Event) -> str:
     return "\n".join(parts)
 
 
-def events_to_ics(events: Iterable[Event], cal_name: str = "Sector Event Radar") -> str:
-    now = datetime.now(timezone.utc)
-    dtstamp = _fmt_utc(now)
+def _calendar_header(cal_name: str) -> bytes:
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//SectorEventRadar//EN",
+        f"X-WR-CALNAME:{_escape(cal_name)}",
+    ]
+    return "".join(_fold_line(line) + "\r\n" for line in lines).encode("utf-8")
+
+
+_CALENDAR_FOOTER = b"END:VCALENDAR\r\n"
 
+
+def _vevent_block(ev: Event, dtstamp: str) -> bytes:
+    """VEVENT 1件ぶんを折り返し済み・CRLF終端のUTF-8バイト列にする。"""
+    uid = ev.canonical_key or str(uuid4())
     lines: List[str] = []
-    lines.append("BEGIN:VCALENDAR")
-    lines.append("VERSION:2.0")
-    lines.append("PRODID:-//SectorEventRadar//EN")
-    lines.append(f"X-WR-CALNAME:{_escape(cal_name)}")
+    lines.append("BEGIN:VEVENT")
+    lines.append(f"UID:{_escape(uid)}")
+    lines.append(f"DTSTAMP:{dtstamp}")
+    lines.append(f"SUMMARY:{_escape(_format_summary(ev))}")
+    lines.append(f"DTSTART:{_fmt_utc(ev.start_at)}")
+    if ev.end_at:
+        lines.append(f"DTEND:{_fmt_utc(ev.end_at)}")
+    if ev.source_url:
+        lines.append(f"URL:{_escape(str(ev.source_url))}")
+    # 定型DESCRIPTION
+    lines.append(f"DESCRIPTION:{_escape(_format_description(ev))}")
+    # category / tags
+    lines.append(f"CATEGORIES:{_escape(ev.category)}")
+    if ev.sector_tags:
+        lines.append(f"X-SECTOR-TAGS:{_escape(','.join(ev.sector_tags))}")
+    # cancelled handling
+    if ev.action == "cancel":
+        lines.append("STATUS:CANCELLED")
+    lines.append("END:VEVENT")
+    # RFC5545: 各行をline foldingしてCRLFで終端
+    return "".join(_fold_line(line) + "\r\n" for line in lines).encode("utf-8")
+
+
+def write_calendars(
+    events: Iterable[Event],
+    outputs: Sequence[Tuple[BinaryIO, str, Optional[str]]],
+    dtstamp: Optional[datetime] = None,
+    dtstamps: Optional[Mapping[str, datetime]] = None,
+) -> List[int]:
+    """複数のカレンダーを1パスで書き出す。
+
+    outputs: (書き込み先, カレンダー名, カテゴリ) の並び。カテゴリNoneは全イベント。
+    各イベントのVEVENTは1回だけ整形・折り返しし、同じバイト列を該当する全出力に書く。
+    dtstamp: 既定のDTSTAMP（None なら現在時刻）。dtstamps: canonical_key → DTSTAMP（優先）
+
+    Returns: 出力ごとのイベント件数
+    """
+    default_stamp = _fmt_utc(dtstamp or datetime.now(timezone.utc))
+    stamps = dtstamps or {}
+    counts = [0] * len(outputs)
+    for out, cal_name, _ in outputs:
+        out.write(_calendar_header(cal_name))
 
     for ev in events:
-        uid = ev.canonical_key or str(uuid4())
-        lines.append("BEGIN:VEVENT")
-        lines.append(f"UID:{_escape(uid)}")
-        lines.append(f"DTSTAMP:{dtstamp}")
-        lines.append(f"SUMMARY:{_escape(_format_summary(ev))}")
-        lines.append(f"DTSTART:{_fmt_utc(ev.start_at)}")
-        if ev.end_at:
-            lines.append(f"DTEND:{_fmt_utc(ev.end_at)}")
-        if ev.source_url:
-            lines.append(f"URL:{_escape(str(ev.source_url))}")
-        # 定型DESCRIPTION
-        lines.append(f"DESCRIPTION:{_escape(_format_description(ev))}")
-        # category / tags
-        lines.append(f"CATEGORIES:{_escape(ev.category)}")
-        if ev.sector_tags:
-            lines.append(f"X-SECTOR-TAGS:{_escape(','.join(ev.sector_tags))}")
-        # cancelled handling
-        if ev.action == "cancel":
-            lines.append("STATUS:CANCELLED")
-        lines.append("END:VEVENT")
-
-    lines.append("END:VCALENDAR")
-
-    # RFC5545: 各行をline foldingしてCRLFで結合
-    folded = [_fold_line(line) for line in lines]
-    return "\r\n".join(folded) + "\r\n"
+        block: Optional[bytes] = None
+        for i, (out, _, category) in enumerate(outputs):
+            if category is not None and ev.category != category:
+                continue
+            if block is None:
+                stamp = stamps.get(ev.canonical_key) if ev.canonical_key else None
+                block = _vevent_block(ev, _fmt_utc(stamp) if stamp else default_stamp)
+            out.write(block)
+            counts[i] += 1
+
+    for out, _, _ in outputs:
+        out.write(_CALENDAR_FOOTER)
+    return counts
+
+
+def events_to_ics(
+    events: Iterable[Event],
+    cal_name: str = "Sector Event Radar",
+    dtstamp: Optional[datetime] = None,
+) -> str:
+    """1カレンダーぶんを文字列で返す（write_calendars の単一出力版）。
+
+    dtstamp: 全VEVENTのDTSTAMP。None なら現在時刻。
+    """
+    buf = io.BytesIO()
+    write_calendars(events, [(buf, cal_name, None)], dtstamp=dtstamp)
+    return buf.getvalue().decode("utf-8")
@@ -2,13 +2,16 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
-from typing import Dict, Iterable, List, Sequence
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 
 from .models import ImpactStats, ImpactSummary, Scenario
 
+if TYPE_CHECKING:
+    from .price_store import PriceStore
+
 
 try:
     import yfinance as yf
@@ -65,33 +68,59 @@ def fetch_prices(tickers: List[str], start: date, end: date) -> pd.DataFrame:
     return out
 
 
-def event_day_returns(prices: pd.DataFrame, event_dates: List[date]) -> Dict[str, List[float]]:
-    """イベント日の1日リターン(close/prev_close-1)を計算。"""
-    # indexは日付、列はticker
+def event_day_return_matrix(
+    prices: pd.DataFrame,
+    event_dates: Sequence[date],
+    roll_to_next_session: bool = False,
+) -> Tuple[np.ndarray, pd.DatetimeIndex]:
+    """イベント日の1日リターン(close/prev_close-1)を (イベント × ticker) のNumPy配列で返す。
+
+    価格フレーム全体の前日比を1回だけ計算し、イベント日の行を位置で抜き出す。
+    - 価格の無い日（非取引日）はスキップ。roll_to_next_session=True なら次の取引日に丸める
+    - 先頭行（前日が無い）・日付が重複している行はスキップ
+    - 前日か当日がNaN、前日が0ならNaN
+    - event_dates の順序と重複はそのまま（同じ日が2回あれば2行）
+
+    Returns:
+        (配列[len(使われたイベント), len(prices.columns)], 各行の取引日)
+    """
     idx = pd.to_datetime(prices.index).normalize()
-    prices2 = prices.copy()
-    prices2.index = idx
-
-    returns: Dict[str, List[float]] = {c: [] for c in prices2.columns}
-    for d in event_dates:
-        dts = pd.Timestamp(d)
-        if dts not in prices2.index:
-            # 非取引日はスキップ（別途「直近営業日へ丸める」設計もあり）
-            continue
-        loc = prices2.index.get_loc(dts)
-        if isinstance(loc, slice) or isinstance(loc, np.ndarray):
-            continue
-        if loc == 0:
-            continue
-        prev_dt = prices2.index[loc - 1]
-        for c in prices2.columns:
-            prev = prices2.loc[prev_dt, c]
-            cur = prices2.loc[dts, c]
-            if pd.isna(prev) or pd.isna(cur) or prev == 0:
-                returns[c].append(float("nan"))
-            else:
-                returns[c].append(float(cur / prev - 1.0))
-    return returns
+    values = prices.to_numpy(dtype=float)
+    if not idx.is_monotonic_increasing:
+        order = np.argsort(idx.values, kind="stable")
+        idx, values = idx[order], values[order]
+
+    # 前日比（pct_change(fill_method=None) と同じ）。前日0はNaN
+    prev, cur = values[:-1], values[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rets = cur / prev - 1.0
+    rets[prev == 0] = np.nan
+    rets = np.vstack([np.full((1, values.shape[1]), np.nan), rets])
+
+    ev = pd.DatetimeIndex(pd.to_datetime(list(event_dates))).normalize()
+    dup = idx.duplicated(keep=False)
+    if roll_to_next_session:
+        # 非取引日は次の取引日（indexでその日以降の最初の行）に丸める
+        pos = np.asarray(idx.searchsorted(ev, side="left"))
+    else:
+        # 重複の無い行だけで引き、元の行番号に戻す（見つからなければ-1）
+        uniq_rows = np.append(np.flatnonzero(~dup), -1)
+        pos = uniq_rows[pd.Index(idx[uniq_rows[:-1]]).get_indexer(ev)]
+
+    valid = (pos > 0) & (pos < len(idx))
+    valid[valid] &= ~dup[pos[valid]]
+    pos = pos[valid]
+    return rets[pos], idx[pos]
+
+
+def event_day_returns(
+    prices: pd.DataFrame,
+    event_dates: List[date],
+    roll_to_next_session: bool = False,
+) -> Dict[str, List[float]]:
+    """イベント日の1日リターン(close/prev_close-1)を計算。ticker → イベント順のリスト。"""
+    mat, _ = event_day_return_matrix(prices, event_dates, roll_to_next_session)
+    return {c: mat[:, j].tolist() for j, c in enumerate(prices.columns)}
 
 
 def build_impact_summary(
@@ -99,12 +128,15 @@ def build_impact_summary(
     event_dates: List[date],
     start: date,
     end: date,
+    roll_to_next_session: bool = False,
+    store: Optional[PriceStore] = None,
 ) -> ImpactSummary:
     """Spec M7 Step2-3 をPython側で確定値として作る。
     Step4(文章化)はここではテンプレで返す（LLM接続は別途）。
+    store を渡すとローカル価格ストア経由（足りない期間だけ取得）で価格を読む。
     """
-    prices = fetch_prices(tickers, start, end)
-    rets = event_day_returns(prices, event_dates)
+    prices = store.get_prices(tickers, start, end) if store is not None else fetch_prices(tickers, start, end)
+    rets = event_day_returns(prices, event_dates, roll_to_next_session)
 
     stats = {t: _stats(v).model_dump() for t, v in rets.items()}
 
@@ -0,0 +1,138 @@
+"""prefilter Stage A用の多パターンキーワードマッチャ（Aho–Corasick）。
+
+旧実装はキーワードごとに text.count(kw) を呼ぶので O(記事 × キーワード × 本文長)。
+keywords辞書が数百〜数千語になると支配的になるため、オートマトンを1回だけ構築し
+記事1本を1パスで走査する。
+
+スコアの意味は旧 _kw_score と完全一致させる:
+- 大文字小文字を無視（text.lower() / kw.lower()）
+- キーワードごとの出現数は str.count と同じ「左から重ならない」数え方
+- score = Σ weight × min(3, 出現数)
+- lower()後に同じになるキーワードはそれぞれ別に加算（dictの重複キー相当）
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, List, Mapping, Tuple
+
+# 極端な連呼で暴れないよう出現数に上限（旧_kw_scoreと同じ）
+MAX_OCCURRENCES = 3
+
+# これ未満のキーワード数ならCのstr.countをパターンごとに回した方が速い
+# （benchmarks/bench_prefilter_stage_a.py 参照: 50語では1パス走査が約2倍遅い）
+SCAN_MIN_PATTERNS = 128
+
+
+class KeywordMatcher:
+    """keywords {keyword: weight} から構築するAho–Corasickオートマトン。
+
+    遷移表は失敗リンクをたどった結果を遅延的にメモ化するので、
+    ウォームアップ後は1文字あたり dict 参照1回で進む。
+    """
+
+    def __init__(self, keywords: Mapping[str, float]) -> None:
+        # lower()後のパターン → [(keywords辞書内の順番, weight), ...]
+        patterns: Dict[str, List[Tuple[int, float]]] = {}
+        for idx, (kw, w) in enumerate(keywords.items()):
+            kw2 = kw.lower()
+            if not kw2:
+                continue
+            patterns.setdefault(kw2, []).append((idx, float(w)))
+
+        self.patterns: List[str] = list(patterns)
+        self.weights: List[List[Tuple[int, float]]] = [patterns[p] for p in self.patterns]
+        self._lengths: List[int] = [len(p) for p in self.patterns]
+
+        # trie
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[List[int]] = [[]]
+        for pid, pat in enumerate(self.patterns):
+            state = 0
+            for ch in pat:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(pid)
+
+        # failure links (BFS) + 出力の継承
+        self._fail: List[int] = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+        # 遅延DFA遷移表（trie遷移で初期化し、失敗遷移をメモ化していく）
+        self._delta: List[Dict[str, int]] = [dict(g) for g in self._goto]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _step(self, state: int, ch: str) -> int:
+        f = state
+        while True:
+            nxt = self._goto[f].get(ch)
+            if nxt is not None:
+                break
+            if f == 0:
+                nxt = 0
+                break
+            f = self._fail[f]
+        self._delta[state][ch] = nxt
+        return nxt
+
+    def counts(self, text: str) -> Dict[int, int]:
+        """{pattern_id: 重ならない出現数}（1回以上のものだけ）。textは小文字化済みを想定。"""
+        delta = self._delta
+        out = self._out
+        lengths = self._lengths
+        counts: Dict[int, int] = {}
+        next_free: Dict[int, int] = {}  # pattern_id → 次に数えてよい開始位置
+
+        state = 0
+        for i, ch in enumerate(text):
+            nxt = delta[state].get(ch)
+            state = nxt if nxt is not None else self._step(state, ch)
+            hits = out[state]
+            if not hits:
+                continue
+            for pid in hits:
+                start = i - lengths[pid] + 1
+                if start >= next_free.get(pid, 0):
+                    counts[pid] = counts.get(pid, 0) + 1
+                    next_free[pid] = i + 1
+        return counts
+
+    def score(self, text: str) -> float:
+        """旧 _kw_score(text, keywords) と同じ値を1パスで計算する。"""
+        weights = self.weights
+        t = text.lower()
+        if len(self.patterns) < SCAN_MIN_PATTERNS:
+            counts = {}
+            for pid, pat in enumerate(self.patterns):
+                occ = t.count(pat)
+                if occ > 0:
+                    counts[pid] = occ
+        else:
+            counts = self.counts(t)
+        terms = []
+        for pid, occ in counts.items():
+            occ = min(MAX_OCCURRENCES, occ)
+            for idx, w in weights[pid]:
+                terms.append((idx, w * occ))
+        # keywords辞書の順に足す（浮動小数の加算順まで旧実装と揃える）
+        terms.sort()
+        score = 0.0
+        for _, v in terms:
+            score += v
+        return score
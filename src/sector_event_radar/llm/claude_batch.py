@@ -0,0 +1,193 @@
+"""Claude抽出のバッチバックエンド（Message Batches API）。
+
+日次cronでは記事ごとのレイテンシよりスループットとコストが重要なので、
+prefilter通過記事をまとめて1つのバッチジョブとして投げ、完了までポーリングし、
+custom_id で結果を記事に戻す。
+
+- リクエストの中身は同期版と同じ build_payload()（SYSTEM_PROMPT / EMIT_EVENTS_TOOL）
+- 結果のパースも同期版と同じ _parse_tool_output() / _events_from_tool_output()
+- 抽出キャッシュ（ExtractCache）にヒットした記事はバッチに入れない
+- プロンプトキャッシュの cache_control も同期版と同じ（バッチ内でもベストエフォートで効く）
+
+エンドポイント:
+    POST {base_url}/v1/messages/batches            → {"id", "processing_status", ...}
+    GET  {base_url}/v1/messages/batches/{id}       → processing_status == "ended" で完了
+    GET  results_url                               → 1行1結果のJSONL
+    POST {base_url}/v1/messages/batches/{id}/cancel → 締切超過・ポーリング失敗時（ベストエフォート）
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from typing import Callable, List, Optional, Sequence, Union
+
+import requests
+
+from ..http_client import HttpClient
+from ..models import Event
+from .claude_extract import (
+    PROMPT_VERSION,
+    ArticleInput,
+    ClaudeConfig,
+    ClaudeExtractError,
+    _build_headers,
+    _events_from_tool_output,
+    _parse_tool_output,
+    build_payload,
+)
+from .extract_cache import ExtractCache, normalized_content_hash
+from .usage import TokenUsage
+
+logger = logging.getLogger(__name__)
+
+BatchOutcome = Union[List[Event], ClaudeExtractError]
+
+
+def extract_events_batch(
+    cfg: ClaudeConfig,
+    articles: Sequence[ArticleInput],
+    client: Optional[HttpClient] = None,
+    cache: Optional[ExtractCache] = None,
+    poll_interval_sec: float = 30.0,
+    timeout_sec: float = 3600.0,
+    sleep: Callable[[float], None] = time.sleep,
+    usage: Optional[TokenUsage] = None,
+) -> List[BatchOutcome]:
+    """記事ごとの抽出結果を入力順で返す。
+
+    各要素は List[Event]（成功）か ClaudeExtractError（その記事だけ失敗）。
+    バッチ自体の投入/ポーリング/結果取得に失敗した場合は ClaudeExtractError を送出する。
+    完了前に抜ける（締切超過・ポーリング中の例外）ときはバッチをキャンセルする
+    （放置すると誰も回収しない結果の処理にも課金される）。
+    """
+    outcomes: List[Optional[BatchOutcome]] = [None] * len(articles)
+    hashes = [normalized_content_hash(a.title, a.content) for a in articles]
+
+    requests_body = []
+    for i, a in enumerate(articles):
+        if cache is not None:
+            cached = cache.get(cfg.model, PROMPT_VERSION, hashes[i])
+            if cached is not None:
+                outcomes[i] = _events_from_tool_output(cached, a.url)
+                continue
+        requests_body.append({
+            "custom_id": _custom_id(i),
+            "params": build_payload(cfg, a.title, a.published, a.url, a.content),
+        })
+
+    if requests_body:
+        batch_url = f"{cfg.base_url.rstrip('/')}/v1/messages/batches"
+        headers = _build_headers(cfg.api_key)
+        http_get = client.get if client is not None else requests.get
+
+        resp = _post(client, batch_url, headers, {"requests": requests_body}, cfg.timeout_sec)
+        batch = _json_or_raise(resp, "create")
+        batch_id = batch["id"]
+        logger.info("Claude batch %s submitted: %d requests", batch_id, len(requests_body))
+
+        deadline = time.monotonic() + timeout_sec
+        ended = False
+        try:
+            while batch.get("processing_status") != "ended":
+                if time.monotonic() >= deadline:
+                    raise ClaudeExtractError(
+                        f"Claude batch {batch_id} not finished after {timeout_sec:.0f}s"
+                    )
+                sleep(poll_interval_sec)
+                resp = http_get(f"{batch_url}/{batch_id}", headers=headers, timeout=cfg.timeout_sec)
+                batch = _json_or_raise(resp, "poll")
+            ended = True
+        finally:
+            if not ended:
+                _cancel(client, f"{batch_url}/{batch_id}", headers, cfg.timeout_sec)
+
+        logger.info("Claude batch %s ended: %s", batch_id, batch.get("request_counts"))
+        resp = http_get(batch["results_url"], headers=headers, timeout=cfg.timeout_sec)
+        if resp.status_code >= 400:
+            raise ClaudeExtractError(f"Claude batch results error {resp.status_code}: {resp.text[:300]}")
+
+        for line in resp.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            i = _index_of(item.get("custom_id", ""))
+            if i is None or not 0 <= i < len(articles):
+                logger.warning("Claude batch: unknown custom_id %r", item.get("custom_id"))
+                continue
+            result = item.get("result") or {}
+            if usage is not None and result.get("type") == "succeeded":
+                usage.add((result.get("message") or {}).get("usage"))
+            outcomes[i] = _outcome(cfg, result, articles[i], hashes[i], cache)
+
+    return [
+        o if o is not None else ClaudeExtractError("Claude batch: no result for request")
+        for o in outcomes
+    ]
+
+
+def _outcome(
+    cfg: ClaudeConfig, result: dict, article: ArticleInput, content_hash: str,
+    cache: Optional[ExtractCache],
+) -> BatchOutcome:
+    rtype = result.get("type")
+    if rtype != "succeeded":
+        detail = result.get("error") or rtype
+        return ClaudeExtractError(f"Claude batch request {rtype}: {str(detail)[:300]}")
+
+    tool_output = _parse_tool_output(result.get("message") or {})
+    if tool_output is None:
+        logger.warning("No emit_events tool_use block in batch result")
+        return []
+    if cache is not None:
+        cache.put(cfg.model, PROMPT_VERSION, content_hash, tool_output)
+    return _events_from_tool_output(tool_output, article.url)
+
+
+def _post(client: Optional[HttpClient], url: str, headers: dict, body: dict, timeout: int):
+    data = json.dumps(body)
+    try:
+        if client is not None:
+            # バッチ作成は冪等でないのでリトライしない（二重投入＝二重課金を防ぐ）
+            return client.post(url, headers=headers, data=data, timeout=timeout, max_retries=0)
+        return requests.post(url, headers=headers, data=data, timeout=timeout)
+    except requests.RequestException as e:
+        raise ClaudeExtractError(f"Claude batch create failed: {e}") from e
+
+
+def _cancel(client: Optional[HttpClient], batch_url: str, headers: dict, timeout: int) -> None:
+    """投入済みバッチのキャンセル（ベストエフォート。失敗はログのみ）。"""
+    url = f"{batch_url}/cancel"
+    try:
+        if client is not None:
+            resp = client.post(url, headers=headers, timeout=timeout)
+        else:
+            resp = requests.post(url, headers=headers, timeout=timeout)
+    except requests.RequestException as e:
+        logger.warning("Claude batch cancel failed: %s", e)
+        return
+    if resp.status_code >= 400:
+        logger.warning("Claude batch cancel error %d: %s", resp.status_code, resp.text[:300])
+    else:
+        logger.info("Claude batch cancelled: %s", batch_url.rsplit("/", 1)[-1])
+
+
+def _json_or_raise(resp, stage: str) -> dict:
+    if resp.status_code >= 400:
+        raise ClaudeExtractError(f"Claude batch {stage} error {resp.status_code}: {resp.text[:300]}")
+    return resp.json()
+
+
+def _custom_id(i: int) -> str:
+    # custom_id は ^[a-zA-Z0-9_-]{1,64}$。URLは入らないので入力順の連番にする
+    return f"article-{i}"
+
+
+def _index_of(custom_id: str) -> Optional[int]:
+    prefix = "article-"
+    if not custom_id.startswith(prefix):
+        return None
+    try:
+        return int(custom_id[len(prefix):])
+    except ValueError:
+        return None
@@ -13,16 +13,21 @@ import logging
 import os
 import time
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 import requests
 from pydantic import ValidationError
 
+from ..http_client import HttpClient
 from ..models import Event
+from .extract_cache import ExtractCache, normalized_content_hash
+from .rate_limit import CircuitBreaker, RateLimiter
+from .usage import TokenUsage
 
 logger = logging.getLogger(__name__)
 
-ANTHROPIC_ENDPOINT = "https://api.anthropic.com/v1/messages"
+ANTHROPIC_BASE_URL = "https://api.anthropic.com"
+ANTHROPIC_ENDPOINT = f"{ANTHROPIC_BASE_URL}/v1/messages"
 ANTHROPIC_API_VERSION = "2023-06-01"
 
 
@@ -32,12 +37,27 @@ class ClaudeConfig:
     model: str = "claude-sonnet-4-20250514"
     max_retries: int = 5
     timeout_sec: int = 60
+    base_url: str = ANTHROPIC_BASE_URL  # テストではローカルのスタブサーバーを指す
+    prompt_cache: bool = True  # system/ツール定義をプロンプトキャッシュのprefixにする
+
+    @property
+    def messages_endpoint(self) -> str:
+        return f"{self.base_url.rstrip('/')}/v1/messages"
 
 
 class ClaudeExtractError(RuntimeError):
     pass
 
 
+@dataclass(frozen=True)
+class ArticleInput:
+    """抽出対象の記事1本（バッチ/パッキングで複数記事をまとめて扱うとき用）"""
+    title: str
+    published: str
+    url: str
+    content: str
+
+
 # ── Strict Tool Schema ──────────────────────────────────
 EMIT_EVENTS_TOOL = {
     "name": "emit_events",
@@ -135,6 +155,13 @@ RULES (strictly follow all):
     - confidence = 0.4-0.6 (lower than exact dates)"""
 
 
+# プロンプト/ツールスキーマのバージョン（抽出キャッシュのキー）。
+# どちらかを変えれば自動的に別キーになり、古いキャッシュは使われない。
+PROMPT_VERSION = hashlib.sha256(
+    (SYSTEM_PROMPT + json.dumps(EMIT_EVENTS_TOOL, sort_keys=True)).encode("utf-8")
+).hexdigest()[:12]
+
+
 def _build_headers(api_key: str) -> dict:
     """Anthropic API は x-api-key ヘッダで認証（Bearer ではない）"""
     return {
@@ -153,52 +180,148 @@ def _parse_tool_output(response_json: dict) -> dict | None:
     return None
 
 
-def extract_events_from_article(
+# プロンプトキャッシュ: prefix は tools → system → messages の順で、breakpoint までが
+# キャッシュされる。記事ごとに変わるのは messages だけなので、tools と system の末尾に置く。
+# （モデルごとの最小キャッシュ長 1024〜2048 tokens は SYSTEM_PROMPT + スキーマで超える）
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def cached_prefix(cfg: ClaudeConfig, system: str, tool: dict) -> dict:
+    """payloadの system / tools 部分。cfg.prompt_cache ならcache_controlを付ける。"""
+    if not cfg.prompt_cache:
+        return {"system": system, "tools": [tool]}
+    return {
+        "system": [{"type": "text", "text": system, "cache_control": CACHE_CONTROL}],
+        "tools": [{**tool, "cache_control": CACHE_CONTROL}],
+    }
+
+
+def build_payload(
     cfg: ClaudeConfig,
     article_title: str,
     article_published: str,
     article_url: str,
     article_content: str,
-) -> List[Event]:
-    """RSS記事1本からイベントを抽出。
-
-    Returns:
-        List[Event]: 抽出されたイベント。日時不明なら空リスト。
-        source_name / source_url / source_id は呼び出し元で設定すること。
-    """
-    headers = _build_headers(cfg.api_key)
-
+) -> dict:
+    """記事1本ぶんのMessages APIリクエストボディ（バッチ版でもparamsとしてそのまま使う）"""
     user_text = (
         f"TITLE: {article_title}\n"
         f"PUBLISHED: {article_published}\n"
         f"URL: {article_url}\n\n"
         f"CONTENT:\n{article_content[:8000]}"
     )
-
-    payload = {
+    return {
         "model": cfg.model,
         "max_tokens": 2048,
-        "system": SYSTEM_PROMPT,
+        **cached_prefix(cfg, SYSTEM_PROMPT, EMIT_EVENTS_TOOL),
         "messages": [{"role": "user", "content": user_text}],
-        "tools": [EMIT_EVENTS_TOOL],
         "tool_choice": {"type": "tool", "name": "emit_events"},
     }
 
+
+def estimate_input_tokens(payload: dict) -> int:
+    """入力トークン数のざっくり見積り（英文でおよそ4文字/トークン）。レートリミッタ用。"""
+    return len(json.dumps(payload, ensure_ascii=False)) // 4 + 1
+
+
+def extract_events_from_article(
+    cfg: ClaudeConfig,
+    article_title: str,
+    article_published: str,
+    article_url: str,
+    article_content: str,
+    client: Optional[HttpClient] = None,
+    limiter: Optional[RateLimiter] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    cache: Optional[ExtractCache] = None,
+    usage: Optional[TokenUsage] = None,
+) -> List[Event]:
+    """RSS記事1本からイベントを抽出。
+
+    client: 共有HttpClient（Noneならrequests.postを直接使う）。
+        429/529のリトライはこの関数が自前で行うので、client側リトライは無効化する。
+    limiter: 並列ワーカー共有のrequests/min・input tokens/min制限（各試行の前に待つ）
+    breaker: 並列ワーカー共有のサーキットブレーカ。429/529で trip し、
+        全ワーカーが次の試行前に同じだけ止まる（個別sleepの代わり）
+    cache: 抽出キャッシュ。(model, PROMPT_VERSION, 正規化title+bodyハッシュ) でヒットすれば
+        APIを呼ばずに保存済みツール出力からEventを組み直す（sourceはこの記事のもの）
+    usage: run単位のトークン使用量集計（プロンプトキャッシュの読み書きを含む）
+
+    Returns:
+        List[Event]: 抽出されたイベント。日時不明なら空リスト。
+        source_name / source_url / source_id は呼び出し元で設定すること。
+    """
+    content_hash = normalized_content_hash(article_title, article_content)
+    if cache is not None:
+        cached = cache.get(cfg.model, PROMPT_VERSION, content_hash)
+        if cached is not None:
+            logger.info("Claude extract cache hit: '%s'", article_title[:60])
+            return _events_from_tool_output(cached, article_url)
+
+    payload = build_payload(cfg, article_title, article_published, article_url, article_content)
+    data = send_messages_request(
+        cfg, payload, client=client, limiter=limiter, breaker=breaker, usage=usage,
+    )
+    tool_output = _parse_tool_output(data)
+
+    if tool_output is None:
+        logger.warning("No emit_events tool_use block in response")
+        return []
+
+    if cache is not None:
+        cache.put(cfg.model, PROMPT_VERSION, content_hash, tool_output)
+    return _events_from_tool_output(tool_output, article_url)
+
+
+def send_messages_request(
+    cfg: ClaudeConfig,
+    payload: dict,
+    client: Optional[HttpClient] = None,
+    limiter: Optional[RateLimiter] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    usage: Optional[TokenUsage] = None,
+) -> dict:
+    """Messages APIを1回呼んでレスポンスJSONを返す（429/529/接続エラーはリトライ）。
+
+    リトライを使い切ったら ClaudeExtractError。4xx/5xx（429/529以外）は即 ClaudeExtractError。
+    成功レスポンスの usage は usage に加算する。
+    """
+    headers = _build_headers(cfg.api_key)
     backoff = 1.0
     last_error = None
+    est_tokens = estimate_input_tokens(payload)
+
+    def _pause(sleep_s: float) -> None:
+        if breaker is not None:
+            breaker.trip(sleep_s)
+        else:
+            time.sleep(sleep_s)
 
     for attempt in range(cfg.max_retries):
+        if breaker is not None:
+            breaker.wait()
+        if limiter is not None:
+            limiter.acquire(est_tokens)
         try:
-            resp = requests.post(
-                ANTHROPIC_ENDPOINT,
-                headers=headers,
-                data=json.dumps(payload),
-                timeout=cfg.timeout_sec,
-            )
+            if client is not None:
+                resp = client.post(
+                    cfg.messages_endpoint,
+                    headers=headers,
+                    data=json.dumps(payload),
+                    timeout=cfg.timeout_sec,
+                    max_retries=0,
+                )
+            else:
+                resp = requests.post(
+                    cfg.messages_endpoint,
+                    headers=headers,
+                    data=json.dumps(payload),
+                    timeout=cfg.timeout_sec,
+                )
         except requests.RequestException as e:
             logger.warning("Claude API request failed (attempt %d): %s", attempt + 1, e)
             last_error = e
-            time.sleep(backoff)
+            time.sleep(backoff)  # 接続エラーはこのワーカーだけの問題なので個別に待つ
             backoff = min(backoff * 2, 30)
             continue
 
@@ -206,13 +329,13 @@ def extract_events_from_article(
             retry_after = resp.headers.get("retry-after")
             sleep_s = float(retry_after) if retry_after else backoff
             logger.warning("Claude API 429, sleeping %.1fs (attempt %d)", sleep_s, attempt + 1)
-            time.sleep(sleep_s)
+            _pause(sleep_s)
             backoff = min(backoff * 2, 30)
             continue
 
         if resp.status_code == 529:
             logger.warning("Claude API 529 overloaded, sleeping %.1fs", backoff)
-            time.sleep(backoff)
+            _pause(backoff)
             backoff = min(backoff * 2, 30)
             continue
 
@@ -222,37 +345,42 @@ def extract_events_from_article(
             )
 
         data = resp.json()
-        tool_output = _parse_tool_output(data)
-
-        if tool_output is None:
-            logger.warning("No emit_events tool_use block in response")
-            return []
-
-        raw_events = tool_output.get("events", [])
-        if not raw_events:
-            return []
-
-        events: List[Event] = []
-        for raw in raw_events:
-            # source_id をイベント単位でユニークにする。
-            # 1記事→複数イベント時にevent_sourcesの(source_name, source_id)主キーが
-            # 衝突して最後のイベントだけ残る事故を防止。
-            ev_title = raw.get("title", "")
-            ev_start = raw.get("start_at", "")
-            ev_hash = hashlib.sha256(f"{ev_title}:{ev_start}".encode()).hexdigest()[:8]
-            raw.setdefault("source_name", "claude_extract")
-            raw.setdefault("source_url", article_url)
-            raw.setdefault("source_id", f"claude:{article_url}#{ev_hash}")
-            raw.setdefault("end_at", None)
-            try:
-                ev = Event.model_validate(raw)
-                events.append(ev)
-            except ValidationError as e:
-                logger.warning("Event validation failed, skipping: %s", e)
-                continue
-
-        return events
+        if usage is not None:
+            usage.add(data.get("usage"))
+        return data
 
     raise ClaudeExtractError(
         f"Claude API: max retries ({cfg.max_retries}) exceeded. Last error: {last_error}"
     )
+
+
+def _events_from_tool_output(tool_output: dict, article_url: str) -> List[Event]:
+    """emit_eventsの出力 → Event。source系フィールドはこの記事のもので埋める。
+
+    tool_output自体は書き換えない（キャッシュした値を別URLの記事で再利用するため）。
+    """
+    raw_events = tool_output.get("events", [])
+    if not raw_events:
+        return []
+
+    events: List[Event] = []
+    for raw in raw_events:
+        raw = dict(raw)
+        # source_id をイベント単位でユニークにする。
+        # 1記事→複数イベント時にevent_sourcesの(source_name, source_id)主キーが
+        # 衝突して最後のイベントだけ残る事故を防止。
+        ev_title = raw.get("title", "")
+        ev_start = raw.get("start_at", "")
+        ev_hash = hashlib.sha256(f"{ev_title}:{ev_start}".encode()).hexdigest()[:8]
+        raw.setdefault("source_name", "claude_extract")
+        raw.setdefault("source_url", article_url)
+        raw.setdefault("source_id", f"claude:{article_url}#{ev_hash}")
+        raw.setdefault("end_at", None)
+        try:
+            ev = Event.model_validate(raw)
+            events.append(ev)
+        except ValidationError as e:
+            logger.warning("Event validation failed, skipping: %s", e)
+            continue
+
+    return events
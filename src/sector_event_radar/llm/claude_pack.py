@@ -0,0 +1,205 @@
+"""複数記事パッキング — 短いRSS記事を1リクエストにまとめてClaude抽出する。
+
+記事1本ごとに ~1.5k tokens の SYSTEM_PROMPT とツールスキーマを繰り返し送っていたが、
+RSSの要約は数百tokensしかないことが多い。トークン予算内で記事をまとめ、
+イベントごとに article_index を返させて記事単位に振り分け直す。
+
+- PACKED_EMIT_EVENTS_TOOL: EMIT_EVENTS_TOOL に article_index（必須）を足したもの
+- 振り分け後は単発版と同じ _events_from_tool_output() で、記事ごとの
+  source_url / source_id を付ける
+- パック応答が検証に通らない（ツール出力なし / article_index 欠落・範囲外）ときは
+  そのパックの記事を単発呼び出しで取り直す。API自体の失敗はパック全記事の失敗（翌日再試行）
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import logging
+from typing import List, Optional, Sequence, Union
+
+from ..http_client import HttpClient
+from ..models import Event
+from .claude_extract import (
+    EMIT_EVENTS_TOOL,
+    PROMPT_VERSION,
+    SYSTEM_PROMPT,
+    ArticleInput,
+    ClaudeConfig,
+    ClaudeExtractError,
+    _events_from_tool_output,
+    _parse_tool_output,
+    build_payload,
+    cached_prefix,
+    send_messages_request,
+)
+from .extract_cache import ExtractCache, normalized_content_hash
+from .rate_limit import CircuitBreaker, RateLimiter
+from .usage import TokenUsage
+
+logger = logging.getLogger(__name__)
+
+PackOutcome = Union[List[Event], ClaudeExtractError]
+
+# 記事本文の上限（単発版 build_payload と同じ）
+_MAX_CONTENT_CHARS = 8000
+
+PACKED_EMIT_EVENTS_TOOL = copy.deepcopy(EMIT_EVENTS_TOOL)
+_item_schema = PACKED_EMIT_EVENTS_TOOL["input_schema"]["properties"]["events"]["items"]
+_item_schema["properties"]["article_index"] = {
+    "type": "integer",
+    "description": "Index n of the '=== ARTICLE n ===' block whose text contains the evidence",
+}
+_item_schema["required"] = ["article_index"] + _item_schema["required"]
+del _item_schema
+
+PACKED_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+13. The user message contains several articles, each starting with a line "=== ARTICLE n ===".
+    Apply every rule above to each article independently, and set article_index to the n of the
+    article whose text contains the evidence. Never combine facts from different articles."""
+
+PACKED_PROMPT_VERSION = hashlib.sha256(
+    (PACKED_SYSTEM_PROMPT + json.dumps(PACKED_EMIT_EVENTS_TOOL, sort_keys=True)).encode("utf-8")
+).hexdigest()[:12]
+
+
+def estimate_article_tokens(article: ArticleInput) -> int:
+    """記事1本ぶんのユーザーテキストの入力トークン見積り（英文でおよそ4文字/トークン）"""
+    chars = len(article.title) + len(article.published) + len(article.url)
+    chars += min(len(article.content), _MAX_CONTENT_CHARS) + 40
+    return chars // 4 + 1
+
+
+def pack_articles(
+    articles: Sequence[ArticleInput], token_budget: int, max_per_pack: int,
+) -> List[List[int]]:
+    """入力順を保ったまま、記事テキストの合計見積りが token_budget 以下になるよう貪欲にまとめる。
+
+    予算を1本で超える長い記事は単独パック（=単発呼び出し）になる。戻り値は記事indexのリスト。
+    """
+    packs: List[List[int]] = []
+    cur: List[int] = []
+    cur_tokens = 0
+    for i, a in enumerate(articles):
+        t = estimate_article_tokens(a)
+        if cur and (cur_tokens + t > token_budget or len(cur) >= max_per_pack):
+            packs.append(cur)
+            cur, cur_tokens = [], 0
+        cur.append(i)
+        cur_tokens += t
+    if cur:
+        packs.append(cur)
+    return packs
+
+
+def build_packed_payload(cfg: ClaudeConfig, articles: Sequence[ArticleInput]) -> dict:
+    blocks = [
+        f"=== ARTICLE {n} ===\n"
+        f"TITLE: {a.title}\n"
+        f"PUBLISHED: {a.published}\n"
+        f"URL: {a.url}\n\n"
+        f"CONTENT:\n{a.content[:_MAX_CONTENT_CHARS]}"
+        for n, a in enumerate(articles)
+    ]
+    return {
+        "model": cfg.model,
+        "max_tokens": 4096,
+        **cached_prefix(cfg, PACKED_SYSTEM_PROMPT, PACKED_EMIT_EVENTS_TOOL),
+        "messages": [{"role": "user", "content": "\n\n".join(blocks)}],
+        "tool_choice": {"type": "tool", "name": "emit_events"},
+    }
+
+
+def demux_tool_output(tool_output: Optional[dict], n_articles: int) -> Optional[List[dict]]:
+    """パック応答 → 記事ごとの {"events": [...]}（article_indexは取り除く）。
+
+    検証に通らなければ None（呼び出し側で単発にフォールバック）。
+    """
+    if not isinstance(tool_output, dict) or not isinstance(tool_output.get("events"), list):
+        return None
+    per_article: List[dict] = [{"events": []} for _ in range(n_articles)]
+    for raw in tool_output["events"]:
+        if not isinstance(raw, dict):
+            return None
+        idx = raw.get("article_index")
+        if isinstance(idx, bool) or not isinstance(idx, int) or not 0 <= idx < n_articles:
+            return None
+        ev = {k: v for k, v in raw.items() if k != "article_index"}
+        per_article[idx]["events"].append(ev)
+    return per_article
+
+
+def extract_events_packed(
+    cfg: ClaudeConfig,
+    articles: Sequence[ArticleInput],
+    client: Optional[HttpClient] = None,
+    limiter: Optional[RateLimiter] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    cache: Optional[ExtractCache] = None,
+    usage: Optional[TokenUsage] = None,
+) -> List[PackOutcome]:
+    """1パックぶんの記事を抽出し、記事ごとの結果（List[Event] か ClaudeExtractError）を入力順で返す。
+
+    キャッシュは単発版（PROMPT_VERSION）とパック版（PACKED_PROMPT_VERSION）の両方を引く。
+    """
+    outcomes: List[Optional[PackOutcome]] = [None] * len(articles)
+    hashes = [normalized_content_hash(a.title, a.content) for a in articles]
+
+    pending: List[int] = []
+    for i, a in enumerate(articles):
+        if cache is not None:
+            cached = cache.get_first(cfg.model, (PROMPT_VERSION, PACKED_PROMPT_VERSION), hashes[i])
+            if cached is not None:
+                outcomes[i] = _events_from_tool_output(cached, a.url)
+        if outcomes[i] is None:
+            pending.append(i)
+
+    per_article: Optional[List[dict]] = None
+    if len(pending) > 1:
+        packed = [articles[i] for i in pending]
+        try:
+            data = send_messages_request(
+                cfg, build_packed_payload(cfg, packed),
+                client=client, limiter=limiter, breaker=breaker, usage=usage,
+            )
+            per_article = demux_tool_output(_parse_tool_output(data), len(packed))
+            if per_article is None:
+                logger.warning(
+                    "Packed extract: invalid article_index in response, falling back to %d single calls",
+                    len(packed),
+                )
+        except ClaudeExtractError as e:
+            # API自体の失敗（リトライ尽き等）は単発にしても同じなので、パック全記事の失敗とする
+            logger.warning("Packed extract failed for %d articles: %s", len(packed), e)
+            for i in pending:
+                outcomes[i] = e
+            return outcomes  # type: ignore[return-value]
+
+    if per_article is not None:
+        for out, i in zip(per_article, pending):
+            if cache is not None:
+                cache.put(cfg.model, PACKED_PROMPT_VERSION, hashes[i], out)
+            outcomes[i] = _events_from_tool_output(out, articles[i].url)
+        logger.info("Packed extract: %d articles in 1 request", len(pending))
+        return outcomes  # type: ignore[return-value]
+
+    # 単発フォールバック（パックが1本だけの場合もここ）。キャッシュは上で引き済みなので書くだけ
+    for i in pending:
+        a = articles[i]
+        try:
+            data = send_messages_request(
+                cfg, build_payload(cfg, a.title, a.published, a.url, a.content),
+                client=client, limiter=limiter, breaker=breaker, usage=usage,
+            )
+        except ClaudeExtractError as e:
+            outcomes[i] = e
+            continue
+        tool_output = _parse_tool_output(data)
+        if tool_output is None:
+            logger.warning("No emit_events tool_use block in response")
+            outcomes[i] = []
+            continue
+        if cache is not None:
+            cache.put(cfg.model, PROMPT_VERSION, hashes[i], tool_output)
+        outcomes[i] = _events_from_tool_output(tool_output, a.url)
+    return outcomes  # type: ignore[return-value]
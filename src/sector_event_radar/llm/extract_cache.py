@@ -0,0 +1,159 @@
+"""Claude抽出結果のコンテンツアドレス型キャッシュ。
+
+同じ配信記事が複数フィード・複数URLで流れてくる / 失敗runの翌日に同じ記事を再送する、
+といったケースでAPIを叩かずに済ませる。
+
+- キー: (model, プロンプト/ツールスキーマのバージョン, 正規化した title+body のハッシュ)
+- 値: emit_events ツール出力（生のinput dict）。source_url/source_id は記事ごとに
+  付け直すので、別URLの同一記事でも正しいsourceのEventが復元される
+- TTL と最大件数で古いものから削除（open時に1回）
+- hits / misses / stores / evicted / errors を集計しrun summaryに出す
+- get/put は best-effort。sqlite3のエラー（database is locked、ディスクフル等）は
+  warningログ + errors に計上し、get はミス扱い・put は捨てる（課金済みの抽出結果を失わない）
+- テーブルは db._SCHEMA_STEPS で作る（open時に init_db）
+
+抽出ワーカーはスレッドで並列に走るので、HttpCacheと同じく専用コネクション + Lock。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Sequence
+
+from ..db import init_db
+
+logger = logging.getLogger(__name__)
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalized_content_hash(title: str, body: str) -> str:
+    """大文字小文字・空白の揺れを吸収した title+body のSHA-256（hex）。"""
+    text = f"{title}\n{body}".lower()
+    text = _WS_RE.sub(" ", text).strip()
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ExtractCache:
+    """events.db内のllm_cacheテーブル。スレッドセーフ。
+
+    Args:
+        ttl_days: これより古いエントリはopen時に削除（0以下で無期限）
+        max_entries: これを超えたら最後に使われたのが古い順に削除（0以下で無制限）
+    """
+
+    def __init__(self, db_path: str, ttl_days: float = 30, max_entries: int = 5000) -> None:
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {
+            "hits": 0, "misses": 0, "stores": 0, "evicted": 0, "errors": 0,
+        }
+        try:
+            init_db(self._conn)
+            self._stats["evicted"] = self.evict(ttl_days, max_entries)
+        except Exception:
+            self._conn.close()
+            raise
+
+    @staticmethod
+    def make_key(model: str, prompt_version: str, content_hash: str) -> str:
+        return f"{model}:{prompt_version}:{content_hash}"
+
+    def get(self, model: str, prompt_version: str, content_hash: str) -> Optional[dict]:
+        return self.get_first(model, (prompt_version,), content_hash)
+
+    def get_first(
+        self, model: str, prompt_versions: Sequence[str], content_hash: str,
+    ) -> Optional[dict]:
+        """prompt_versionsを順に引き、最初に見つかったものを返す（hit/missは1回として数える）。
+
+        読めなかったとき（sqlite3.Error）はミスとして None を返す。
+        """
+        with self._lock:
+            row = None
+            try:
+                for version in prompt_versions:
+                    key = self.make_key(model, version, content_hash)
+                    row = self._conn.execute(
+                        "SELECT tool_output FROM llm_cache WHERE cache_key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        break
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE llm_cache SET used_at = ? WHERE cache_key = ?", (_now_iso(), key)
+                    )
+                    self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning("LLM cache lookup failed, treating as miss: %s", e)
+                self._stats["errors"] += 1
+                row = None
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, model: str, prompt_version: str, content_hash: str, tool_output: Any) -> None:
+        """保存する。書けなかったとき（sqlite3.Error）はログして捨てる（呼び出し側は結果をそのまま使う）。"""
+        key = self.make_key(model, prompt_version, content_hash)
+        now = _now_iso()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    """INSERT INTO llm_cache
+                       (cache_key, model, prompt_version, content_hash, tool_output, created_at, used_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(cache_key) DO UPDATE SET
+                           tool_output = excluded.tool_output,
+                           created_at = excluded.created_at,
+                           used_at = excluded.used_at""",
+                    (key, model, prompt_version, content_hash,
+                     json.dumps(tool_output, ensure_ascii=False), now, now),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning("LLM cache store failed, result kept uncached: %s", e)
+                self._stats["errors"] += 1
+                return
+            self._stats["stores"] += 1
+
+    def evict(self, ttl_days: float, max_entries: int) -> int:
+        """TTL切れ → 件数超過（used_atが古い順）の順に削除。削除件数を返す。"""
+        removed = 0
+        with self._lock:
+            if ttl_days > 0:
+                cutoff = (datetime.now(timezone.utc) - timedelta(days=ttl_days)).isoformat()
+                removed += self._conn.execute(
+                    "DELETE FROM llm_cache WHERE created_at < ?", (cutoff,)
+                ).rowcount
+            if max_entries > 0:
+                removed += self._conn.execute(
+                    """DELETE FROM llm_cache WHERE cache_key IN (
+                           SELECT cache_key FROM llm_cache
+                            ORDER BY used_at DESC LIMIT -1 OFFSET ?
+                       )""",
+                    (int(max_entries),),
+                ).rowcount
+            self._conn.commit()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            st: Dict[str, Any] = dict(self._stats)
+        lookups = st["hits"] + st["misses"]
+        st["hit_rate"] = round(st["hits"] / lookups, 4) if lookups else 0.0
+        return st
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
@@ -0,0 +1,121 @@
+"""Claude抽出の並列ワーカー間で共有するレートリミッタとサーキットブレーカ。
+
+- TokenBucket: 1分あたりの上限を連続補充のバケットで守る（requests/min, input tokens/min）
+- RateLimiter: 上の2つをまとめて acquire(input_tokens) で待つ
+- CircuitBreaker: 429/529を受けたワーカーが trip() すると、全ワーカーが
+  次のリクエスト前に wait() で同じ時刻まで止まる（各自バラバラにバックオフしない）
+
+すべてスレッドセーフ。clock/sleep はテストで差し替え可能。
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """rate_per_min で補充されるバケット。容量は既定で1分ぶん。"""
+
+    def __init__(
+        self,
+        rate_per_min: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate_per_min <= 0:
+            raise ValueError("rate_per_min must be > 0")
+        self.rate_per_sec = rate_per_min / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_min)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate_per_sec)
+        self._last = now
+
+    def acquire(self, n: float = 1.0) -> float:
+        """n トークン取れるまで待つ。容量超の要求は容量ぶんで打ち切る。待った秒数を返す。"""
+        n = min(float(n), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= n:
+                    self._tokens -= n
+                    return waited
+                wait = (n - self._tokens) / self.rate_per_sec
+            self._sleep(wait)
+            waited += wait
+
+
+class RateLimiter:
+    """requests/min と input tokens/min の2本立て。0以下の上限は無制限扱い。"""
+
+    def __init__(
+        self,
+        requests_per_min: float = 0,
+        input_tokens_per_min: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.requests = (
+            TokenBucket(requests_per_min, clock=clock, sleep=sleep) if requests_per_min > 0 else None
+        )
+        self.input_tokens = (
+            TokenBucket(input_tokens_per_min, clock=clock, sleep=sleep)
+            if input_tokens_per_min > 0 else None
+        )
+
+    def acquire(self, input_tokens: int) -> float:
+        waited = 0.0
+        if self.requests is not None:
+            waited += self.requests.acquire(1)
+        if self.input_tokens is not None:
+            waited += self.input_tokens.acquire(input_tokens)
+        if waited > 0:
+            logger.debug("Rate limiter: waited %.2fs", waited)
+        return waited
+
+
+class CircuitBreaker:
+    """429/529ストームで全ワーカーを一斉に止めるための共有ブレーカ。"""
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._clock = clock
+        self._sleep = sleep
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+        self.trips = 0
+
+    def trip(self, pause_sec: float) -> None:
+        """pause_sec後まで全ワーカーを止める。既に開いていれば遅い方の時刻に延ばすだけ。"""
+        with self._lock:
+            until = self._clock() + max(0.0, pause_sec)
+            if until > self._open_until:
+                if self._open_until <= self._clock():
+                    self.trips += 1
+                self._open_until = until
+
+    def wait(self) -> float:
+        """ブレーカが開いている間は待つ。待った秒数を返す。"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                remaining = self._open_until - self._clock()
+            if remaining <= 0:
+                return waited
+            self._sleep(remaining)
+            waited += remaining
@@ -0,0 +1,51 @@
+"""Claude APIのトークン使用量をrun単位で集計する。
+
+Messages API のレスポンス（バッチ結果の message も同じ形）の usage:
+    input_tokens                 キャッシュ対象外の入力（記事本文など）
+    cache_creation_input_tokens  プロンプトキャッシュに書き込んだ入力（通常入力より割高）
+    cache_read_input_tokens      プロンプトキャッシュから読んだ入力（通常入力の約1割）
+    output_tokens                出力
+
+並列ワーカーから add() されるのでスレッドセーフ。summary() を run summary に出す。
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Optional
+
+USAGE_FIELDS = (
+    "input_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+    "output_tokens",
+)
+
+
+class TokenUsage:
+    """usage ブロックの合計。add() 1回 = APIレスポンス1件。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._totals: Dict[str, int] = {f: 0 for f in USAGE_FIELDS}
+        self._responses = 0
+
+    def add(self, usage: Optional[Dict[str, Any]]) -> None:
+        if not isinstance(usage, dict):
+            return
+        with self._lock:
+            self._responses += 1
+            for f in USAGE_FIELDS:
+                v = usage.get(f)
+                if isinstance(v, int) and not isinstance(v, bool):
+                    self._totals[f] += v
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            st: Dict[str, Any] = {"responses": self._responses, **self._totals}
+        prompt_total = (
+            st["input_tokens"] + st["cache_creation_input_tokens"] + st["cache_read_input_tokens"]
+        )
+        st["cache_read_ratio"] = (
+            round(st["cache_read_input_tokens"] / prompt_total, 4) if prompt_total else 0.0
+        )
+        return st
@@ -0,0 +1,108 @@
+"""macro_title_map（正規表現 → (entity, sub_type)）のタイトルマッチャ。
+
+canonical key生成・FMP macro・公式カレンダー(ICS)の3か所が同じルールで
+イベント名を分類する。旧実装は呼び出しごとに全パターンをコンパイルし直し、
+パターンを1本ずつ search していた。
+
+- コンパイルはconfigごとに1回（AppConfig.macro_matcher() がインスタンスを使い回す）
+- 既定では全ルールを1本の正規表現にまとめ、タイトル1件を1回の match で判定する:
+      (?:(?=.*?(?:pat0))(?P<_r0>)|(?=.*?(?:pat1))(?P<_r1>)|...)
+  先頭位置で左の選択肢から順に先読みするので、旧実装の
+  「map順に search して最初にヒットしたルール」と同じ結果になる
+  （単純な pat0|pat1 の alternation だと「タイトル内で一番左に出たルール」になってしまう）
+- まとめられないパターン（番号付き後方参照・verbose・名前付きグループの衝突など）があれば
+  1本ずつの search にフォールバック
+- タイトル → ルール はLRUでメモ化（同じイベント名が期間内に何度も出る）
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Union
+
+# パターン先頭のグローバルインラインフラグ（例: "(?i)"）。まとめる際はスコープ付きに書き換える
+_LEADING_FLAGS_RE = re.compile(r"^\(\?([aiLmsux]+)\)")
+
+CompiledRules = Sequence[Tuple[re.Pattern, Any]]
+
+
+def _scoped(pattern: str) -> str:
+    """"(?i)CPI" → "(?i:CPI)"。Python 3.11以降、途中に置いたグローバルフラグはエラーになるため。"""
+    m = _LEADING_FLAGS_RE.match(pattern)
+    if not m:
+        return f"(?:{pattern})"
+    return f"(?{m.group(1)}:{pattern[m.end():]})"
+
+
+class MacroMatcher:
+    """(pattern, rule) の並びから構築する。match(title) は最初にヒットしたルール（なければNone）。
+
+    Args:
+        rules: (正規表現文字列, ルール) の並び。ルールの型は問わない（通常 MacroTitleRule）
+        combined: Trueなら1本の正規表現にまとめる（まとめられなければ自動で1本ずつ）
+        cache_size: タイトル → ルールのLRUの件数
+    """
+
+    def __init__(
+        self,
+        rules: Iterable[Tuple[str, Any]],
+        combined: bool = True,
+        cache_size: int = 4096,
+    ) -> None:
+        self.patterns: List[str] = []
+        self.rules: List[Tuple[re.Pattern, Any]] = []
+        for pattern, rule in rules:
+            self.patterns.append(pattern)
+            self.rules.append((re.compile(pattern), rule))
+        self._combined: Optional[re.Pattern] = self._build_combined() if combined else None
+        self._lookup = lru_cache(maxsize=cache_size)(self._match_uncached)
+
+    @property
+    def is_combined(self) -> bool:
+        return self._combined is not None
+
+    def _build_combined(self) -> Optional[re.Pattern]:
+        # 番号付き後方参照はまとめるとグループ番号がずれて意味が変わる。
+        # verboseは "#" コメントが外側の閉じ括弧まで食うのでまとめない
+        if not self.rules or any(
+            re.search(r"\\[1-9]", p) or pat.flags & re.VERBOSE
+            for p, (pat, _) in zip(self.patterns, self.rules)
+        ):
+            return None
+        alts = "|".join(
+            f"(?=(?s:.*?){_scoped(p)})(?P<_r{i}>)" for i, p in enumerate(self.patterns)
+        )
+        try:
+            combined = re.compile(f"(?:{alts})")
+        except re.error:  # 名前付きグループの衝突など
+            return None
+        # 各選択肢の末尾の空グループ → ルール番号（マッチした選択肢が最後に閉じたグループになる）
+        self._group_rule = {combined.groupindex[f"_r{i}"]: i for i in range(len(self.rules))}
+        return combined
+
+    def _match_uncached(self, title: str) -> Optional[Any]:
+        if self._combined is not None:
+            m = self._combined.match(title)
+            if m is None:
+                return None
+            return self.rules[self._group_rule[m.lastindex]][1]
+        for pat, rule in self.rules:
+            if pat.search(title):
+                return rule
+        return None
+
+    def match(self, title: str) -> Optional[Any]:
+        return self._lookup(title)
+
+    def cache_info(self):
+        return self._lookup.cache_info()
+
+
+def match_rule(rules: Union[MacroMatcher, CompiledRules], title: str) -> Optional[Any]:
+    """MacroMatcher でも旧形式の [(re.Pattern, rule), ...] でも同じ結果を返す。"""
+    if isinstance(rules, MacroMatcher):
+        return rules.match(title)
+    for pat, rule in rules:
+        if pat.search(title):
+            return rule
+    return None
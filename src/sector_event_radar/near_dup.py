@@ -0,0 +1,162 @@
+"""RSS記事の近似重複（同じ配信記事の転載）をSimHashで束ねる。
+
+Reuters/APなどの同じ記事が複数フィードに別URL・ほぼ同文で流れてくると、
+URL単位のdedupでは落ちずに同じ話をprefilter/Claudeに何度も送ってしまう。
+
+- 指紋: 正規化した title+body の単語3-gram（shingle）集合の64bit SimHash
+- 同一判定: ハミング距離 <= max_distance
+- 索引: 64bitを max_distance+1 個のバンドに分け、どれかのバンドが完全一致するものだけ比較
+  （距離 <= max_distance なら鳩の巣原理で必ずどこかのバンドが一致するので取りこぼしなし）
+- 過去runで処理済み記事の指紋は events.db の article_simhash に保存し、lookback期間ぶん読み込む
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Generic, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+BITS = 64
+_SHINGLE = 3
+_TOKEN_RE = re.compile(r"\w+")
+
+# 多数決の集計: 64bitの各bitを32bit幅のレーンに広げて足し込む（bitごとのPythonループを避ける）
+_LANE = 32
+_LANE_MASK = (1 << _LANE) - 1
+_SPREAD = [
+    sum(((byte >> i) & 1) << (i * _LANE) for i in range(8))
+    for byte in range(256)
+]
+
+K = TypeVar("K", bound=Hashable)
+
+
+def _shingles(text: str) -> set:
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < _SHINGLE:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + _SHINGLE]) for i in range(len(tokens) - _SHINGLE + 1)}
+
+
+def simhash(text: str) -> Optional[int]:
+    """64bit SimHash。単語が1つもなければ None（指紋なし＝束ねない）。"""
+    feats = _shingles(text)
+    if not feats:
+        return None
+    total = 0
+    for f in feats:
+        h = int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "little")
+        for k in range(8):
+            total += _SPREAD[(h >> (8 * k)) & 0xFF] << (8 * _LANE * k)
+    half = len(feats) / 2
+    fp = 0
+    for bit in range(BITS):
+        if (total >> (bit * _LANE)) & _LANE_MASK > half:
+            fp |= 1 << bit
+    return fp
+
+
+def article_simhash(title: str, body: str) -> Optional[int]:
+    return simhash(f"{title}\n{body}")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class NearDupIndex(Generic[K]):
+    """SimHashのバンド索引。find() は距離 <= max_distance の登録済みキーを1つ返す。"""
+
+    def __init__(self, max_distance: int = 7) -> None:
+        if not 0 <= max_distance < BITS:
+            raise ValueError(f"max_distance must be in [0, {BITS})")
+        self.max_distance = max_distance
+        n_bands = max_distance + 1
+        width, extra = divmod(BITS, n_bands)
+        self._bands: List[Tuple[int, int]] = []  # (shift, mask)
+        shift = 0
+        for i in range(n_bands):
+            w = width + (1 if i < extra else 0)
+            self._bands.append((shift, (1 << w) - 1))
+            shift += w
+        self._tables: List[Dict[int, List[Tuple[int, K]]]] = [{} for _ in self._bands]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, key: K, fp: int) -> None:
+        for table, (shift, mask) in zip(self._tables, self._bands):
+            table.setdefault((fp >> shift) & mask, []).append((fp, key))
+        self._size += 1
+
+    def find(self, fp: int) -> Optional[K]:
+        for table, (shift, mask) in zip(self._tables, self._bands):
+            for other, key in table.get((fp >> shift) & mask, ()):
+                if hamming(fp, other) <= self.max_distance:
+                    return key
+        return None
+
+
+@dataclass
+class NearDupResult:
+    """collapse() の結果。インデックスはすべて入力記事列の位置。"""
+    representatives: List[int] = field(default_factory=list)  # クラスタの出現順
+    members: Dict[int, List[int]] = field(default_factory=dict)  # 代表 → 同じクラスタの他の記事
+    seen_duplicates: List[int] = field(default_factory=list)  # 過去runの処理済み記事の近似重複
+
+    def report(self) -> Dict[str, object]:
+        sizes = Counter(len(m) + 1 for m in self.members.values() if m)
+        return {
+            "clusters": sum(sizes.values()),
+            "collapsed": sum(len(m) for m in self.members.values()),
+            "seen_duplicates": len(self.seen_duplicates),
+            "cluster_sizes": {str(k): sizes[k] for k in sorted(sizes)},
+        }
+
+
+def collapse(
+    fingerprints: Sequence[Optional[int]],
+    text_lengths: Sequence[int],
+    seen: Optional[NearDupIndex] = None,
+    max_distance: int = 7,
+) -> NearDupResult:
+    """記事を近似重複クラスタに束ね、各クラスタから代表1本を選ぶ。
+
+    代表はクラスタ内で本文（title+body）が最も長い記事（同じ長さなら先に来た方）。
+    seen（過去runの処理済み記事の索引）に近いものは seen_duplicates に入れて代表にしない。
+    指紋なし（None）の記事は常に単独の代表。
+    """
+    result = NearDupResult()
+    run_index: NearDupIndex[int] = NearDupIndex(max_distance)
+    rep_of_first: Dict[int, int] = {}  # クラスタの最初の記事 → 現在の代表
+    order: List[int] = []  # クラスタの最初の記事（入力順）
+
+    for i, fp in enumerate(fingerprints):
+        if fp is None:
+            order.append(i)
+            rep_of_first[i] = i
+            result.members[i] = []
+            continue
+        if seen is not None and seen.find(fp) is not None:
+            result.seen_duplicates.append(i)
+            continue
+        first = run_index.find(fp)
+        if first is None:
+            run_index.add(i, fp)
+            order.append(i)
+            rep_of_first[i] = i
+            result.members[i] = []
+            continue
+        rep = rep_of_first[first]
+        if text_lengths[i] > text_lengths[rep]:
+            # 長い方を代表にし、旧代表はメンバーへ
+            result.members[i] = result.members.pop(rep) + [rep]
+            rep_of_first[first] = i
+        else:
+            result.members[rep].append(i)
+
+    result.representatives = [rep_of_first[f] for f in order]
+    result.members = {r: sorted(result.members[r]) for r in result.representatives}
+    return result
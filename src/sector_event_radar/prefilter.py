@@ -2,19 +2,33 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass
-from typing import Dict, List, Sequence
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
 
+from .keyword_matcher import KeywordMatcher
 from .models import Article
 
+if TYPE_CHECKING:
+    from .stage_b_model import StageBModel
+
 logger = logging.getLogger(__name__)
 
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
+# sklearn は import だけで約1秒かかるので、Stage Bを実際に走らせるまで遅らせる
+_HAS_SKLEARN = find_spec("sklearn") is not None
+TfidfVectorizer = None
+cosine_similarity = None
+
 
-    _HAS_SKLEARN = True
-except Exception:
-    _HAS_SKLEARN = False
+def _load_sklearn() -> bool:
+    """Stage B用のsklearnをimport。importできなければ False（Stage Bをスキップ）。"""
+    global _HAS_SKLEARN, TfidfVectorizer, cosine_similarity
+    if _HAS_SKLEARN and TfidfVectorizer is None:
+        try:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.metrics.pairwise import cosine_similarity
+        except Exception:
+            _HAS_SKLEARN = False
+    return _HAS_SKLEARN
 
 
 @dataclass(frozen=True)
@@ -24,6 +38,7 @@ class ScoredArticle:
 
 
 def _kw_score(text: str, keywords: Dict[str, float]) -> float:
+    """旧Stage Aスコア（キーワードごとにtext.count）。KeywordMatcher.scoreの参照実装。"""
     t = text.lower()
     score = 0.0
     for kw, w in keywords.items():
@@ -42,19 +57,29 @@ def prefilter(
     keywords: Dict[str, float],
     stage_a_threshold: float = 4.0,
     stage_b_top_k: int = 30,
+    matcher: Optional[KeywordMatcher] = None,
+    stage_b_model: Optional["StageBModel"] = None,
+    compare_stage_b: bool = False,
+    shadow_stage_b: bool = False,
 ) -> List[ScoredArticle]:
     """Spec M1: 2段階記事フィルタ。
     - Stage A: keyword weighted score（thresholdは config.yaml で可変、デフォルト4.0）
+      matcher（AppConfig.keyword_matcher()）を渡せば構築済みオートマトンを使い回す
     - Stage B: TF-IDF cosine similarity, top_k only (if sklearn available)
+      stage_b_model を渡せば永続IDFで採点（fitしない）。無ければ従来どおり毎回fit
+      compare_stage_b=True なら両方で採点してランキング差をログ出力
+      shadow_stage_b=True なら stage_b_model は比較ログだけに使い、採点は毎回fit
     - Stage A=0件時: score>0 の上位K件をfallbackで返す（sklearn有無に関わらず）
     """
-    # ── Stage A: keyword scoring ──
+    # ── Stage A: keyword scoring（Aho–Corasickで1記事1パス）──
+    if matcher is None:
+        matcher = KeywordMatcher(keywords)
     all_scored: List[ScoredArticle] = []
     scored_a: List[ScoredArticle] = []
     dropped_a: int = 0
     for a in articles:
         text = f"{a.title}\n{a.body}"
-        s = _kw_score(text, keywords)
+        s = matcher.score(text)
         sa = ScoredArticle(article=a, relevance_score=s)
         all_scored.append(sa)
         if s >= stage_a_threshold:
@@ -99,7 +124,7 @@ def prefilter(
         return fallback
 
     # ── sklearn無し → Stage Aの結果をスコア降順で返す ──
-    if not _HAS_SKLEARN:
+    if not _load_sklearn():
         scored_a.sort(key=lambda x: x.relevance_score, reverse=True)
         logger.info("Stage B skipped (no sklearn). Returning %d Stage A articles", len(scored_a))
         return scored_a
@@ -107,9 +132,14 @@ def prefilter(
     # ── Stage B: TF-IDF cosine similarity ──
     docs = [f"{sa.article.title}\n{sa.article.body}" for sa in scored_a]
     query = " ".join(list(keywords.keys())[:200])  # 念のため上限
-    vectorizer = TfidfVectorizer()
-    X = vectorizer.fit_transform(docs + [query])
-    sims = cosine_similarity(X[-1], X[:-1]).flatten()
+    if stage_b_model is not None and not shadow_stage_b:
+        sims = stage_b_model.score(docs, query)
+        if compare_stage_b:
+            _log_stage_b_comparison(scored_a, _refit_sims(docs, query), sims, stage_b_top_k)
+    else:
+        sims = _refit_sims(docs, query)
+        if stage_b_model is not None and compare_stage_b:
+            _log_stage_b_comparison(scored_a, sims, stage_b_model.score(docs, query), stage_b_top_k)
 
     # TF-IDF類似度で上書きして降順ソート
     rescored = [
@@ -137,3 +167,27 @@ def prefilter(
         )
 
     return result
+
+
+def _refit_sims(docs: List[str], query: str):
+    """旧Stage B: Stage A通過記事 + クエリだけでTF-IDFをfitしてコサイン類似度。"""
+    if not _load_sklearn():
+        raise RuntimeError("Stage B refit requires scikit-learn")
+    vectorizer = TfidfVectorizer()
+    X = vectorizer.fit_transform(docs + [query])
+    return cosine_similarity(X[-1], X[:-1]).flatten()
+
+
+def _log_stage_b_comparison(scored_a: List[ScoredArticle], refit, persistent, top_k: int) -> None:
+    from .stage_b_model import compare_rankings
+
+    urls = [sa.article.url for sa in scored_a]
+    cmp = compare_rankings(
+        list(zip(urls, map(float, refit))),
+        list(zip(urls, map(float, persistent))),
+        top_k,
+    )
+    logger.info(
+        "Stage B compare (refit vs persistent): overlap@%d=%.2f max_rank_shift=%d",
+        cmp["k"], cmp["overlap_at_k"], cmp["max_rank_shift"],
+    )
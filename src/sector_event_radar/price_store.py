@@ -0,0 +1,253 @@
+"""終値のローカルストア（events.db の prices / price_ranges）。
+
+impact.fetch_prices は呼ぶたびに yfinance から全期間を取り直す。月次auditは
+mapping × ticker ごとに reaction_ratio を計算するので、同じ系列を何度も取りに行っていた。
+
+- prices: (ticker, date) → close。price_ranges: tickerごとの取得済み期間 [start, end]
+  （休場日は行が無いので、行の有無ではなく期間で「取得済み」を判定する）
+- get_prices(): 取得済み期間の前後で足りない部分だけを取得・保存し、ディスクから横持ちで返す。
+  取得済み期間が連続したままになるよう、離れた範囲を頼まれたら間も埋める
+- 当日以降の終値はまだ確定していないので取得済みにしない（次回もう一度取りに行く）
+- 取得で行が返ってこなかったtickerも取得済みにしない
+- 調整済み終値は分割・配当のたびに過去分が変わるので、のりしろの1行で食い違いを検出して取り直す
+- fixture_dir を渡すとネットワークに出ず <dir>/<TICKER>.csv（列: date, close）を読む（テスト用）
+"""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import pandas as pd
+
+from .db import _IN_CHUNK
+from .impact import fetch_prices
+
+logger = logging.getLogger(__name__)
+
+# fetch_prices と同じシグネチャ: (tickers, start, end) → 横持ちDataFrame（index=日付, 列=ticker）
+Fetcher = Callable[[List[str], date, date], pd.DataFrame]
+
+_ONE_DAY = timedelta(days=1)
+# のりしろの終値の比較許容差。少額配当の調整（~1e-4）は拾い、float32由来の誤差（~1e-7）は無視する
+_ADJ_RTOL = 1e-6
+
+
+def load_fixture_prices(
+    fixture_dir: Union[str, Path], tickers: List[str], start: date, end: date,
+) -> pd.DataFrame:
+    """<fixture_dir>/<TICKER>.csv から fetch_prices と同じ形のフレームを作る（無いtickerは列なし）。"""
+    cols = {}
+    for t in tickers:
+        path = Path(fixture_dir) / f"{t}.csv"
+        if path.exists():
+            cols[t] = pd.read_csv(path, parse_dates=["date"], index_col="date")["close"]
+    if not cols:
+        return pd.DataFrame(index=pd.DatetimeIndex([]), dtype=float)
+    out = pd.DataFrame(cols)
+    return out[(out.index >= pd.Timestamp(start)) & (out.index <= pd.Timestamp(end))]
+
+
+def _adjustment_changed(fetched: Optional[pd.Series], anchor: Tuple[date, float]) -> bool:
+    """のりしろの日の終値が保存済みの値とずれていれば True（取り直した値が無ければ判定しない）。"""
+    if fetched is None:
+        return False
+    d, stored = anchor
+    v = fetched.get(pd.Timestamp(d))
+    if v is None or pd.isna(v):
+        return False
+    return abs(float(v) - stored) > _ADJ_RTOL * abs(stored)
+
+
+def _missing_ranges(
+    covered: Optional[Tuple[date, date]], start: date, last: date,
+) -> List[Tuple[date, date]]:
+    """[start, last] のうち取得済み期間 covered の外側。結果を足しても期間は連続のまま。"""
+    if start > last:
+        return []
+    if covered is None:
+        return [(start, last)]
+    s0, e0 = covered
+    out = []
+    if start < s0:
+        out.append((start, s0 - _ONE_DAY))
+    if last > e0:
+        out.append((e0 + _ONE_DAY, last))
+    return out
+
+
+class PriceStore:
+    """tickerごとに足りない期間だけ取得するローカル価格ストア。
+
+    Args:
+        conn: init_db 済みの接続（events.db）
+        fetch: 取得関数。None なら fixture_dir があればそのCSV、無ければ yfinance（fetch_prices）
+        fixture_dir: オフラインモード用のCSVディレクトリ
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        fetch: Optional[Fetcher] = None,
+        fixture_dir: Optional[Union[str, Path]] = None,
+    ) -> None:
+        if fetch is None:
+            fetch = partial(load_fixture_prices, fixture_dir) if fixture_dir else fetch_prices
+        self.conn = conn
+        self.fetch = fetch
+        self.fetch_calls = 0
+
+    def covered(self, tickers: Iterable[str]) -> Dict[str, Tuple[date, date]]:
+        uniq = list(dict.fromkeys(tickers))
+        out: Dict[str, Tuple[date, date]] = {}
+        for i in range(0, len(uniq), _IN_CHUNK):
+            chunk = uniq[i:i + _IN_CHUNK]
+            cur = self.conn.execute(
+                f"SELECT ticker, start_date, end_date FROM price_ranges "
+                f"WHERE ticker IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for t, s, e in cur:
+                out[t] = (date.fromisoformat(s), date.fromisoformat(e))
+        return out
+
+    def refresh(self, tickers: List[str], start: date, end: date, today: Optional[date] = None) -> int:
+        """足りない期間だけ取得して保存。同じ期間が足りないtickerは1回の取得にまとめる。
+
+        fetch_prices は分割・配当調整済み（auto_adjust）の終値を返すので、前回の取得後に
+        分割や配当があると保存済みの系列と新しく取った系列で調整が食い違う。
+        足りない期間に隣接する保存済みの1行（のりしろ）も取り直して値を比べ、
+        ずれていればそのtickerは保存済みの系列を捨てて全期間を取り直す。
+
+        Returns: 保存した行数
+        """
+        today = today or datetime.now(timezone.utc).date()
+        last = min(end, today)
+        covered = self.covered(tickers)
+        # (取得開始, 取得終了) → [(ticker, のりしろの (日付, 保存済み終値) or None)]
+        plan: Dict[Tuple[date, date], List[Tuple[str, Optional[Tuple[date, float]]]]] = {}
+        for t in dict.fromkeys(tickers):
+            cov = covered.get(t)
+            for s, e in _missing_ranges(cov, start, last):
+                anchor = None
+                if cov is not None:
+                    head = e < cov[0]
+                    anchor = self._anchor(t, cov[0] if head else cov[1], head=head)
+                if anchor is not None:
+                    s, e = min(s, anchor[0]), max(e, anchor[0])
+                plan.setdefault((s, e), []).append((t, anchor))
+
+        written = 0
+        restate: Dict[Tuple[date, date], List[str]] = {}
+        stale: Set[str] = set()
+        for (s, e), group in plan.items():
+            series = self._fetch([t for t, _ in group], s, e)
+            if series is None:
+                continue
+            for t, anchor in group:
+                if t in stale or (anchor is not None and _adjustment_changed(series.get(t), anchor)):
+                    series.pop(t, None)
+                    if t not in stale:
+                        logger.info("price adjustment changed for %s; refetching full history", t)
+                        stale.add(t)
+                        cov = covered[t]
+                        restate.setdefault((min(start, cov[0]), max(last, cov[1])), []).append(t)
+            written += self._save(series, s, min(e, today - _ONE_DAY))
+
+        for (s, e), group in restate.items():
+            with self.conn:
+                self.conn.executemany("DELETE FROM prices WHERE ticker = ?", [(t,) for t in group])
+                self.conn.executemany("DELETE FROM price_ranges WHERE ticker = ?", [(t,) for t in group])
+            series = self._fetch(group, s, e)
+            if series is not None:
+                written += self._save(series, s, min(e, today - _ONE_DAY))
+        return written
+
+    def _anchor(self, ticker: str, d: date, head: bool) -> Optional[Tuple[date, float]]:
+        """取得済み期間の端に最も近い保存済みの (日付, 終値)。head=True なら d 以降、False なら d 以前。"""
+        if head:
+            sql = "SELECT date, close FROM prices WHERE ticker = ? AND date >= ? ORDER BY date LIMIT 1"
+        else:
+            sql = "SELECT date, close FROM prices WHERE ticker = ? AND date <= ? ORDER BY date DESC LIMIT 1"
+        row = self.conn.execute(sql, (ticker, d.isoformat())).fetchone()
+        return (date.fromisoformat(row[0]), float(row[1])) if row else None
+
+    def _fetch(self, tickers: List[str], start: date, end: date) -> Optional[Dict[str, pd.Series]]:
+        """取得して ticker → 値のある行だけのSeries。失敗したら None。"""
+        try:
+            df = self.fetch(tickers, start, end)
+        except Exception as ex:
+            logger.warning("price fetch failed for %s %s..%s: %s", ",".join(tickers), start, end, ex)
+            return None
+        self.fetch_calls += 1
+        out: Dict[str, pd.Series] = {}
+        if df is None or df.empty:
+            return out
+        idx = pd.to_datetime(df.index).normalize()
+        for t in tickers:
+            if t in df.columns:
+                out[t] = pd.Series(df[t].to_numpy(dtype=float), index=idx).dropna()
+        return out
+
+    def _save(self, series: Dict[str, pd.Series], start: date, covered_end: date) -> int:
+        """終値を保存し、行が返ってきたtickerだけ取得済み期間を広げる。
+
+        yf.download はticker単位の失敗でも例外にならず全部NaNの列を返すので、
+        行が1つも無いtickerは取得済みにしない（次回もう一度取りに行く）。
+        """
+        rows = [
+            (t, d.date().isoformat(), float(v))
+            for t, s in series.items()
+            for d, v in s.items()
+        ]
+        got = [t for t, s in series.items() if not s.empty]
+        now_iso = datetime.now(timezone.utc).isoformat()
+        with self.conn:
+            self.conn.executemany(
+                """INSERT INTO prices (ticker, date, close) VALUES (?, ?, ?)
+                   ON CONFLICT(ticker, date) DO UPDATE SET close = excluded.close""",
+                rows,
+            )
+            if covered_end >= start:
+                self.conn.executemany(
+                    """INSERT INTO price_ranges (ticker, start_date, end_date, fetched_at)
+                       VALUES (?, ?, ?, ?)
+                       ON CONFLICT(ticker) DO UPDATE SET
+                           start_date = MIN(start_date, excluded.start_date),
+                           end_date = MAX(end_date, excluded.end_date),
+                           fetched_at = excluded.fetched_at""",
+                    [(t, start.isoformat(), covered_end.isoformat(), now_iso) for t in got],
+                )
+        return len(rows)
+
+    def load(self, tickers: List[str], start: date, end: date) -> pd.DataFrame:
+        """ディスク上の終値を横持ちで返す（index=日付, 列=tickersの順。無い値はNaN）。"""
+        uniq = list(dict.fromkeys(tickers))
+        rows = []
+        for i in range(0, len(uniq), _IN_CHUNK):
+            chunk = uniq[i:i + _IN_CHUNK]
+            cur = self.conn.execute(
+                f"SELECT ticker, date, close FROM prices "
+                f"WHERE ticker IN ({','.join('?' * len(chunk))}) AND date BETWEEN ? AND ?",
+                [*chunk, start.isoformat(), end.isoformat()],
+            )
+            rows.extend(tuple(r) for r in cur)
+        if not rows:
+            return pd.DataFrame(columns=uniq, index=pd.DatetimeIndex([]), dtype=float)
+        wide = pd.DataFrame.from_records(rows, columns=["ticker", "date", "close"]).pivot(
+            index="date", columns="ticker", values="close",
+        )
+        wide.index = pd.to_datetime(wide.index)
+        wide.index.name = None
+        wide.columns.name = None
+        return wide.reindex(columns=uniq).sort_index()
+
+    def get_prices(
+        self, tickers: List[str], start: date, end: date, today: Optional[date] = None,
+    ) -> pd.DataFrame:
+        """fetch_prices の置き換え。足りない期間だけ取得してからディスクから返す。"""
+        self.refresh(tickers, start, end, today=today)
+        return self.load(tickers, start, end)
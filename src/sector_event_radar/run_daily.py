@@ -13,23 +13,60 @@ import json
 import logging
 import os
 import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta, timezone
+from functools import partial
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from .canonical import make_canonical_key
+from .canonical import canonical_config_signature, event_fingerprint, make_canonical_key
 from .config import AppConfig
-from .db import connect, init_db, upsert_event, is_article_seen, mark_article_seen
+from .db import (
+    DEFAULT_PRAGMAS,
+    build_seen_bloom,
+    connect,
+    init_db,
+    latest_sources,
+    load_article_simhashes,
+    load_event_fingerprints,
+    load_ics_manifest,
+    mark_articles_seen,
+    migration_applied,
+    record_article_simhashes,
+    record_event_fingerprints,
+    record_migration,
+    save_ics_manifest,
+    seen_urls,
+    upsert_events,
+)
 from .flows import generate_opex_events
-from .ics import events_to_ics
+from .http_cache import HttpCache
+from .http_client import HttpClient
+from .ics import write_calendars
 from .models import Article, Event
-from .prefilter import prefilter
+from .near_dup import NearDupIndex, article_simhash, collapse
+from .prefilter import ScoredArticle, prefilter
+from .stage_b_model import load_model as load_stage_b_model
+from .scheduler import CollectorResult, CollectorTask, run_collectors
+from .session_calendar import SessionCalendar, get_session_calendar
+from .utils import AtomicFile
 from .validate import validate_event
 from .collectors.rss import fetch_rss
 from .collectors.scheduled import fetch_tradingeconomics_events, fetch_fmp_earnings_events
 from .collectors.official_calendars import fetch_official_macro_events
 from .collectors.federal_register import fetch_federal_register_bis_events
-from .llm.claude_extract import ClaudeConfig, extract_events_from_article, ClaudeExtractError
+from .llm.claude_batch import extract_events_batch
+from .llm.claude_pack import extract_events_packed, pack_articles
+from .llm.usage import TokenUsage
+from .llm.claude_extract import (
+    ArticleInput,
+    ClaudeConfig,
+    ClaudeExtractError,
+    extract_events_from_article,
+)
+from .llm.extract_cache import ExtractCache, normalized_content_hash
+from .llm.rate_limit import CircuitBreaker, RateLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -54,31 +91,49 @@ def _parse_args() -> argparse.Namespace:
 def _content_hash(title: str, body: str) -> str:
     """記事のcontent hashを生成。articlesテーブルに記録用。
     現在の既出判定はURL単位（コスト優先）。将来、内容変更で再処理したい場合は
-    is_article_seenでcontent_hashも比較する方式に切替え可能。"""
-    return hashlib.sha256(f"{title}\n{body}".encode()).hexdigest()[:16]
+    is_article_seenでcontent_hashも比較する方式に切替え可能。
+    抽出キャッシュ（llm_cache）のキーと同じ正規化ハッシュの先頭16桁。"""
+    return normalized_content_hash(title, body)[:16]
 
 
 def _list_events_from_db(conn, start: datetime, end: datetime) -> List[Event]:
     """DBからactive eventsを取得してEvent objectに変換。
-    event_sourcesから最新のsource_url/evidenceもJOINで取得。"""
+    event_sourcesから最新のsource_url/evidenceもJOINで取得。
+
+    最新sourceは idx_event_sources_key_seen(canonical_key, seen_at) に沿った
+    ROW_NUMBER() で1イベント1行に絞る（旧: イベント行ごとの相関サブクエリ）。
+    seen_atが同時刻のsourceは後に書かれた方（rowidが大きい方）を採用。
+    """
     cur = conn.execute(
         """
+        WITH window_events AS (
+            SELECT canonical_key FROM events
+             WHERE status = 'active'
+               AND start_at >= ?
+               AND start_at <= ?
+        ),
+        latest_source AS (
+            SELECT es.canonical_key, es.source_url, es.evidence,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY es.canonical_key
+                       ORDER BY es.seen_at DESC, es.rowid DESC
+                   ) AS rn
+              FROM event_sources es
+             WHERE es.canonical_key IN (SELECT canonical_key FROM window_events)
+        )
         SELECT e.canonical_key, e.title, e.start_at, e.end_at, e.category,
                e.sector_tags, e.risk_score, e.confidence, e.status,
-               es.source_url, es.evidence
+               ls.source_url, ls.evidence
           FROM events e
-          LEFT JOIN event_sources es
-            ON e.canonical_key = es.canonical_key
-           AND es.seen_at = (
-               SELECT MAX(es2.seen_at) FROM event_sources es2
-                WHERE es2.canonical_key = e.canonical_key
-           )
+          LEFT JOIN latest_source ls
+            ON ls.canonical_key = e.canonical_key
+           AND ls.rn = 1
          WHERE e.status = 'active'
            AND e.start_at >= ?
            AND e.start_at <= ?
-         ORDER BY e.start_at ASC
+         ORDER BY e.start_at ASC, e.canonical_key ASC
         """,
-        (start.isoformat(), end.isoformat()),
+        (start.isoformat(), end.isoformat(), start.isoformat(), end.isoformat()),
     )
     rows = cur.fetchall()
     out: List[Event] = []
@@ -103,10 +158,89 @@ def _list_events_from_db(conn, start: datetime, end: datetime) -> List[Event]:
     return out
 
 
-def _collect_scheduled(cfg: AppConfig, now: datetime) -> Tuple[List[Event], List[str]]:
-    """Scheduled sources: TE API + FMP API。各独立try/except。"""
-    events: List[Event] = []
-    errors: List[str] = []
+def _task(cfg: AppConfig, name: str, label: str, fn) -> CollectorTask:
+    return CollectorTask(
+        name=name, fn=fn, label=label, deadline_sec=cfg.collectors.deadline_for(name),
+    )
+
+
+def _make_http_client(cfg: AppConfig, db_path: str, errors: List[str]) -> HttpClient:
+    """共有HttpClient。HTTPキャッシュが開けなければキャッシュ無しで続ける（ICS生成まで必ず到達する）。"""
+    cache: Optional[HttpCache] = None
+    if cfg.http.cache:
+        try:
+            cache = HttpCache(db_path)
+        except Exception as e:
+            msg = f"HTTP cache unavailable, fetching without it: {e}"
+            logger.warning(msg)
+            errors.append(msg)
+    return HttpClient(
+        pool_maxsize=cfg.http.pool_maxsize,
+        per_host_limit=cfg.http.per_host_limit,
+        max_retries=cfg.http.max_retries,
+        backoff_sec=cfg.http.backoff_sec,
+        cache=cache,
+    )
+
+
+def _open_llm_cache(
+    cfg: AppConfig, db_path: str, dry_run: bool, errors: List[str],
+) -> Optional[ExtractCache]:
+    """抽出キャッシュ。dry-runはClaudeを呼ばないので開かない（open時のevictで行を消さない）。
+    開けなければキャッシュ無しで続ける（ICS生成まで必ず到達する）。"""
+    if not cfg.llm.cache or dry_run:
+        return None
+    try:
+        return ExtractCache(
+            db_path, ttl_days=cfg.llm.cache_ttl_days, max_entries=cfg.llm.cache_max_entries,
+        )
+    except Exception as e:
+        msg = f"LLM cache unavailable, extracting without it: {e}"
+        logger.warning(msg)
+        errors.append(msg)
+        return None
+
+
+def _wait_stragglers(stragglers: Dict[str, Future], grace_sec: float, errors: List[str]) -> List[str]:
+    """締切超過で走り続けるcollectorを、共有HttpClient/HttpCacheを閉じる前に最大grace_sec待つ。
+
+    待っても終わらないものの名前を返す。そのスレッドは閉じたキャッシュにはミス扱いで触れるだけだが、
+    インタプリタ終了時にjoinされるのでプロセスの終了（DBのアップロード）はその分遅れる。
+    collectorの締切はプロセス全体の実行時間の上限ではない。
+    """
+    if not stragglers:
+        return []
+    wait(list(stragglers.values()), timeout=max(0.0, grace_sec))
+    still = sorted(name for name, fut in stragglers.items() if not fut.done())
+    for name in still:
+        msg = (
+            f"{name} still running {grace_sec:.0f}s after its deadline; "
+            "process exit waits for it (collector deadlines do not bound total wall time)"
+        )
+        logger.warning(msg)
+        errors.append(msg)
+    return still
+
+
+def _close_cache(label: str, cache, errors: List[str]) -> Dict[str, Any]:
+    """キャッシュの統計を取って閉じる。失敗してもrunは止めない（統計は空）。"""
+    if cache is None:
+        return {}
+    try:
+        stats = cache.stats()
+        cache.close()
+        return stats
+    except Exception as e:
+        msg = f"{label} close failed (non-fatal): {e}"
+        logger.warning(msg)
+        errors.append(msg)
+        return {}
+
+
+def _scheduled_tasks(cfg: AppConfig, now: datetime, client: HttpClient) -> List[CollectorTask]:
+    """Scheduled sources: TE API + FMP API + 公式カレンダー + Federal Register。
+    各タスクはスケジューラ側で独立try/exceptされる。"""
+    tasks: List[CollectorTask] = []
 
     start_str = now.strftime("%Y-%m-%d")
     end_str = (now + timedelta(days=180)).strftime("%Y-%m-%d")
@@ -114,115 +248,282 @@ def _collect_scheduled(cfg: AppConfig, now: datetime) -> Tuple[List[Event], List
     # Trading Economics (macro)
     te_key = os.environ.get("TE_API_KEY", "")
     if te_key:
-        try:
-            te_events = fetch_tradingeconomics_events(
+        tasks.append(_task(cfg, "te", "TE collector", lambda: (
+            fetch_tradingeconomics_events(
                 te_key, start_str, end_str,
                 country=cfg.te_country,
                 importance=cfg.te_importance,
-            )
-            events.extend(te_events)
-            logger.info("TE: collected %d events", len(te_events))
-        except Exception as e:
-            msg = f"TE collector failed: {e}"
-            logger.warning(msg)
-            errors.append(msg)
+                client=client,
+            ),
+            [],
+        )))
     else:
         logger.info("TE_API_KEY not set, skipping TradingEconomics")
 
     # FMP (bellwether earnings)
     fmp_key = os.environ.get("FMP_API_KEY", "")
     if fmp_key:
-        try:
-            fmp_events = fetch_fmp_earnings_events(
+        tasks.append(_task(cfg, "fmp", "FMP collector", lambda: (
+            fetch_fmp_earnings_events(
                 fmp_key, start_str, end_str,
                 tickers=cfg.bellwether_tickers,
-            )
-            events.extend(fmp_events)
-            logger.info("FMP: collected %d events", len(fmp_events))
-        except Exception as e:
-            msg = f"FMP collector failed: {e}"
-            logger.warning(msg)
-            errors.append(msg)
+                client=client,
+            ),
+            [],
+        )))
     else:
         logger.info("FMP_API_KEY not set, skipping FMP earnings")
 
     # Official government calendars (BLS/BEA/FOMC — free, authoritative)
     start_dt = now
     end_dt = now + timedelta(days=180)
-    try:
-        official_events, official_errs = fetch_official_macro_events(cfg, start_dt, end_dt)
-        events.extend(official_events)
-        errors.extend(official_errs)
-        logger.info("Official macro: collected %d events", len(official_events))
-    except Exception as e:
-        msg = f"Official macro collector failed: {e}"
-        logger.warning(msg)
-        errors.append(msg)
+    tasks.append(_task(
+        cfg, "official_macro", "Official macro collector",
+        lambda: fetch_official_macro_events(cfg, start_dt, end_dt, client=client),
+    ))
 
     # Federal Register BIS (export controls — structured API, no LLM needed)
+    tasks.append(_task(
+        cfg, "federal_register", "Federal Register BIS collector",
+        lambda: fetch_federal_register_bis_events(start_str, end_str, client=client),
+    ))
+
+    return tasks
+
+
+# OPEXを何か月先まで出すか
+_OPEX_MONTHS = 6
+
+
+def _session_calendar(conn, now: datetime) -> Optional[SessionCalendar]:
+    """OPEX用のXNYS営業日カレンダー（events.dbのキャッシュ、窓切れ時のみ再構築）。
+
+    DBに触るのでメインスレッドで取得してからcollectorに渡す。
+    """
+    today = now.date()
     try:
-        fr_events, fr_errs = fetch_federal_register_bis_events(start_str, end_str)
-        events.extend(fr_events)
-        errors.extend(fr_errs)
-        logger.info("Federal Register BIS: collected %d events", len(fr_events))
+        return get_session_calendar(
+            conn, "XNYS", today=today,
+            need_until=today + timedelta(days=31 * (_OPEX_MONTHS + 1)),
+        )
     except Exception as e:
-        msg = f"Federal Register BIS collector failed: {e}"
-        logger.warning(msg)
-        errors.append(msg)
-
-    return events, errors
+        logger.warning("XNYS calendar cache unavailable: %s", e)
+        return None
 
 
-def _collect_computed(now: datetime) -> Tuple[List[Event], List[str]]:
+def _computed_tasks(
+    cfg: AppConfig, now: datetime, calendar: Optional[SessionCalendar] = None,
+) -> List[CollectorTask]:
     """Computed sources: OPEX計算"""
-    events: List[Event] = []
+    y, m = now.year, now.month
+    return [_task(
+        cfg, "opex", "OPEX generation",
+        lambda: (generate_opex_events(y, m, months=_OPEX_MONTHS, calendar=calendar), []),
+    )]
+
+
+def _rss_tasks(cfg: AppConfig, client: HttpClient) -> List[CollectorTask]:
+    """RSS取得（disabled対応）。1フィード=1タスク。itemsはArticle。"""
+    tasks: List[CollectorTask] = []
+    for src in cfg.sources.rss:
+        if src.disabled:
+            logger.info("RSS %s: SKIPPED (disabled)", src.name)
+            continue
+        tasks.append(_task(
+            cfg, f"rss:{src.name}", f"RSS {src.name}",
+            lambda url=src.url, name=src.name: (
+                fetch_rss(url, client=client, cache_source=f"rss:{name}"), [],
+            ),
+        ))
+    return tasks
+
+
+def _gather(results: List[CollectorResult]) -> Tuple[list, List[str]]:
+    items: list = []
     errors: List[str] = []
+    for r in results:
+        items.extend(r.items)
+        errors.extend(r.errors)
+    return items, errors
+
+
+def _seen_lookup(cfg: AppConfig, conn, urls: List[str]) -> set:
+    """urlsのうち過去runで処理済みのもの。
+
+    db.seen_bloom=true ならarticlesテーブルから作ったBloomフィルタだけで判定し、
+    ディスクに触らない（偽陽性率 db.seen_bloom_error_rate で新着を既出扱いしうる）。
+    """
+    if cfg.db.seen_bloom:
+        bloom = build_seen_bloom(conn, error_rate=cfg.db.seen_bloom_error_rate)
+        return {u for u in urls if u in bloom}
+    return seen_urls(conn, urls)
+
+
+def _load_stage_b_model(cfg: AppConfig, conn, now: datetime, articles: List[Article], dry_run: bool):
+    """累積IDFモデルを読み込み、今runの新着記事でDFを更新。
+
+    persistentモードか、refitモードでも compare_stage_b のときに読み込む（後者は比較ログ専用）。
+    dry-runでは記事がseen登録されないので、DFもDBに書き戻さない（次runで二重計上しない）。
+    """
+    pf = cfg.prefilter
+    if pf.stage_b_model != "persistent" and not pf.compare_stage_b:
+        return None
+    model = load_stage_b_model(conn)
+    if model is None:
+        return None
+    added = model.update((a.url, f"{a.title}\n{a.body}") for a in articles)
+    if not dry_run:
+        model.save(conn)
+        if pf.stage_b_doc_ttl_days > 0:
+            pruned = model.prune_docs(conn, now - timedelta(days=pf.stage_b_doc_ttl_days))
+            if pruned:
+                logger.info("Stage B model: pruned %d doc keys unseen for %.0f days", pruned, pf.stage_b_doc_ttl_days)
+    logger.info("Stage B model: +%d docs (n_docs=%d)", added, model.n_docs)
+    return model
+
+
+def _collapse_near_duplicates(
+    cfg: AppConfig, conn, now: datetime, articles: List[Article], dry_run: bool,
+    report: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Article], Dict[str, List[Article]], Dict[str, int]]:
+    """近似重複（別URLの同じ配信記事）を代表1本に束ねる。prefilter Stage B / Claude抽出の前に呼ぶ。
+
+    Returns:
+        (代表記事, 代表URL → 同じクラスタの他の記事, URL → SimHash)
+    クラスタの他の記事は代表の抽出が成功したときに一緒に既出マークする。
+    過去runの処理済み記事の近似重複はここで既出マークする（dry-runでは書かない）。
+    """
+    nd = cfg.near_dup
+    fps = [article_simhash(a.title, a.body) for a in articles]
+    seen_index: Optional[NearDupIndex[str]] = None
+    if nd.lookback_days > 0:
+        seen_index = NearDupIndex(nd.max_distance)
+        for url, fp in load_article_simhashes(conn, since=now - timedelta(days=nd.lookback_days)):
+            seen_index.add(url, fp)
+
+    result = collapse(
+        fps, [len(a.title) + len(a.body) for a in articles],
+        seen=seen_index, max_distance=nd.max_distance,
+    )
+    stats = result.report()
+    logger.info(
+        "Near-dup: %d → %d articles (clusters=%d, collapsed=%d, seen duplicates=%d, sizes=%s)",
+        len(articles), len(result.representatives), stats["clusters"], stats["collapsed"],
+        stats["seen_duplicates"], stats["cluster_sizes"],
+    )
+    if report is not None:
+        report.update(stats)
+
+    if result.seen_duplicates and not dry_run:
+        dups = [articles[i] for i in result.seen_duplicates]
+        mark_articles_seen(conn, [(a.url, _content_hash(a.title, a.body), 0.0) for a in dups])
+        record_article_simhashes(conn, [(articles[i].url, fps[i]) for i in result.seen_duplicates])
+
+    reps = [articles[i] for i in result.representatives]
+    members = {
+        articles[r].url: [articles[m] for m in ms]
+        for r, ms in result.members.items() if ms
+    }
+    fingerprints = {a.url: fp for a, fp in zip(articles, fps) if fp is not None}
+    return reps, members, fingerprints
+
+
+def _article_input(sa: ScoredArticle) -> ArticleInput:
+    return ArticleInput(
+        title=sa.article.title,
+        published=sa.article.published,
+        url=sa.article.url,
+        content=sa.article.body,
+    )
+
+
+def _resolve_futures(futures: List[Future], outcomes) -> None:
+    for fut, outcome in zip(futures, outcomes):
+        if isinstance(outcome, Exception):
+            fut.set_exception(outcome)
+        else:
+            fut.set_result(outcome)
+
+
+def _packed_futures(
+    executor: ThreadPoolExecutor, cfg: AppConfig, claude_cfg: ClaudeConfig,
+    filtered: List[ScoredArticle], client: Optional[HttpClient],
+    limiter: RateLimiter, breaker: CircuitBreaker, llm_cache: Optional[ExtractCache],
+    usage: Optional[TokenUsage] = None,
+) -> Tuple[List[Future], int]:
+    """パッキング: 短い記事をトークン予算内でまとめ、パック単位でワーカーに投げる。
+
+    記事ごとのFutureを返す（パック完了時にまとめて解決）ので、後処理は並列版と同じ。
+    """
+    inputs = [_article_input(sa) for sa in filtered]
+    futures: List[Future] = [Future() for _ in filtered]
+    packs = pack_articles(inputs, cfg.llm.pack_token_budget, cfg.llm.pack_max_articles)
+
+    def _done(pack: List[int], pack_fut: Future) -> None:
+        targets = [futures[i] for i in pack]
+        try:
+            outcomes = pack_fut.result()
+        except Exception as e:
+            outcomes = [e] * len(pack)
+        _resolve_futures(targets, outcomes)
+
+    for pack in packs:
+        pack_fut = executor.submit(
+            extract_events_packed, claude_cfg, [inputs[i] for i in pack],
+            client=client, limiter=limiter, breaker=breaker, cache=llm_cache, usage=usage,
+        )
+        pack_fut.add_done_callback(partial(_done, pack))
+    return futures, len(packs)
 
+
+def _batch_futures(
+    cfg: AppConfig, claude_cfg: ClaudeConfig, filtered: List[ScoredArticle],
+    client: Optional[HttpClient], llm_cache: Optional[ExtractCache],
+    usage: Optional[TokenUsage] = None,
+) -> List[Future]:
+    """バッチバックエンド: 全記事を1ジョブで投げ、記事ごとの結果をFutureに詰める。
+
+    並列版と同じ後処理ループに流すため。ジョブ自体の失敗は全記事の失敗として扱う
+    （どの記事もseenにならず翌日再試行）。
+    """
+    futures: List[Future] = [Future() for _ in filtered]
     try:
-        y, m = now.year, now.month
-        opex = generate_opex_events(y, m, months=6)
-        events.extend(opex)
-        logger.info("OPEX: generated %d events", len(opex))
+        outcomes = extract_events_batch(
+            claude_cfg,
+            [_article_input(sa) for sa in filtered],
+            client=client,
+            cache=llm_cache,
+            poll_interval_sec=cfg.llm.batch_poll_sec,
+            timeout_sec=cfg.llm.batch_timeout_sec,
+            usage=usage,
+        )
     except Exception as e:
-        msg = f"OPEX generation failed: {e}"
-        logger.warning(msg)
-        errors.append(msg)
-
-    return events, errors
+        outcomes = [e] * len(filtered)
+    _resolve_futures(futures, outcomes)
+    return futures
 
 
 def _collect_unscheduled(
-    cfg: AppConfig, conn, now: datetime, dry_run: bool
+    cfg: AppConfig, conn, now: datetime, dry_run: bool, articles: List[Article],
+    client: Optional[HttpClient] = None, llm_cache: Optional[ExtractCache] = None,
+    usage: Optional[TokenUsage] = None, near_dup_report: Optional[Dict[str, Any]] = None,
 ) -> Tuple[List[Event], List[str]]:
-    """Unscheduled: RSS → 既出フィルタ → prefilter → Claude抽出。
+    """Unscheduled: RSS記事（Phase 1で取得済み）→ 既出フィルタ → prefilter → Claude抽出。
 
     各段独立try/except。観測ログを厚めに出力。
+    DBに触るのでメインスレッドで実行すること。
     """
     events: List[Event] = []
     errors: List[str] = []
 
-    # 1) RSS取得（disabled対応）
-    articles: List[Article] = []
-    for src in cfg.sources.rss:
-        if src.disabled:
-            logger.info("RSS %s: SKIPPED (disabled)", src.name)
-            continue
-        try:
-            fetched = fetch_rss(src.url)
-            articles.extend(fetched)
-            logger.info("RSS %s: %d articles fetched", src.name, len(fetched))
-        except Exception as e:
-            msg = f"RSS {src.name} failed: {e}"
-            logger.warning(msg)
-            errors.append(msg)
-
     if not articles:
         logger.info("No RSS articles fetched, skipping prefilter/extract")
         return events, errors
 
     # 2) 既出記事フィルタ + 同一run内URL dedup
-    #    - DBチェック: 過去runで処理済みの記事をスキップ
+    #    - DBチェック: 過去runで処理済みの記事をスキップ（全URLを1回のバッチ照会）
     #    - in-memory dedup: 複数RSSソースに同じURLが混ざった場合の二重課金を防止
+    already_seen = _seen_lookup(cfg, conn, [a.url for a in articles])
     new_articles: List[Article] = []
     skipped_db_seen = 0
     skipped_dup_in_run = 0
@@ -232,7 +533,7 @@ def _collect_unscheduled(
             skipped_dup_in_run += 1
             logger.debug("Duplicate URL in run skipped: '%s'", a.title[:80])
             continue
-        if is_article_seen(conn, a.url):
+        if a.url in already_seen:
             skipped_db_seen += 1
             seen_in_run.add(a.url)
             logger.debug("Seen article skipped: '%s'", a.title[:80])
@@ -245,17 +546,35 @@ def _collect_unscheduled(
         len(new_articles), len(articles), skipped_db_seen, skipped_dup_in_run,
     )
 
+    # 2b) 近似重複の集約（同じ配信記事の別URL転載 → 代表1本）
+    members_of: Dict[str, List[Article]] = {}
+    fingerprints: Dict[str, int] = {}
+    if cfg.near_dup.enabled and new_articles:
+        try:
+            new_articles, members_of, fingerprints = _collapse_near_duplicates(
+                cfg, conn, now, new_articles, dry_run, report=near_dup_report,
+            )
+        except Exception as e:
+            msg = f"Near-duplicate clustering failed, continuing without it: {e}"
+            logger.warning(msg)
+            errors.append(msg)
+
     if not new_articles:
         logger.info("All articles already processed, skipping prefilter/extract")
         return events, errors
 
     # 3) Prefilter
     try:
+        stage_b_model = _load_stage_b_model(cfg, conn, now, new_articles, dry_run)
         filtered = prefilter(
             new_articles,
             keywords=cfg.keywords,
             stage_a_threshold=cfg.prefilter.stage_a_threshold,
             stage_b_top_k=cfg.prefilter.stage_b_top_k,
+            matcher=cfg.keyword_matcher(),
+            stage_b_model=stage_b_model,
+            compare_stage_b=cfg.prefilter.compare_stage_b,
+            shadow_stage_b=cfg.prefilter.stage_b_model != "persistent",
         )
         logger.info("Prefilter: %d → %d articles", len(new_articles), len(filtered))
     except Exception as e:
@@ -281,7 +600,9 @@ def _collect_unscheduled(
         return events, errors
 
     max_articles = cfg.llm.max_articles_per_run
-    claude_cfg = ClaudeConfig(api_key=api_key, model=cfg.llm.model)
+    claude_cfg = ClaudeConfig(
+        api_key=api_key, model=cfg.llm.model, prompt_cache=cfg.llm.prompt_cache,
+    )
 
     if len(filtered) > max_articles:
         logger.warning(
@@ -290,69 +611,145 @@ def _collect_unscheduled(
         )
         filtered = filtered[:max_articles]
 
+    # 記事ごとの抽出はワーカーで並列実行し、結果は投入順（=prefilterスコア順）に処理する。
+    # レート制限とサーキットブレーカは全ワーカーで共有。DB書き込みはメインスレッドのみ。
+    limiter = RateLimiter(cfg.llm.requests_per_min, cfg.llm.input_tokens_per_min)
+    breaker = CircuitBreaker()
+
+    def _extract(article: ScoredArticle) -> List[Event]:
+        return extract_events_from_article(
+            cfg=claude_cfg,
+            article_title=article.article.title,
+            article_published=article.article.published,
+            article_url=article.article.url,
+            article_content=article.article.body,
+            client=client,
+            limiter=limiter,
+            breaker=breaker,
+            cache=llm_cache,
+            usage=usage,
+        )
+
     llm_calls = 0
     llm_events_total = 0
-    for article in filtered:
-        extract_succeeded = False
-        try:
-            extracted = extract_events_from_article(
-                cfg=claude_cfg,
-                article_title=article.article.title,
-                article_published=article.article.published,
-                article_url=article.article.url,
-                article_content=article.article.body,
-            )
-            llm_calls += 1
-
-            # RSS→Claude抽出パイプラインは設計上すべてshockカテゴリ
-            override_shock_category(extracted)
-            # 四半期/月/半期レンジ → ポイントイベント正規化（防火扉）
-            normalize_date_range(extracted)
+    to_mark: List[Tuple[str, str, float]] = []
+    t0 = time.monotonic()
+    executor: Optional[ThreadPoolExecutor] = None
+    if cfg.llm.backend == "batch":
+        backend = "batch"
+        futures = _batch_futures(cfg, claude_cfg, filtered, client, llm_cache, usage)
+    elif cfg.llm.pack:
+        workers = max(1, int(cfg.llm.workers))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm")
+        futures, n_packs = _packed_futures(
+            executor, cfg, claude_cfg, filtered, client, limiter, breaker, llm_cache, usage,
+        )
+        backend = f"{workers} workers, {n_packs} packs"
+    else:
+        workers = max(1, min(int(cfg.llm.workers), len(filtered)))
+        backend = f"{workers} workers"
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm")
+        futures = [executor.submit(_extract, article) for article in filtered]
+    try:
+        for article, fut in zip(filtered, futures):
+            extract_succeeded = False
+            try:
+                extracted = fut.result()
+                llm_calls += 1
 
-            llm_events_total += len(extracted)
-            events.extend(extracted)
-            extract_succeeded = True
+                # RSS→Claude抽出パイプラインは設計上すべてshockカテゴリ
+                override_shock_category(extracted)
+                # 四半期/月/半期レンジ → ポイントイベント正規化（防火扉）
+                normalize_date_range(extracted)
 
-            logger.info(
-                "Claude extract: %d events from '%s'",
-                len(extracted), article.article.title[:60],
-            )
-        except ClaudeExtractError as e:
-            msg = f"Claude extract failed for '{article.article.title[:50]}': {e}"
-            logger.warning(msg)
-            errors.append(msg)
-        except Exception as e:
-            msg = f"Unexpected error extracting '{article.article.title[:50]}': {e}"
-            logger.warning(msg)
-            errors.append(msg)
+                llm_events_total += len(extracted)
+                events.extend(extracted)
+                extract_succeeded = True
 
-        # Claude APIが正常応答した場合のみ既出マーク。
-        # API例外（429/529リトライ尽き、timeout等）は翌日自動再試行される。
-        if extract_succeeded:
-            try:
-                mark_article_seen(
-                    conn,
-                    url=article.article.url,
-                    content_hash=_content_hash(article.article.title, article.article.body),
-                    relevance_score=article.relevance_score,
+                logger.info(
+                    "Claude extract: %d events from '%s'",
+                    len(extracted), article.article.title[:60],
                 )
+            except ClaudeExtractError as e:
+                msg = f"Claude extract failed for '{article.article.title[:50]}': {e}"
+                logger.warning(msg)
+                errors.append(msg)
             except Exception as e:
-                logger.warning("Failed to mark article as seen: %s", e)
+                msg = f"Unexpected error extracting '{article.article.title[:50]}': {e}"
+                logger.warning(msg)
+                errors.append(msg)
+
+            # Claude APIが正常応答した場合のみ既出マーク（近似重複クラスタの他の記事も一緒に）。
+            # API例外（429/529リトライ尽き、timeout等）は翌日自動再試行される。
+            if extract_succeeded:
+                for a in [article.article] + members_of.get(article.article.url, []):
+                    to_mark.append((a.url, _content_hash(a.title, a.body), article.relevance_score))
+
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    # 既出マークはループ後に1トランザクションでまとめて書く
+    try:
+        mark_articles_seen(conn, to_mark)
+        if fingerprints:
+            record_article_simhashes(
+                conn, [(url, fingerprints[url]) for url, _, _ in to_mark if url in fingerprints],
+            )
+    except Exception as e:
+        logger.warning("Failed to mark %d articles as seen: %s", len(to_mark), e)
 
     logger.info(
-        "Claude summary: %d API calls, %d events extracted from %d articles",
+        "Claude summary: %d API calls, %d events extracted from %d articles "
+        "(%s, %.2fs, breaker trips=%d)",
         llm_calls, llm_events_total, len(filtered),
+        backend, time.monotonic() - t0, breaker.trips,
     )
+    if usage is not None:
+        logger.info("Claude token usage: %s", usage.summary())
     return events, errors
 
 
 def _upsert_pipeline(
-    conn, events: List[Event], cfg: AppConfig, now: datetime
+    conn, events: List[Event], cfg: AppConfig, now: datetime,
+    changed: Optional[Set[str]] = None,
+    unchanged: Optional[Dict[str, int]] = None,
 ) -> dict:
-    """canonical_key生成 → 検証 → upsert。結果のサマリを返す。"""
-    stats = {"inserted": 0, "updated": 0, "merged": 0, "cancelled": 0, "ignored": 0, "rejected": 0}
+    """canonical_key生成 → 検証 → upsert。結果のサマリを返す。
 
+    upsertは検証を通った全イベントをまとめて1トランザクションで書く（db.upsert_events）。
+    changed を渡すと、ICSの出力が変わりうるcanonical_keyを追加する:
+    events の行が変わったkey + mergeで最新source（URL/DESCRIPTIONの元）が変わったkey。
+
+    cfg.db.skip_unchanged なら、(source_name, source_id) の指紋（canonical.event_fingerprint）が
+    前回upsertしたときと同じイベントはkey生成・検証・upsertを省いて stats["unchanged"] に数える
+    （upsertしても "merged" になるだけのもの）。unchanged を渡すとsource_nameごとの件数を足す。
+    指紋はupsertが成功した後にだけ記録する（rejectedは記録しない＝次回また検証する）。
+    """
+    stats = {
+        "inserted": 0, "updated": 0, "merged": 0, "cancelled": 0, "ignored": 0, "rejected": 0,
+        "unchanged": 0,
+    }
+
+    skip = cfg.db.skip_unchanged
+    known: Dict[Tuple[str, str], str] = {}
+    salt = ""
+    if skip:
+        known = load_event_fingerprints(conn, [(ev.source_name, ev.source_id) for ev in events])
+        salt = canonical_config_signature(cfg)
+    pending: Dict[Tuple[str, str], str] = {}
+
+    valid: List[Event] = []
     for ev in events:
+        if skip:
+            src = (ev.source_name, ev.source_id)
+            fp = event_fingerprint(ev, salt)
+            if known.get(src) == fp:
+                stats["unchanged"] += 1
+                if unchanged is not None:
+                    unchanged[ev.source_name] = unchanged.get(ev.source_name, 0) + 1
+                continue
+
         # canonical_key が未設定なら生成
         if not ev.canonical_key:
             ev.canonical_key = make_canonical_key(ev, cfg)
@@ -368,43 +765,138 @@ def _upsert_pipeline(
             stats["rejected"] += 1
             continue
 
-        # upsert
-        result = upsert_event(conn, ev)
-        stats[result] = stats.get(result, 0) + 1
-        logger.debug("Upsert: %s %s %s", result, ev.canonical_key, ev.title)
+        valid.append(ev)
+        if skip:
+            pending[src] = fp
+
+    # upsert
+    keys = [ev.canonical_key for ev in valid]
+    before = latest_sources(conn, keys) if changed is not None else {}
+    for result, n in upsert_events(conn, valid, changed=changed).items():
+        stats[result] = stats.get(result, 0) + n
+    if changed is not None:
+        after = latest_sources(conn, keys)
+        changed.update(k for k in after if before.get(k) != after[k])
+    logger.debug("Upsert: %d events in one transaction", len(valid))
+
+    record_event_fingerprints(conn, [(name, sid, fp) for (name, sid), fp in pending.items()])
 
     return stats
 
 
-def _generate_ics_files(conn, ics_dir: str, now: datetime) -> None:
-    """全体ICS + カテゴリ別ICSを生成。ここは絶対に例外で止めない。"""
+def _keys_digest(keys: List[str]) -> str:
+    return hashlib.sha256("\n".join(keys).encode("utf-8")).hexdigest()
+
+
+def _file_hash(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def _generate_ics_files(
+    conn, ics_dir: str, now: datetime, changed: Optional[Set[str]] = None,
+) -> Dict[str, int]:
+    """全体ICS + カテゴリ別ICSを生成。ここは絶対に例外で止めない。
+
+    changed（このrunでICSの出力が変わりうるcanonical_key）を渡すと変更駆動になる:
+    - 窓内のkey一覧（軽いSELECT）のダイジェストが前回と同じで、changedと重ならず、
+      ディスク上のファイルが前回書いた内容のままなら、そのファイルは描画もしない
+    - 描画が必要なファイルは ics.write_calendars で1パスに書く（VEVENTの整形は1件1回）
+    - 内容ハッシュが同じなら書き換えない（購読側の再ダウンロードを避ける）
+    - DTSTAMPは各イベントのupdated_at（同じDB状態なら同じバイト列になる）
+    - 書き込みは一時ファイル + rename
+    changed=None なら全ファイルを描画する（内容が同じなら書き換えないのは同じ）。
+
+    Returns: {"written": n, "unchanged": n, "skipped": n, "failed": n}
+    """
+    report = {"written": 0, "unchanged": 0, "skipped": 0, "failed": 0}
     ics_path = Path(ics_dir)
     ics_path.mkdir(parents=True, exist_ok=True)
 
     start = now - timedelta(days=1)
     end = now + timedelta(days=180)
-    all_events = _list_events_from_db(conn, start, end)
 
-    # 全体ICS
+    # ファイル → (カレンダー名, カテゴリ)。Noneは全カテゴリ
+    targets: Dict[str, Tuple[str, Optional[str]]] = {"sector_events_all.ics": ("Sector Event Radar", None)}
+    for category, filename in CATEGORY_ICS_MAP.items():
+        targets[filename] = (f"SER - {category}", category)
+
     try:
-        ics_all = events_to_ics(all_events, cal_name="Sector Event Radar")
-        out_all = ics_path / "sector_events_all.ics"
-        out_all.write_text(ics_all, encoding="utf-8")
-        logger.info("ICS all: %s (%d events)", out_all, len(all_events))
+        rows = conn.execute(
+            """SELECT canonical_key, category, updated_at FROM events
+                WHERE status = 'active' AND start_at >= ? AND start_at <= ?
+                ORDER BY canonical_key""",
+            (start.isoformat(), end.isoformat()),
+        ).fetchall()
+        manifest = load_ics_manifest(conn)
     except Exception as e:
-        logger.error("Failed to write all.ics: %s", e)
-
-    # カテゴリ別ICS
-    for category, filename in CATEGORY_ICS_MAP.items():
+        logger.error("ICS change detection failed, rebuilding all: %s", e)
+        rows, manifest, changed = [], {}, None
+
+    # 描画が必要なファイル: (filename, カレンダー名, カテゴリ, keyダイジェスト, ディスク上のハッシュ)
+    dirty: List[Tuple[str, str, Optional[str], str, Optional[str]]] = []
+    for filename, (cal_name, category) in targets.items():
+        keys = [r["canonical_key"] for r in rows if category is None or r["category"] == category]
+        digest = _keys_digest(keys)
+        prev_hash, prev_digest = manifest.get(filename, (None, None))
+        on_disk = _file_hash(ics_path / filename)
+        if (
+            changed is not None
+            and prev_digest == digest
+            and on_disk is not None and on_disk == prev_hash
+            and changed.isdisjoint(keys)
+        ):
+            report["skipped"] += 1
+        else:
+            dirty.append((filename, cal_name, category, digest, on_disk))
+    if not dirty:
+        logger.info("ICS files: %s", report)
+        return report
+
+    files: List[AtomicFile] = []
+    try:
+        all_events = _list_events_from_db(conn, start, end)
+        stamps = {r["canonical_key"]: datetime.fromisoformat(r["updated_at"]) for r in rows}
+        files = [AtomicFile(ics_path / filename) for filename, *_ in dirty]
+        counts = write_calendars(
+            all_events,
+            [(f, cal_name, category) for f, (_, cal_name, category, _, _) in zip(files, dirty)],
+            dtstamps=stamps,
+        )
+    except Exception as e:
+        for f in files:
+            f.discard()
+        report["failed"] += len(dirty)
+        logger.error("Failed to render ICS files: %s", e)
+        logger.info("ICS files: %s", report)
+        return report
+
+    manifest_rows: List[Tuple[str, str, str]] = []
+    for f, n, (filename, _, category, digest, on_disk) in zip(files, counts, dirty):
         try:
-            cat_events = [e for e in all_events if e.category == category]
-            ics_cat = events_to_ics(cat_events, cal_name=f"SER - {category}")
-            out_cat = ics_path / filename
-            out_cat.write_text(ics_cat, encoding="utf-8")
-            logger.info("ICS %s: %s (%d events)", category, out_cat, len(cat_events))
+            content_hash = f.hexdigest()
+            if content_hash == on_disk:
+                f.discard()
+                report["unchanged"] += 1
+            else:
+                f.commit()
+                report["written"] += 1
+                logger.info("ICS %s: %s (%d events)", category or "all", f.path, n)
+            manifest_rows.append((filename, content_hash, digest))
         except Exception as e:
+            f.discard()
+            report["failed"] += 1
             logger.error("Failed to write %s: %s", filename, e)
 
+    try:
+        save_ics_manifest(conn, manifest_rows)
+    except Exception as e:
+        logger.warning("ICS manifest not saved: %s", e)
+    logger.info("ICS files: %s", report)
+    return report
+
 
 def override_shock_category(events: List[Event]) -> int:
     """Claude抽出イベントのcategoryをshockに強制する。
@@ -568,6 +1060,24 @@ def migrate_quarter_range(conn) -> int:
     return fixed
 
 
+def _run_migration(conn, name: str, fn) -> bool:
+    """1回限りのデータ修正マイグレーション。適用済みなら applied_migrations の1行参照で終わる。
+
+    失敗しても記録しない（翌runで再試行）。例外は握りつぶす（non-fatal）。
+    Returns: このrunで行を書き換えたか（ICSを全部作り直す目印）
+    """
+    try:
+        if migration_applied(conn, name):
+            return False
+        n = fn(conn)
+        record_migration(conn, name, n)
+        logger.info("Migration %s applied (%d rows)", name, n)
+        return n > 0
+    except Exception as e:
+        logger.warning("Migration (%s) failed (non-fatal): %s", name, e)
+        return False
+
+
 def run_daily(config_path: str, db_path: str, ics_dir: str, dry_run: bool = False) -> dict:
     """メインエントリポイント。
 
@@ -575,48 +1085,81 @@ def run_daily(config_path: str, db_path: str, ics_dir: str, dry_run: bool = Fals
         dict: 実行サマリ（collector結果、upsert統計、エラー一覧）
     """
     cfg = AppConfig.load(config_path)
-    conn = connect(db_path)
+    t0 = time.monotonic()
+    conn = connect(db_path, pragmas={**DEFAULT_PRAGMAS, **cfg.db.pragmas})
     init_db(conn)
+    db_open_sec = time.monotonic() - t0
 
     # マイグレーション（設計契約: 失敗してもICS生成まで必ず到達する）
-    try:
-        migrate_shock_category(conn)
-    except Exception as e:
-        logger.warning("Migration (shock category) failed (non-fatal): %s", e)
-
-    try:
-        migrate_quarter_range(conn)
-    except Exception as e:
-        logger.warning("Migration (quarter range) failed (non-fatal): %s", e)
+    # 適用済みのものは applied_migrations を見てスキップ（全件スキャンしない）
+    t0 = time.monotonic()
+    migrated = _run_migration(conn, "shock_category", migrate_shock_category)
+    migrated |= _run_migration(conn, "quarter_range", migrate_quarter_range)
+    db_migrate_sec = time.monotonic() - t0
 
     now = datetime.now(timezone.utc)
     all_errors: List[str] = []
     all_events: List[Event] = []
 
-    # ── Phase 1: 収集（各collector独立、部分失敗OK）──
-    scheduled, errs = _collect_scheduled(cfg, now)
+    # ── Phase 1: 収集（各collector独立・並列、部分失敗OK）──
+    client = _make_http_client(cfg, db_path, all_errors)
+    scheduled_tasks = _scheduled_tasks(cfg, now, client)
+    computed_tasks = _computed_tasks(cfg, now, _session_calendar(conn, now))
+    rss_tasks = _rss_tasks(cfg, client)
+
+    t0 = time.monotonic()
+    stragglers: Dict[str, Future] = {}
+    results = run_collectors(
+        scheduled_tasks + computed_tasks + rss_tasks,
+        max_workers=cfg.collectors.max_workers,
+        stragglers=stragglers,
+    )
+    collect_sec = time.monotonic() - t0
+
+    n_sched, n_comp = len(scheduled_tasks), len(computed_tasks)
+    scheduled, errs = _gather(results[:n_sched])
     all_events.extend(scheduled)
     all_errors.extend(errs)
 
-    computed, errs = _collect_computed(now)
+    computed, errs = _gather(results[n_sched:n_sched + n_comp])
     all_events.extend(computed)
     all_errors.extend(errs)
 
-    unscheduled, errs = _collect_unscheduled(cfg, conn, now, dry_run)
+    articles, errs = _gather(results[n_sched + n_comp:])
+    all_errors.extend(errs)
+
+    llm_cache = _open_llm_cache(cfg, db_path, dry_run, all_errors)
+    llm_usage = TokenUsage()
+    near_dup_report: Dict[str, Any] = {}
+    unscheduled, errs = _collect_unscheduled(
+        cfg, conn, now, dry_run, articles, client=client, llm_cache=llm_cache, usage=llm_usage,
+        near_dup_report=near_dup_report,
+    )
     all_events.extend(unscheduled)
     all_errors.extend(errs)
+    still_running = _wait_stragglers(stragglers, cfg.collectors.straggler_grace_sec, all_errors)
+    client.close()
+    http_cache_stats = _close_cache("HTTP cache", client.cache, all_errors)
+    llm_cache_stats = _close_cache("LLM cache", llm_cache, all_errors)
 
     logger.info(
-        "Collection complete: scheduled=%d, computed=%d, unscheduled=%d, errors=%d",
-        len(scheduled), len(computed), len(unscheduled), len(all_errors),
+        "Collection complete: scheduled=%d, computed=%d, unscheduled=%d, errors=%d (fetch %.2fs)",
+        len(scheduled), len(computed), len(unscheduled), len(all_errors), collect_sec,
     )
 
     # ── Phase 2: upsert pipeline ──
-    stats = _upsert_pipeline(conn, all_events, cfg, now)
-    logger.info("Upsert stats: %s", stats)
+    t0 = time.monotonic()
+    changed: Set[str] = set()
+    unchanged: Dict[str, int] = {}
+    stats = _upsert_pipeline(conn, all_events, cfg, now, changed=changed, unchanged=unchanged)
+    upsert_sec = time.monotonic() - t0
+    logger.info("Upsert stats: %s (%.2fs), %d keys changed", stats, upsert_sec, len(changed))
 
     # ── Phase 3: ICS生成（絶対に実行）──
-    _generate_ics_files(conn, ics_dir, now)
+    # マイグレーションで行を書き換えたrunは変更集合に載らないので全部描画する
+    t0 = time.monotonic()
+    ics_report = _generate_ics_files(conn, ics_dir, now, changed=None if migrated else changed)
+    ics_sec = time.monotonic() - t0
 
     # ── サマリ ──
     summary = {
@@ -627,10 +1170,28 @@ def run_daily(config_path: str, db_path: str, ics_dir: str, dry_run: bool = Fals
             "computed": len(computed),
             "unscheduled": len(unscheduled),
         },
+        "collectors": {r.name: r.summary() for r in results},
+        "stragglers": still_running,
+        "timings": {
+            "db_open_sec": round(db_open_sec, 3),
+            "db_migrate_sec": round(db_migrate_sec, 3),
+            "collect_sec": round(collect_sec, 3),
+            "upsert_sec": round(upsert_sec, 3),
+            "ics_sec": round(ics_sec, 3),
+        },
+        "http_cache": http_cache_stats,
+        "llm_cache": llm_cache_stats,
+        "near_dup": near_dup_report,
+        "llm_usage": llm_usage.summary(),
         "upsert": stats,
+        "unchanged": unchanged,
+        "ics": ics_report,
         "errors": all_errors,
     }
 
+    # WALをチェックポイントして .sqlite 1ファイルに戻す（Releaseに上げるのはこれだけ）
+    conn.close()
+
     # GitHub Actions向けにサマリをstdoutに出力
     print(json.dumps(summary, indent=2, ensure_ascii=False))
 
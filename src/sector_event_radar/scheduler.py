@@ -0,0 +1,135 @@
+"""Collector scheduler — 独立collectorをbounded thread poolで並列実行する。
+
+設計契約（run_dailyと同じ）:
+- 各collectorは独立try/except（1つが落ちても他は継続）
+- 戻り値は (items, errors) タプル
+- collectorごとに締切(deadline)を持つ。締切超過は errors に記録して結果を捨てる
+
+注意:
+- Pythonのスレッドは外から止められない。締切超過したcollectorはバックグラウンドで
+  走り続けるが、結果は採用しない（各collectorのHTTP timeoutで最終的に終わる）。
+  インタプリタ終了時はプールのスレッドをjoinするので、締切は「結果を待つ時間」の上限で
+  あってプロセス全体の実行時間の上限ではない。stragglers を渡すとそのFutureを返すので、
+  呼び出し側は共有リソース（HttpClient/HttpCache）を閉じる前に待てる。
+- sqlite3.Connection はスレッド間共有できないので、DBに触る処理はタスクに入れないこと。
+"""
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CollectorFn = Callable[[], Tuple[List[Any], List[str]]]
+
+# 締切チェックのポーリング間隔（秒）
+_POLL_SEC = 0.1
+
+
+@dataclass(frozen=True)
+class CollectorTask:
+    """スケジューラに投入する1collector。
+
+    name: サマリのキー（例: "te", "rss:EE Times"）
+    fn: 引数なしで (items, errors) を返す callable。例外を投げてもよい
+    label: エラーメッセージの接頭辞（例: "TE collector" → "TE collector failed: ..."）
+    deadline_sec: 実行開始からの締切。None なら無制限
+    """
+    name: str
+    fn: CollectorFn
+    label: str = ""
+    deadline_sec: Optional[float] = None
+
+
+@dataclass
+class CollectorResult:
+    name: str
+    status: str = "ok"  # ok | failed | timeout
+    items: List[Any] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    wall_sec: float = 0.0
+
+    def summary(self) -> dict:
+        return {
+            "status": self.status,
+            "items": len(self.items),
+            "errors": len(self.errors),
+            "wall_sec": round(self.wall_sec, 3),
+        }
+
+
+def run_collectors(
+    tasks: List[CollectorTask],
+    max_workers: int = 4,
+    stragglers: Optional[Dict[str, Future]] = None,
+) -> List[CollectorResult]:
+    """tasksを並列実行し、投入順にCollectorResultを返す。ここは例外を投げない。
+
+    stragglers を渡すと、締切超過でまだ走っているタスクの name → Future を追加する。
+    """
+    if not tasks:
+        return []
+
+    results: Dict[int, CollectorResult] = {}
+    started: Dict[int, float] = {}
+
+    def _run(i: int, task: CollectorTask) -> Tuple[List[Any], List[str]]:
+        started[i] = time.monotonic()
+        return task.fn()
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, int(max_workers)), thread_name_prefix="collector",
+    )
+    try:
+        futures: Dict[Future, int] = {
+            executor.submit(_run, i, t): i for i, t in enumerate(tasks)
+        }
+        pending = set(futures)
+
+        while pending:
+            done, pending = wait(pending, timeout=_POLL_SEC, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+
+            for fut in done:
+                i = futures[fut]
+                results[i] = _collect_result(tasks[i], fut, now - started.get(i, now))
+
+            # 締切超過チェック（開始済みタスクのみ。キュー待ちは締切に含めない）
+            for fut in list(pending):
+                i = futures[fut]
+                task = tasks[i]
+                if task.deadline_sec is None or i not in started:
+                    continue
+                elapsed = now - started[i]
+                if elapsed <= task.deadline_sec:
+                    continue
+                pending.discard(fut)
+                if not fut.cancel() and stragglers is not None:
+                    stragglers[task.name] = fut
+                msg = f"{task.label or task.name} timed out after {task.deadline_sec:.0f}s"
+                logger.warning(msg)
+                results[i] = CollectorResult(
+                    name=task.name, status="timeout", errors=[msg], wall_sec=elapsed,
+                )
+    finally:
+        # 締切超過スレッドの終了は待たない（結果は既に捨てている）
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return [results[i] for i in range(len(tasks))]
+
+
+def _collect_result(task: CollectorTask, fut: Future, wall_sec: float) -> CollectorResult:
+    try:
+        items, errors = fut.result()
+    except Exception as e:
+        msg = f"{task.label or task.name} failed: {e}"
+        logger.warning(msg)
+        return CollectorResult(name=task.name, status="failed", errors=[msg], wall_sec=wall_sec)
+
+    logger.info("%s: %d items in %.2fs", task.name, len(items), wall_sec)
+    return CollectorResult(
+        name=task.name, items=list(items), errors=list(errors), wall_sec=wall_sec,
+    )
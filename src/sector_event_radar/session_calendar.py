@@ -0,0 +1,144 @@
+"""取引所の営業日カレンダー（数年ぶんの休場日セット）。
+
+exchange_calendars.get_calendar("XNYS") は構築が重く（import込みで約0.5秒）、
+pandas Timestamp 経由の is_session / date_to_session も1件ずつ遅い。
+OPEXの「休場なら前営業日」程度の判定には、窓内の平日休場日の集合があれば足りる。
+
+- SessionCalendar: 窓 [start, end] と平日休場日の frozenset。判定は set 参照のみ
+- 永続化: events.db の session_calendars に1行（休場日はJSON配列、年10日程度）
+- get_session_calendar(): 保存済みの窓が必要な範囲を覆っていればそれを使い、
+  期限切れ（覆わない）ときだけ exchange_calendars で作り直して保存する
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from importlib.util import find_spec
+from typing import FrozenSet, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 作り直すときの窓: 前年1/1 〜 3年後の12/31
+WINDOW_YEARS_BACK = 1
+WINDOW_YEARS_AHEAD = 3
+
+_HAS_EXCHANGE_CAL = find_spec("exchange_calendars") is not None
+
+
+@dataclass(frozen=True)
+class SessionCalendar:
+    name: str
+    start: date
+    end: date
+    holidays: FrozenSet[date]  # 窓内の平日休場日（土日は含めない）
+
+    def covers(self, d: date) -> bool:
+        return self.start <= d <= self.end
+
+    def is_session(self, d: date) -> bool:
+        if not self.covers(d):
+            raise ValueError(f"{self.name} calendar does not cover {d} ({self.start}..{self.end})")
+        return d.weekday() < 5 and d not in self.holidays
+
+    def previous_session(self, d: date) -> date:
+        """d が営業日なら d、そうでなければ直前の営業日。"""
+        while not self.is_session(d):
+            d -= timedelta(days=1)
+        return d
+
+    def next_session(self, d: date) -> date:
+        """d が営業日なら d、そうでなければ直後の営業日。"""
+        while not self.is_session(d):
+            d += timedelta(days=1)
+        return d
+
+
+def window_for(today: date) -> Tuple[date, date]:
+    return (
+        date(today.year - WINDOW_YEARS_BACK, 1, 1),
+        date(today.year + WINDOW_YEARS_AHEAD, 12, 31),
+    )
+
+
+def build_from_exchange_calendars(name: str, start: date, end: date) -> SessionCalendar:
+    """exchange_calendars から窓内の休場日を抜き出す（ここでだけimportする）。"""
+    import exchange_calendars as ecals
+
+    cal = ecals.get_calendar(name, start=start.isoformat(), end=end.isoformat())
+    sessions = {ts.date() for ts in cal.sessions}
+    holidays = set()
+    d = start
+    while d <= end:
+        if d.weekday() < 5 and d not in sessions:
+            holidays.add(d)
+        d += timedelta(days=1)
+    return SessionCalendar(name=name, start=start, end=end, holidays=frozenset(holidays))
+
+
+def load_session_calendar(conn: sqlite3.Connection, name: str) -> Optional[SessionCalendar]:
+    row = conn.execute(
+        "SELECT start_date, end_date, holidays FROM session_calendars WHERE name = ?", (name,)
+    ).fetchone()
+    if row is None:
+        return None
+    start, end, holidays = row
+    return SessionCalendar(
+        name=name,
+        start=date.fromisoformat(start),
+        end=date.fromisoformat(end),
+        holidays=frozenset(date.fromisoformat(h) for h in json.loads(holidays)),
+    )
+
+
+def save_session_calendar(conn: sqlite3.Connection, cal: SessionCalendar) -> None:
+    with conn:
+        conn.execute(
+            """INSERT INTO session_calendars (name, start_date, end_date, holidays, built_at)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(name) DO UPDATE SET
+                   start_date = excluded.start_date,
+                   end_date = excluded.end_date,
+                   holidays = excluded.holidays,
+                   built_at = excluded.built_at""",
+            (
+                cal.name, cal.start.isoformat(), cal.end.isoformat(),
+                json.dumps(sorted(h.isoformat() for h in cal.holidays)),
+                datetime.now(timezone.utc).isoformat(),
+            ),
+        )
+
+
+def get_session_calendar(
+    conn: sqlite3.Connection,
+    name: str = "XNYS",
+    today: Optional[date] = None,
+    need_until: Optional[date] = None,
+) -> Optional[SessionCalendar]:
+    """[today, need_until] を覆う保存済みカレンダー。覆わなければ作り直して保存。
+
+    exchange_calendars が無い / 構築に失敗した場合は保存済みのもの（無ければNone）を返す。
+    """
+    today = today or datetime.now(timezone.utc).date()
+    need_until = need_until or today
+    cached = load_session_calendar(conn, name)
+    if cached is not None and cached.covers(today) and cached.covers(need_until):
+        return cached
+
+    if not _HAS_EXCHANGE_CAL:
+        logger.warning("%s calendar: window expired and exchange_calendars not installed", name)
+        return cached
+    start, end = window_for(today)
+    end = max(end, need_until)
+    try:
+        cal = build_from_exchange_calendars(name, start, end)
+    except Exception as e:
+        logger.warning("%s calendar: rebuild failed: %s", name, e)
+        return cached
+    save_session_calendar(conn, cal)
+    logger.info(
+        "%s calendar rebuilt: %s..%s, %d holidays", name, start, end, len(cal.holidays),
+    )
+    return cal
@@ -0,0 +1,206 @@
+"""prefilter Stage B用の永続TF-IDFモデル（hashing trick + 累積DF）。
+
+旧Stage Bは毎run、Stage Aを通過した数件の記事 + キーワードクエリだけで
+TfidfVectorizer を fit し直していた。CPUの無駄に加え、通過記事が少ない日は
+IDFが極端にブレる。
+
+ここでは語彙を持たない HashingVectorizer で特徴量を固定し、
+バケットごとの文書頻度(DF)と総文書数を events.db に累積保存する。
+- update(): そのrunの新着記事でDFを加算（同じ記事キーは二重に数えない）
+- score(): 保存済みIDFを掛けてL2正規化 → クエリとの疎行列×ベクトル1回。fitしない
+- 計上済みの記事キー（stage_b_docs）は全件読まず、update()に来たキーだけDBに問い合わせる。
+  最後に見かけた時刻を持ち、prune_docs() で古いものから消す（テーブルが際限なく育たない）
+
+IDFは TfidfVectorizer(smooth_idf=True) と同じ式 ln((1+n)/(1+df)) + 1。
+"""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from importlib.util import find_spec
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .db import _IN_CHUNK
+
+logger = logging.getLogger(__name__)
+
+# numpy / sklearn はモデルを実際に作るまでimportしない（CLI起動を重くしない）
+_HAS_SKLEARN = find_spec("sklearn") is not None and find_spec("numpy") is not None
+np = None
+HashingVectorizer = None
+normalize = None
+
+
+def _load_sklearn() -> bool:
+    """numpy / sklearn をimport。importできなければ False。"""
+    global _HAS_SKLEARN, np, HashingVectorizer, normalize
+    if _HAS_SKLEARN and np is None:
+        try:
+            import numpy as np
+            from sklearn.feature_extraction.text import HashingVectorizer
+            from sklearn.preprocessing import normalize
+        except Exception:
+            _HAS_SKLEARN = False
+    return _HAS_SKLEARN
+
+# 2^18 バケット（sklearn既定は2^20。記事数千〜数万件の語彙なら衝突は無視できる）
+N_FEATURES = 2 ** 18
+
+
+class StageBModel:
+    """hashing TF-IDF。DF配列はメモリに全展開（2^18 × int64 = 2MB）。"""
+
+    def __init__(self, n_features: int = N_FEATURES) -> None:
+        if not _load_sklearn():
+            raise RuntimeError("StageBModel requires scikit-learn")
+        self.n_features = int(n_features)
+        self.n_docs = 0
+        self.df = np.zeros(self.n_features, dtype=np.int64)
+        self._vectorizer = HashingVectorizer(
+            n_features=self.n_features, alternate_sign=False, norm=None,
+        )
+        self._dirty = np.zeros(self.n_features, dtype=bool)
+        self._known: Set[str] = set()  # 計上済みの doc_key（DBは update() に来たキーだけ引く）
+        self._pending: Dict[str, None] = {}  # このrunで見かけた doc_key（保存時に seen_at を更新）
+        self._conn: Optional[sqlite3.Connection] = None  # load() した接続
+
+    # ── persistence ──
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection, n_features: int = N_FEATURES) -> "StageBModel":
+        """events.db（init_db済み）からDF/文書数を読み込む。n_featuresが変わっていたら空から作り直す。"""
+        model = cls(n_features)
+        model._conn = conn
+        meta = dict(conn.execute("SELECT key, value FROM stage_b_meta").fetchall())
+        if meta and int(meta.get("n_features", 0)) != model.n_features:
+            logger.warning(
+                "Stage B model: n_features changed (%s → %d), resetting DF",
+                meta.get("n_features"), model.n_features,
+            )
+            conn.execute("DELETE FROM stage_b_df")
+            conn.execute("DELETE FROM stage_b_docs")
+            conn.execute("DELETE FROM stage_b_meta")
+            conn.commit()
+            return model
+
+        model.n_docs = int(meta.get("n_docs", 0))
+        rows = conn.execute("SELECT bucket, df FROM stage_b_df").fetchall()
+        if rows:
+            arr = np.asarray([tuple(r) for r in rows], dtype=np.int64)
+            model.df[arr[:, 0]] = arr[:, 1]
+        logger.info("Stage B model loaded: n_docs=%d, buckets=%d", model.n_docs, len(rows))
+        return model
+
+    def save(self, conn: sqlite3.Connection) -> None:
+        """update()で変わったバケットと、見かけた文書キー（seen_at更新）だけ書き戻す。"""
+        buckets = np.flatnonzero(self._dirty)
+        conn.executemany(
+            """INSERT INTO stage_b_df (bucket, df) VALUES (?, ?)
+               ON CONFLICT(bucket) DO UPDATE SET df = excluded.df""",
+            [(int(b), int(self.df[b])) for b in buckets],
+        )
+        now_iso = datetime.now(timezone.utc).isoformat()
+        conn.executemany(
+            """INSERT INTO stage_b_docs (doc_key, seen_at) VALUES (?, ?)
+               ON CONFLICT(doc_key) DO UPDATE SET seen_at = excluded.seen_at""",
+            [(k, now_iso) for k in self._pending],
+        )
+        conn.executemany(
+            """INSERT INTO stage_b_meta (key, value) VALUES (?, ?)
+               ON CONFLICT(key) DO UPDATE SET value = excluded.value""",
+            [("n_docs", str(self.n_docs)), ("n_features", str(self.n_features))],
+        )
+        conn.commit()
+        self._dirty[:] = False
+        self._pending = {}
+
+    def prune_docs(self, conn: sqlite3.Connection, before: datetime) -> int:
+        """before より前から見かけていない文書キーを削除。削除件数を返す。
+
+        DFからは引かない（削除後に同じ記事が再び来ると二重に数えるが、
+        フィードから消えて久しい記事なので影響は無視できる）。
+        """
+        removed = conn.execute(
+            "DELETE FROM stage_b_docs WHERE seen_at < ?", (before.isoformat(),)
+        ).rowcount
+        conn.commit()
+        return removed
+
+    def _load_known(self, keys: List[str]) -> None:
+        """keys のうちDBに計上済みのものを _known に足す（チャンク化IN句）。"""
+        if self._conn is None:
+            return
+        unknown = [k for k in dict.fromkeys(keys) if k not in self._known]
+        for i in range(0, len(unknown), _IN_CHUNK):
+            chunk = unknown[i:i + _IN_CHUNK]
+            cur = self._conn.execute(
+                f"SELECT doc_key FROM stage_b_docs WHERE doc_key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            self._known.update(r[0] for r in cur)
+
+    # ── update / score ──
+
+    def update(self, docs: Iterable[Tuple[str, str]]) -> int:
+        """(doc_key, text) でDFを加算。既に数えたdoc_keyはスキップ。加算した件数を返す。"""
+        docs = list(docs)
+        self._load_known([key for key, _ in docs])
+        texts: List[str] = []
+        for key, text in docs:
+            self._pending[key] = None
+            if key in self._known:
+                continue
+            self._known.add(key)
+            texts.append(text)
+        if not texts:
+            return 0
+
+        X = self._vectorizer.transform(texts)  # CSR、行内のindicesは一意
+        counts = np.bincount(X.indices, minlength=self.n_features)
+        self.df += counts
+        self._dirty |= counts > 0
+        self.n_docs += len(texts)
+        return len(texts)
+
+    def idf(self) -> "np.ndarray":
+        return np.log((1.0 + self.n_docs) / (1.0 + self.df)) + 1.0
+
+    def score(self, docs: Sequence[str], query: str) -> "np.ndarray":
+        """各docとqueryのTF-IDFコサイン類似度。"""
+        if not docs:
+            return np.zeros(0)
+        idf = self.idf()
+        X = normalize(self._vectorizer.transform(docs).multiply(idf).tocsr())
+        q = normalize(self._vectorizer.transform([query]).multiply(idf).tocsr())
+        return np.asarray((X @ q.T).todense()).ravel()
+
+
+def compare_rankings(
+    reference: Sequence[Tuple[str, float]],
+    candidate: Sequence[Tuple[str, float]],
+    top_k: int,
+) -> Dict[str, float]:
+    """(key, score) の2つのランキングを比較する（Stage B refit vs persistent）。
+
+    overlap_at_k: 上位k件の一致率
+    max_rank_shift: 同じkeyの順位差の最大値
+    """
+    ref = [k for k, _ in sorted(reference, key=lambda x: x[1], reverse=True)]
+    cand = [k for k, _ in sorted(candidate, key=lambda x: x[1], reverse=True)]
+    k = max(1, min(int(top_k), len(ref)))
+    overlap = len(set(ref[:k]) & set(cand[:k])) / k if ref else 1.0
+    pos: Dict[str, int] = {key: i for i, key in enumerate(cand)}
+    shifts = [abs(i - pos[key]) for i, key in enumerate(ref) if key in pos]
+    return {
+        "overlap_at_k": round(overlap, 4),
+        "max_rank_shift": max(shifts) if shifts else 0,
+        "k": k,
+    }
+
+
+def load_model(conn: sqlite3.Connection) -> Optional[StageBModel]:
+    """sklearnが無ければNone（prefilterはStage Bをスキップする）。"""
+    if not _load_sklearn():
+        return None
+    return StageBModel.load(conn)
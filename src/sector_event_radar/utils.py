@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import hashlib
+import os
 import re
+import stat
+import tempfile
 import unicodedata
+from pathlib import Path
 
 
 def slugify_ascii(text: str, max_len: int = 64) -> str:
@@ -20,3 +24,63 @@ def slugify_ascii(text: str, max_len: int = 64) -> str:
 def short_hash(text: str, n: int = 8) -> str:
     h = hashlib.sha256(text.encode("utf-8")).hexdigest()
     return h[:n]
+
+
+def _read_umask() -> int:
+    # Linuxは /proc から読める（umaskを変えない）
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    # それ以外は設定しないと読めない（すぐ戻す）。import時の1回だけなので他スレッドは巻き込まない
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# 新規ファイルのモード（通常の open() と同じ 0666 & ~umask）。プロセスのumaskは実行中に変えない前提
+_NEW_FILE_MODE = 0o666 & ~_read_umask()
+
+
+class AtomicFile:
+    """path と同じディレクトリの一時ファイルに書き、commit() でrename・discard() で破棄する。
+
+    読み手は旧内容か新内容の完全なファイルだけを見る。書いた内容のsha256も持つ。
+    mkstemp の一時ファイルは0600なので、commit時に既存ファイルのモード
+    （無ければ通常の open() と同じ 0666 & ~umask。umaskはimport時に1回だけ読む）に揃えてからrenameする。
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        fd, self._tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        self._f = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self._hash.update(data)
+        return self._f.write(data)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    def commit(self) -> None:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+        try:
+            mode = stat.S_IMODE(os.stat(self.path).st_mode)
+        except FileNotFoundError:
+            mode = _NEW_FILE_MODE
+        os.chmod(self._tmp, mode)
+        os.replace(self._tmp, self.path)
+
+    def discard(self) -> None:
+        self._f.close()
+        try:
+            os.unlink(self._tmp)
+        except OSError:
+            pass
+
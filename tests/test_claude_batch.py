@@ -0,0 +1,196 @@
+"""Claude抽出バッチバックエンドのテスト（ローカルのスタブサーバーでBatches APIを模擬）"""
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from sector_event_radar.config import AppConfig
+from sector_event_radar.db import connect, init_db, seen_urls
+from sector_event_radar.llm.claude_batch import extract_events_batch
+from sector_event_radar.llm.claude_extract import (
+    EMIT_EVENTS_TOOL, ArticleInput, SYSTEM_PROMPT, ClaudeConfig, ClaudeExtractError,
+)
+from sector_event_radar.llm.extract_cache import ExtractCache
+from sector_event_radar.models import Article
+from sector_event_radar.prefilter import ScoredArticle
+from sector_event_radar.run_daily import _collect_unscheduled
+
+
+def _tool_message(title):
+    return {"content": [{"type": "tool_use", "name": "emit_events", "input": {"events": [{
+        "title": title,
+        "start_at": "2026-04-01T00:00:00Z",
+        "category": "shock",
+        "sector_tags": ["semis"],
+        "risk_score": 60,
+        "confidence": 0.9,
+        "evidence": "The rule takes effect on April 1, 2026.",
+        "action": "add",
+    }]}}]}
+
+
+class BatchStub:
+    """POST /v1/messages/batches → GET .../{id}（polls_before_end回はin_progress）→ GET results
+
+    poll_status を設定すると、ポーリングはそのステータスコードのエラーを返す。
+    POST .../{id}/cancel は cancelled に記録する。
+    """
+
+    def __init__(self, polls_before_end=1, fail_ids=()):
+        self.polls_before_end = polls_before_end
+        self.fail_ids = set(fail_ids)
+        self.poll_status = 200
+        self.created = []
+        self.cancelled = []
+        self.polls = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *a):
+                pass
+
+            def _send(self, status, body, ctype="application/json"):
+                data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("content-type", ctype)
+                self.send_header("content-length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                if self.path == "/v1/messages/batches/msgbatch_1/cancel":
+                    stub.cancelled.append("msgbatch_1")
+                    return self._send(200, {"id": "msgbatch_1", "processing_status": "canceling"})
+                if self.path != "/v1/messages/batches" or self.headers.get("x-api-key") != "k":
+                    return self._send(404, {"error": "bad"})
+                n = int(self.headers["content-length"])
+                stub.created.append(json.loads(self.rfile.read(n)))
+                self._send(200, {"id": "msgbatch_1", "processing_status": "in_progress"})
+
+            def do_GET(self):
+                if self.path == "/v1/messages/batches/msgbatch_1":
+                    stub.polls += 1
+                    if stub.poll_status != 200:
+                        return self._send(stub.poll_status, {"error": "poll failed"})
+                    ended = stub.polls > stub.polls_before_end
+                    return self._send(200, {
+                        "id": "msgbatch_1",
+                        "processing_status": "ended" if ended else "in_progress",
+                        "results_url": f"{stub.base_url}/v1/messages/batches/msgbatch_1/results",
+                    })
+                if self.path == "/v1/messages/batches/msgbatch_1/results":
+                    lines = []
+                    # 結果の順序は投入順と一致しない（custom_idで戻す）
+                    for req in reversed(stub.created[-1]["requests"]):
+                        cid = req["custom_id"]
+                        if cid in stub.fail_ids:
+                            result = {"type": "errored", "error": {"type": "overloaded_error"}}
+                        else:
+                            title = req["params"]["messages"][0]["content"].split("\n")[0][7:]
+                            result = {"type": "succeeded", "message": _tool_message(title)}
+                        lines.append(json.dumps({"custom_id": cid, "result": result}))
+                    return self._send(200, "\n".join(lines), "application/x-jsonl")
+                self._send(404, {"error": "not found"})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    s = BatchStub()
+    yield s
+    s.close()
+
+
+def _articles(n):
+    return [
+        ArticleInput(title=f"Story {i}", published="2026-03-01", url=f"https://e.com/{i}",
+                     content="The rule takes effect on April 1, 2026.")
+        for i in range(n)
+    ]
+
+
+def test_batch_maps_results_back_by_custom_id(stub):
+    stub.fail_ids = {"article-1"}
+    cfg = ClaudeConfig(api_key="k", model="m", base_url=stub.base_url)
+    out = extract_events_batch(cfg, _articles(3), poll_interval_sec=0)
+
+    assert stub.polls == 2
+    params = stub.created[0]["requests"][0]["params"]
+    assert params["system"][0]["text"] == SYSTEM_PROMPT
+    assert params["tools"] == [{**EMIT_EVENTS_TOOL, "cache_control": {"type": "ephemeral"}}]
+
+    assert [e.title for e in out[0]] == ["Story 0"]
+    assert str(out[0][0].source_url) == "https://e.com/0"
+    assert isinstance(out[1], ClaudeExtractError) and "overloaded" in str(out[1])
+    assert out[2][0].source_id.startswith("claude:https://e.com/2#")
+
+
+def test_batch_skips_cached_articles_and_fills_cache(stub, tmp_path: Path):
+    cfg = ClaudeConfig(api_key="k", model="m", base_url=stub.base_url)
+    cache = ExtractCache(str(tmp_path / "e.db"))
+    extract_events_batch(cfg, _articles(2), cache=cache, poll_interval_sec=0)
+    assert len(stub.created[0]["requests"]) == 2
+
+    more = _articles(3)
+    out = extract_events_batch(cfg, more, cache=cache, poll_interval_sec=0)
+    # 前回ぶん（同内容・同タイトル）はキャッシュヒット、新しい1件だけ投入
+    assert [r["custom_id"] for r in stub.created[1]["requests"]] == ["article-2"]
+    assert [e.title for o in out for e in o] == ["Story 0", "Story 1", "Story 2"]
+
+
+def test_batch_timeout_raises(stub):
+    stub.polls_before_end = 10 ** 6
+    cfg = ClaudeConfig(api_key="k", model="m", base_url=stub.base_url)
+    with pytest.raises(ClaudeExtractError, match="not finished"):
+        extract_events_batch(cfg, _articles(1), poll_interval_sec=0.01, timeout_sec=0.05)
+    assert stub.cancelled == ["msgbatch_1"]
+
+
+def test_batch_poll_error_cancels(stub):
+    stub.poll_status = 500
+    cfg = ClaudeConfig(api_key="k", model="m", base_url=stub.base_url)
+    with pytest.raises(ClaudeExtractError, match="poll error 500"):
+        extract_events_batch(cfg, _articles(1), poll_interval_sec=0)
+    assert stub.cancelled == ["msgbatch_1"]
+
+
+def test_finished_batch_is_not_cancelled(stub):
+    cfg = ClaudeConfig(api_key="k", model="m", base_url=stub.base_url)
+    extract_events_batch(cfg, _articles(1), poll_interval_sec=0)
+    assert stub.cancelled == []
+
+
+def test_collect_unscheduled_batch_backend(stub, monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "k")
+    stub.fail_ids = {"article-0"}
+    conn = connect(":memory:")
+    init_db(conn)
+    cfg = AppConfig(keywords={"story": 5.0})
+    cfg.llm.backend = "batch"
+    cfg.llm.batch_poll_sec = 0
+    arts = [Article(title=f"Story {i}", body="The rule takes effect on April 1, 2026.",
+                    url=f"https://e.com/{i}", published="2026-03-01") for i in range(3)]
+    scored = [ScoredArticle(article=a, relevance_score=1.0) for a in arts]
+
+    real_cfg = ClaudeConfig
+    with patch("sector_event_radar.run_daily.prefilter", return_value=scored), \
+         patch("sector_event_radar.run_daily.ClaudeConfig",
+               side_effect=lambda **kw: real_cfg(base_url=stub.base_url, **kw)):
+        events, errors = _collect_unscheduled(cfg, conn, now=None, dry_run=False, articles=arts)
+
+    assert [e.title for e in events] == ["Story 1", "Story 2"]
+    assert all(e.category == "shock" for e in events)
+    assert len(errors) == 1
+    assert seen_urls(conn, [a.url for a in arts]) == {"https://e.com/1", "https://e.com/2"}
@@ -0,0 +1,143 @@
+"""複数記事パッキング（1リクエストに記事をまとめて article_index で振り分け）のテスト"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from sector_event_radar.llm.claude_extract import (
+    PROMPT_VERSION, ArticleInput, ClaudeConfig, ClaudeExtractError,
+)
+from sector_event_radar.llm.claude_pack import (
+    PACKED_EMIT_EVENTS_TOOL, PACKED_PROMPT_VERSION, demux_tool_output,
+    estimate_article_tokens, extract_events_packed, pack_articles,
+)
+from sector_event_radar.llm.extract_cache import ExtractCache, normalized_content_hash
+
+CFG = ClaudeConfig(api_key="k", model="m1", max_retries=1)
+
+
+def _event(title, **extra):
+    return {
+        "title": title,
+        "start_at": "2026-04-01T00:00:00Z",
+        "category": "shock",
+        "sector_tags": ["semis"],
+        "risk_score": 60,
+        "confidence": 0.9,
+        "evidence": "The rule takes effect on April 1, 2026.",
+        "action": "add",
+        **extra,
+    }
+
+
+def _response(events, status=200):
+    r = MagicMock()
+    r.status_code = status
+    r.text = "err"
+    r.json.return_value = {"content": [
+        {"type": "tool_use", "name": "emit_events", "input": {"events": events}},
+    ]}
+    return r
+
+
+def _articles(n, body="The rule takes effect on April 1, 2026."):
+    return [
+        ArticleInput(title=f"Article {i}", published="2026-03-01",
+                     url=f"https://news.example.com/{i}", content=f"{body} #{i}")
+        for i in range(n)
+    ]
+
+
+def test_pack_articles_respects_budget_and_max_and_keeps_order():
+    short = _articles(7)
+    long_ = ArticleInput(title="Long", published="2026-03-01",
+                         url="https://news.example.com/long", content="x" * 20000)
+    arts = short[:3] + [long_] + short[3:]
+    per = estimate_article_tokens(short[0])
+    packs = pack_articles(arts, token_budget=per * 10, max_per_pack=2)
+    assert packs == [[0, 1], [2], [3], [4, 5], [6, 7]]
+    assert [i for p in packs for i in p] == list(range(len(arts)))
+
+
+def test_packed_tool_requires_article_index():
+    item = PACKED_EMIT_EVENTS_TOOL["input_schema"]["properties"]["events"]["items"]
+    assert "article_index" in item["required"]
+    assert PACKED_PROMPT_VERSION != PROMPT_VERSION
+
+
+def test_demux_rejects_missing_or_out_of_range_index():
+    ok = demux_tool_output({"events": [_event("a", article_index=1)]}, 2)
+    assert ok == [{"events": []}, {"events": [_event("a")]}]
+    assert demux_tool_output({"events": [_event("a")]}, 2) is None
+    assert demux_tool_output({"events": [_event("a", article_index=2)]}, 2) is None
+    assert demux_tool_output({"events": [_event("a", article_index=True)]}, 2) is None
+    assert demux_tool_output(None, 2) is None
+
+
+def test_packed_call_maps_events_back_to_each_article():
+    arts = _articles(3)
+    events = [_event("B event", article_index=1), _event("C event", article_index=2)]
+    with patch("sector_event_radar.llm.claude_extract.requests.post",
+               return_value=_response(events)) as post:
+        outcomes = extract_events_packed(CFG, arts)
+
+    assert post.call_count == 1
+    payload = json.loads(post.call_args.kwargs["data"])
+    assert payload["tools"][0]["name"] == "emit_events"
+    assert "=== ARTICLE 2 ===" in payload["messages"][0]["content"]
+
+    assert outcomes[0] == []
+    assert [e.title for e in outcomes[1]] == ["B event"]
+    assert str(outcomes[2][0].source_url) == "https://news.example.com/2"
+    assert outcomes[2][0].source_id.startswith("claude:https://news.example.com/2#")
+
+
+def test_invalid_article_index_falls_back_to_single_calls():
+    arts = _articles(2)
+    responses = [
+        _response([_event("bad", article_index=5)]),  # パック応答（範囲外）
+        _response([_event("A event")]),
+        _response([]),
+    ]
+    with patch("sector_event_radar.llm.claude_extract.requests.post",
+               side_effect=responses) as post:
+        outcomes = extract_events_packed(CFG, arts)
+    assert post.call_count == 3
+    assert [e.title for e in outcomes[0]] == ["A event"]
+    assert outcomes[1] == []
+
+
+def test_api_error_fails_whole_pack_without_fallback():
+    with patch("sector_event_radar.llm.claude_extract.requests.post",
+               return_value=_response([], status=400)) as post:
+        outcomes = extract_events_packed(CFG, _articles(3))
+    assert post.call_count == 1
+    assert all(isinstance(o, ClaudeExtractError) for o in outcomes)
+
+
+def test_cache_serves_hits_and_stores_packed_results(tmp_path: Path):
+    cache = ExtractCache(str(tmp_path / "e.db"))
+    arts = _articles(3)
+    # 記事0は単発版で抽出済み
+    cache.put("m1", PROMPT_VERSION, normalized_content_hash(arts[0].title, arts[0].content),
+              {"events": [_event("cached")]})
+    events = [_event("first pending", article_index=0), _event("second pending", article_index=1)]
+    with patch("sector_event_radar.llm.claude_extract.requests.post",
+               return_value=_response(events)) as post:
+        outcomes = extract_events_packed(CFG, arts, cache=cache)
+    assert post.call_count == 1
+    assert "Article 0" not in json.loads(post.call_args.kwargs["data"])["messages"][0]["content"]
+    assert [e.title for e in outcomes[0]] == ["cached"]
+    assert [e.title for e in outcomes[1]] == ["first pending"]
+    assert [e.title for e in outcomes[2]] == ["second pending"]
+
+    h2 = normalized_content_hash(arts[2].title, arts[2].content)
+    assert cache.get("m1", PACKED_PROMPT_VERSION, h2) == {"events": [_event("second pending")]}
+
+    with patch("sector_event_radar.llm.claude_extract.requests.post") as post:
+        again = extract_events_packed(CFG, arts, cache=cache)
+    assert post.call_count == 0
+    assert [e.title for e in again[2]] == ["second pending"]
+    st = cache.stats()
+    assert (st["hits"], st["misses"]) == (5, 2)
@@ -0,0 +1,98 @@
+"""SQLite接続プロファイル / スキーマバージョン / マイグレーション記録のテスト"""
+from __future__ import annotations
+
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from sector_event_radar.db import (
+    SCHEMA_VERSION, connect, init_db, migration_applied, record_migration,
+)
+from sector_event_radar.run_daily import _run_migration, run_daily
+
+
+def test_connect_applies_wal_profile(tmp_path: Path):
+    conn = connect(str(tmp_path / "e.db"))
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -64 * 1024
+    conn.close()
+
+    plain = connect(str(tmp_path / "plain.db"), pragmas={})
+    assert plain.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+
+def test_init_db_skips_when_schema_current(tmp_path: Path):
+    conn = connect(str(tmp_path / "e.db"))
+    init_db(conn)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+
+    stmts = []
+    conn.set_trace_callback(stmts.append)
+    init_db(conn)
+    conn.set_trace_callback(None)
+    assert stmts == ["PRAGMA user_version"]
+
+
+def test_init_db_upgrades_legacy_db(tmp_path: Path):
+    """user_version=0 の既存DB（旧init_dbで作成）も壊さず最新化できる"""
+    path = str(tmp_path / "legacy.db")
+    legacy = connect(path, pragmas={})
+    legacy.executescript(
+        "CREATE TABLE articles (url TEXT PRIMARY KEY, content_hash TEXT NOT NULL, "
+        "relevance_score REAL NOT NULL, fetched_at TEXT NOT NULL);"
+        "INSERT INTO articles VALUES ('u', 'h', 1.0, 'now');"
+    )
+    legacy.close()
+
+    conn = connect(path)
+    init_db(conn)
+    assert conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM applied_migrations").fetchone()[0] == 0
+
+
+def test_run_migration_once():
+    conn = connect(":memory:")
+    init_db(conn)
+    fn = MagicMock(return_value=3)
+
+    _run_migration(conn, "demo", fn)
+    _run_migration(conn, "demo", fn)
+    assert fn.call_count == 1
+    assert migration_applied(conn, "demo")
+    assert conn.execute(
+        "SELECT rows_affected FROM applied_migrations WHERE name='demo'"
+    ).fetchone()[0] == 3
+
+
+def test_failed_migration_is_retried():
+    conn = connect(":memory:")
+    init_db(conn)
+    fn = MagicMock(side_effect=[RuntimeError("boom"), 0])
+
+    _run_migration(conn, "flaky", fn)  # non-fatal
+    assert not migration_applied(conn, "flaky")
+    _run_migration(conn, "flaky", fn)
+    assert migration_applied(conn, "flaky")
+
+    record_migration(conn, "flaky", 5)  # 上書き可
+    assert conn.execute(
+        "SELECT rows_affected FROM applied_migrations WHERE name='flaky'"
+    ).fetchone()[0] == 5
+
+
+def test_run_daily_reports_db_timings_and_checkpoints(tmp_path: Path):
+    cfg_path = tmp_path / "cfg.yaml"
+    cfg_path.write_text("keywords: {}\nmacro_title_map: {}\nsources: {rss: []}\n", encoding="utf-8")
+    db_path = tmp_path / "events.db"
+
+    with patch("sector_event_radar.run_daily._scheduled_tasks", return_value=[]):
+        summary = run_daily(str(cfg_path), str(db_path), str(tmp_path / "ics"), dry_run=True)
+
+    for k in ("db_open_sec", "db_migrate_sec", "collect_sec", "upsert_sec"):
+        assert k in summary["timings"]
+    # close時にWALがチェックポイントされ、.db 1ファイルだけが残る
+    assert not Path(str(db_path) + "-wal").exists()
+
+    conn = connect(str(db_path))
+    assert migration_applied(conn, "shock_category")
+    assert migration_applied(conn, "quarter_range")
@@ -0,0 +1,102 @@
+"""collectorレコードの指紋（前回と同じイベントはupsertを省く）のテスト"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from sector_event_radar.config import AppConfig
+from sector_event_radar.db import connect, init_db, load_event_fingerprints, record_event_fingerprints
+from sector_event_radar.models import Event
+from sector_event_radar.run_daily import _upsert_pipeline
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _event(source_id, source_name="te", title="US CPI YoY", days=10, risk=50, evidence="Scheduled release time"):
+    return Event(
+        title=title, start_at=NOW + timedelta(days=days), category="macro", sector_tags=[],
+        risk_score=risk, confidence=0.9, source_name=source_name, source_id=source_id,
+        source_url="https://example.com/cal", evidence=evidence, action="add",
+    )
+
+
+def _cfg(**db):
+    return AppConfig(macro_title_map={"CPI": {"entity": "us", "sub_type": "cpi"}}, db=db)
+
+
+@pytest.fixture
+def db_conn():
+    conn = connect(":memory:")
+    init_db(conn)
+    return conn
+
+
+def _batch():
+    return [
+        _event("te:1"),
+        _event("te:2", title="Nonfarm Payrolls", days=12),
+        _event("bls:cpi", source_name="bls", title="Consumer Price Index", days=11),
+    ]
+
+
+def test_unchanged_records_skip_key_generation_and_upsert(db_conn):
+    cfg = _cfg()
+    first = _upsert_pipeline(db_conn, _batch(), cfg, NOW)
+    assert first["inserted"] == 3 and first["unchanged"] == 0
+
+    unchanged = {}
+    with patch("sector_event_radar.run_daily.make_canonical_key") as make_key, \
+         patch("sector_event_radar.run_daily.validate_event") as validate:
+        second = _upsert_pipeline(db_conn, _batch(), cfg, NOW, unchanged=unchanged)
+    make_key.assert_not_called()
+    validate.assert_not_called()
+    assert second["unchanged"] == 3
+    assert second["inserted"] == second["merged"] == second["updated"] == 0
+    assert unchanged == {"te": 2, "bls": 1}
+
+
+def test_changed_record_goes_through_pipeline(db_conn):
+    cfg = _cfg()
+    _upsert_pipeline(db_conn, _batch(), cfg, NOW)
+    batch = _batch()
+    batch[0] = _event("te:1", risk=90)
+    changed = set()
+    stats = _upsert_pipeline(db_conn, batch, cfg, NOW, changed=changed)
+    assert (stats["unchanged"], stats["updated"]) == (2, 1)
+    assert changed == {batch[0].canonical_key}
+
+    # 変更後の内容が新しい指紋になる（collectorは毎runイベントを作り直す）
+    again = _batch()
+    again[0] = _event("te:1", risk=90)
+    assert _upsert_pipeline(db_conn, again, cfg, NOW)["unchanged"] == 3
+
+
+def test_rejected_records_are_not_fingerprinted(db_conn):
+    cfg = _cfg()
+    short = _event("te:9", evidence="too short")
+    assert _upsert_pipeline(db_conn, [short], cfg, NOW)["rejected"] == 1
+    assert _upsert_pipeline(db_conn, [short], cfg, NOW)["rejected"] == 1
+    assert load_event_fingerprints(db_conn, [("te", "te:9")]) == {}
+
+
+def test_config_change_invalidates_fingerprints(db_conn):
+    _upsert_pipeline(db_conn, _batch(), _cfg(), NOW)
+    cfg2 = AppConfig(macro_title_map={"(?i)price index": {"entity": "us", "sub_type": "cpi"}})
+    stats = _upsert_pipeline(db_conn, _batch(), cfg2, NOW)
+    assert stats["unchanged"] == 0
+
+
+def test_disabled_keeps_merging(db_conn):
+    cfg = _cfg(skip_unchanged=False)
+    _upsert_pipeline(db_conn, _batch(), cfg, NOW)
+    stats = _upsert_pipeline(db_conn, _batch(), cfg, NOW)
+    assert (stats["merged"], stats["unchanged"]) == (3, 0)
+
+
+def test_fingerprint_lookup_chunks_row_values(db_conn):
+    rows = [("fr", f"doc-{i}", f"fp{i}") for i in range(1200)]
+    record_event_fingerprints(db_conn, rows)
+    got = load_event_fingerprints(db_conn, [(n, s) for n, s, _ in rows] + [("fr", "missing")])
+    assert len(got) == 1200 and got[("fr", "doc-1199")] == "fp1199"
@@ -0,0 +1,207 @@
+"""http_cache.py — 条件付きGET + 永続レスポンスキャッシュのテスト
+
+- ETag / Last-Modified を保存し、次回 If-None-Match / If-Modified-Since を送る
+- 304ならパースを丸ごとスキップしてパース済み結果を返す
+- キャッシュは日付窓で絞る前の結果なので、窓が動いても304で正しく答えられる
+- source別 hits / misses / bytes_saved
+"""
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from sector_event_radar.collectors.official_calendars import BEA_ICS_URL, fetch_ics_macro_events
+from sector_event_radar.collectors.rss import fetch_rss
+from sector_event_radar.config import AppConfig
+from sector_event_radar.http_cache import HttpCache
+from sector_event_radar.http_client import HttpClient, StubTransport
+
+ET = ZoneInfo("America/New_York")
+
+BEA_ICS = (
+    "BEGIN:VCALENDAR\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART:20260327T123000Z\r\n"
+    "SUMMARY:Gross Domestic Product\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART;TZID=US-Eastern:20260630T083000\r\n"
+    "SUMMARY:Personal Income and Outlays\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+RSS2 = """<?xml version="1.0"?><rss version="2.0"><channel>
+<item><title>TSMC fab</title><link>https://example.com/a1</link><description>2nm</description></item>
+</channel></rss>"""
+
+
+def _etag_handler(body: str, etag: str = '"v1"'):
+    def handler(req):
+        if req.headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag}, body
+    return handler
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> str:
+    return str(tmp_path / "events.db")
+
+
+def _client(stub: StubTransport, db_path: str) -> HttpClient:
+    return HttpClient(transport=stub, cache=HttpCache(db_path), max_retries=0)
+
+
+def test_etag_roundtrip_skips_parse(db_path):
+    stub = StubTransport()
+    stub.add("https://example.com/cal", handler=_etag_handler("hello"))
+    client = _client(stub, db_path)
+
+    parse_calls = []
+
+    def parse(resp):
+        parse_calls.append(1)
+        return {"text": resp.text}
+
+    first = client.get_parsed("https://example.com/cal", parse, source="cal")
+    second = client.get_parsed("https://example.com/cal", parse, source="cal")
+
+    assert first == second == {"text": "hello"}
+    assert len(parse_calls) == 1
+    assert stub.calls[1].headers["If-None-Match"] == '"v1"'
+    assert client.cache.stats() == {"cal": {"hits": 1, "misses": 1, "bytes_saved": 5}}
+
+
+def test_last_modified_sent(db_path):
+    stub = StubTransport()
+    lm = "Wed, 01 Jan 2026 00:00:00 GMT"
+
+    def handler(req):
+        if req.headers.get("If-Modified-Since") == lm:
+            return 304, {}, b""
+        return 200, {"Last-Modified": lm}, b"body"
+
+    stub.add("https://example.com/lm", handler=handler)
+    client = _client(stub, db_path)
+    client.get_parsed("https://example.com/lm", lambda r: r.text, source="lm")
+    assert client.get_parsed("https://example.com/lm", lambda r: r.text, source="lm") == "body"
+    assert client.cache.stats()["lm"]["hits"] == 1
+
+
+def test_no_validator_not_cached(db_path):
+    stub = StubTransport()
+    stub.add("https://example.com/plain", "x")
+    client = _client(stub, db_path)
+    client.get_parsed("https://example.com/plain", lambda r: r.text, source="plain")
+    client.get_parsed("https://example.com/plain", lambda r: r.text, source="plain")
+    assert "If-None-Match" not in stub.calls[1].headers
+    assert client.cache.stats()["plain"] == {"hits": 0, "misses": 2, "bytes_saved": 0}
+
+
+def test_cache_persists_across_runs(db_path):
+    stub = StubTransport()
+    stub.add("https://example.com/cal", handler=_etag_handler("hello"))
+
+    _client(stub, db_path).get_parsed("https://example.com/cal", lambda r: r.text, source="cal")
+    client2 = _client(stub, db_path)
+    assert client2.get_parsed("https://example.com/cal", lambda r: r.text, source="cal") == "hello"
+    assert client2.cache.stats()["cal"]["hits"] == 1
+
+
+def test_parser_version_change_reparses_stored_body(db_path):
+    stub = StubTransport()
+    stub.add("https://example.com/cal", handler=_etag_handler("hello"))
+    client = _client(stub, db_path)
+    client.get_parsed("https://example.com/cal", lambda r: r.text, source="cal", parser_version="v1")
+
+    # パーサーを変えて上げたバージョンでは、304でも保存済み本文から作り直す
+    upper = client.get_parsed(
+        "https://example.com/cal", lambda r: r.text.upper(), source="cal", parser_version="v2",
+    )
+    assert upper == "HELLO"
+    assert client.get_parsed(
+        "https://example.com/cal", lambda r: "not called", source="cal", parser_version="v2",
+    ) == "HELLO"
+    assert [c.headers.get("If-None-Match") for c in stub.calls] == [None, '"v1"', '"v1"']
+
+
+def test_cache_write_failure_still_returns_parsed(db_path, monkeypatch):
+    """events.dbがロック中などで保存できなくても、取得・パース済みの結果は返す"""
+    stub = StubTransport()
+    stub.add("https://example.com/cal", handler=_etag_handler("hello"))
+    client = _client(stub, db_path)
+
+    def locked(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(client.cache, "put", locked)
+    assert client.get_parsed("https://example.com/cal", lambda r: r.text, source="cal") == "hello"
+
+    # 読み出し・304時の保存も同様（ミスとして本文を取り直す）
+    monkeypatch.setattr(client.cache, "get", locked)
+    monkeypatch.setattr(client.cache, "put_parsed", locked)
+    monkeypatch.setattr(client.cache, "record", locked)
+    assert client.get_parsed("https://example.com/cal", lambda r: r.text, source="cal") == "hello"
+    assert "If-None-Match" not in stub.calls[1].headers
+
+
+def test_cache_write_failure_on_304_reparse(db_path, monkeypatch):
+    stub = StubTransport()
+    stub.add("https://example.com/cal", handler=_etag_handler("hello"))
+    client = _client(stub, db_path)
+    client.get_parsed("https://example.com/cal", lambda r: r.text, source="cal", parser_version="v1")
+
+    def locked(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(client.cache, "put_parsed", locked)
+    assert client.get_parsed(
+        "https://example.com/cal", lambda r: r.text.upper(), source="cal", parser_version="v2",
+    ) == "HELLO"
+
+
+def test_ics_304_restores_events_and_slides_window(db_path):
+    stub = StubTransport()
+    stub.add(BEA_ICS_URL, handler=_etag_handler(BEA_ICS))
+    client = _client(stub, db_path)
+    cfg = AppConfig.model_validate({
+        "macro_title_map": {
+            r"(?i)Gross Domestic Product": {"entity": "us", "sub_type": "gdp"},
+            r"(?i)Personal Income and Outlays": {"entity": "us", "sub_type": "pce"},
+        },
+    })
+
+    first = fetch_ics_macro_events(
+        BEA_ICS_URL, "bea", cfg, datetime(2026, 3, 1, tzinfo=ET), datetime(2026, 4, 1, tzinfo=ET),
+        client=client,
+    )
+    # 翌日以降: 窓がずれてPCEが範囲に入る。304でも未フィルタのパース結果から拾える
+    second = fetch_ics_macro_events(
+        BEA_ICS_URL, "bea", cfg, datetime(2026, 3, 1, tzinfo=ET), datetime(2026, 7, 1, tzinfo=ET),
+        client=client,
+    )
+
+    assert [e.title for e in first] == ["Gross Domestic Product"]
+    assert [e.title for e in second] == ["Gross Domestic Product", "Personal Income and Outlays"]
+    assert client.cache.stats()["bea"]["hits"] == 1
+
+    pce = second[1]
+    assert pce.start_at == datetime(2026, 6, 30, 8, 30, tzinfo=ET)
+    assert str(pce.start_at.tzinfo) == "America/New_York"
+
+
+def test_rss_304_returns_cached_articles(db_path):
+    stub = StubTransport()
+    stub.add("https://example.com/feed", handler=_etag_handler(RSS2))
+    client = _client(stub, db_path)
+
+    first = fetch_rss("https://example.com/feed", client=client, cache_source="rss:test")
+    second = fetch_rss("https://example.com/feed", client=client, cache_source="rss:test")
+    assert first == second
+    assert second[0].url == "https://example.com/a1"
+    assert client.cache.stats()["rss:test"]["hits"] == 1
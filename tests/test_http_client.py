@@ -0,0 +1,173 @@
+"""http_client.py — 共有HttpClient + StubTransport のテスト
+
+- 429/5xx と接続エラーのリトライ（Retry-After尊重）
+- ホスト別同時接続数上限
+- collectorにclientを渡すとrequests.getを経由しない（スタブtransportで完結）
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+import requests
+
+from sector_event_radar.collectors.federal_register import fetch_federal_register_bis_events
+from sector_event_radar.collectors.official_calendars import BEA_ICS_URL, fetch_ics_macro_events
+from sector_event_radar.collectors.rss import fetch_rss
+from sector_event_radar.collectors.scheduled import TE_BASE, fetch_tradingeconomics_events
+from sector_event_radar.config import AppConfig
+from sector_event_radar.http_client import HttpClient, StubTransport
+
+
+def _client(stub: StubTransport, **kwargs) -> tuple[HttpClient, list]:
+    sleeps: list = []
+    return HttpClient(transport=stub, sleep=sleeps.append, **kwargs), sleeps
+
+
+# ── リトライ ─────────────────────────────────────────
+
+def test_retries_429_then_succeeds():
+    stub = StubTransport()
+    responses = iter([(429, {"Retry-After": "3"}, b""), (200, {}, b"ok")])
+    stub.add("https://api.example.com/x", handler=lambda req: next(responses))
+    client, sleeps = _client(stub, max_retries=2)
+
+    resp = client.get("https://api.example.com/x")
+    assert resp.status_code == 200
+    assert resp.text == "ok"
+    assert sleeps == [3.0]
+    assert len(stub.calls) == 2
+
+
+def test_retry_exhausted_returns_last_response():
+    stub = StubTransport()
+    stub.add("https://api.example.com/x", status=503)
+    client, sleeps = _client(stub, max_retries=2, backoff_sec=0.5)
+
+    resp = client.get("https://api.example.com/x")
+    assert resp.status_code == 503
+    assert sleeps == [0.5, 1.0]
+    with pytest.raises(requests.HTTPError):
+        resp.raise_for_status()
+
+
+def test_per_call_max_retries_override():
+    stub = StubTransport()
+    stub.add("https://api.example.com/x", status=503, method="POST")
+    client, sleeps = _client(stub, max_retries=3)
+
+    resp = client.post("https://api.example.com/x", data="{}", max_retries=0)
+    assert resp.status_code == 503
+    assert sleeps == []
+    assert len(stub.calls) == 1
+
+
+def test_connection_error_retried_then_raised():
+    stub = StubTransport()
+
+    def refuse(req):
+        raise requests.ConnectionError("refused")
+
+    stub.add("https://down.example.com/", handler=refuse)
+    client, sleeps = _client(stub, max_retries=1)
+
+    with pytest.raises(requests.ConnectionError):
+        client.get("https://down.example.com/")
+    assert len(stub.calls) == 2
+    assert len(sleeps) == 1
+
+
+def test_unknown_route_is_404():
+    client, _ = _client(StubTransport(), max_retries=0)
+    assert client.get("https://nowhere.example.com/").status_code == 404
+
+
+# ── ホスト別同時数 ───────────────────────────────────
+
+def test_per_host_limit_caps_concurrency():
+    stub = StubTransport()
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def slow(req):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+        return 200, {}, b"ok"
+
+    stub.add("https://one.example.com/a", handler=slow)
+    client, _ = _client(stub, per_host_limit=2)
+
+    threads = [threading.Thread(target=client.get, args=("https://one.example.com/a",)) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert active["peak"] <= 2
+    assert len(stub.calls) == 6
+
+
+# ── collectorへの注入 ────────────────────────────────
+
+RSS2 = """<?xml version="1.0"?><rss version="2.0"><channel>
+<item><title>TSMC fab</title><link>https://example.com/a1</link><description>x</description></item>
+</channel></rss>"""
+
+BEA_ICS = (
+    "BEGIN:VCALENDAR\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART:20260327T123000Z\r\n"
+    "SUMMARY:Gross Domestic Product\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def test_collectors_use_injected_client(monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError("requests.get must not be called when a client is injected")
+
+    monkeypatch.setattr(requests, "get", no_network)
+
+    stub = StubTransport()
+    stub.add("https://example.com/feed", RSS2)
+    stub.add(BEA_ICS_URL, BEA_ICS)
+    stub.add(
+        f"{TE_BASE}/calendar/country/united%20states/2026-03-01/2026-03-31",
+        json.dumps([{"Category": "CPI", "Event": "CPI YoY", "Date": "2026-03-11T12:30:00", "Importance": 3}]),
+    )
+    stub.add(
+        "https://www.federalregister.gov/api/v1/articles.json",
+        json.dumps({"results": []}),
+    )
+    client, _ = _client(stub, max_retries=0)
+
+    articles = fetch_rss("https://example.com/feed", client=client)
+    assert [a.url for a in articles] == ["https://example.com/a1"]
+
+    te = fetch_tradingeconomics_events("key", "2026-03-01", "2026-03-31", client=client)
+    assert len(te) == 1
+
+    cfg = AppConfig.model_validate({
+        "macro_title_map": {r"(?i)Gross Domestic Product": {"entity": "us", "sub_type": "gdp"}},
+    })
+    et = ZoneInfo("America/New_York")
+    bea = fetch_ics_macro_events(
+        BEA_ICS_URL, "bea", cfg,
+        datetime(2026, 3, 1, tzinfo=et), datetime(2026, 4, 1, tzinfo=et),
+        client=client,
+    )
+    assert len(bea) == 1
+
+    fr_events, fr_errors = fetch_federal_register_bis_events("2026-03-01", "2026-09-01", client=client)
+    assert fr_events == [] and fr_errors == []
+
+    # User-Agentはセッション既定 or collector指定のどちらかが必ず付く
+    assert all(req.headers.get("User-Agent") for req in stub.calls)
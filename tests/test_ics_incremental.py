@@ -0,0 +1,129 @@
+"""変更駆動のICS生成（変更集合 + 内容ハッシュ + atomic rename）のテスト"""
+from __future__ import annotations
+
+import os
+import stat
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from sector_event_radar import utils
+from sector_event_radar.config import AppConfig
+from sector_event_radar.db import connect, init_db, upsert_events
+from sector_event_radar.models import Event
+from sector_event_radar.run_daily import _generate_ics_files, _upsert_pipeline
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _event(key, category="macro", days=5, source_id=None, evidence="scheduled for release", risk=50, action="add"):
+    return Event(
+        canonical_key=key, title=f"Event {key}", start_at=NOW + timedelta(days=days),
+        category=category, sector_tags=["semis"], risk_score=risk, confidence=0.8,
+        source_name="test", source_id=source_id or key, source_url=f"https://example.com/{key}",
+        evidence=evidence, action=action,
+    )
+
+
+@pytest.fixture
+def db_conn():
+    conn = connect(":memory:")
+    init_db(conn)
+    upsert_events(conn, [_event("m1"), _event("m2", days=6), _event("s1", category="shock")])
+    return conn
+
+
+def _mtimes(path):
+    return {p.name: p.stat().st_mtime_ns for p in path.glob("*.ics")}
+
+
+def test_same_db_state_renders_identical_bytes(db_conn, tmp_path):
+    a, b = tmp_path / "a", tmp_path / "b"
+    _generate_ics_files(db_conn, str(a), NOW)
+    with patch("sector_event_radar.ics.datetime") as fake_dt:
+        fake_dt.now.return_value = NOW + timedelta(hours=5)  # DTSTAMPが時刻に依存しない
+        _generate_ics_files(db_conn, str(b), NOW)
+    for f in a.glob("*.ics"):
+        assert f.read_bytes() == (b / f.name).read_bytes(), f.name
+    assert b"DTSTAMP:" in (a / "sector_events_macro.ics").read_bytes()
+
+
+def test_no_changes_skips_render_and_write(db_conn, tmp_path):
+    first = _generate_ics_files(db_conn, str(tmp_path), NOW, changed=set())
+    assert first["written"] == 5
+    before = _mtimes(tmp_path)
+
+    with patch("sector_event_radar.run_daily.write_calendars") as render:
+        report = _generate_ics_files(db_conn, str(tmp_path), NOW, changed=set())
+    render.assert_not_called()
+    assert report == {"written": 0, "unchanged": 0, "skipped": 5, "failed": 0}
+    assert _mtimes(tmp_path) == before
+
+
+def test_only_calendars_with_changed_keys_rewritten(db_conn, tmp_path):
+    _generate_ics_files(db_conn, str(tmp_path), NOW, changed=set())
+    old_shock = (tmp_path / "sector_events_shock.ics").read_bytes()
+
+    changed = set()
+    stats = _upsert_pipeline(db_conn, [_event("m1", risk=90)], AppConfig(), NOW, changed=changed)
+    assert stats["updated"] == 1 and changed == {"m1"}
+
+    report = _generate_ics_files(db_conn, str(tmp_path), NOW, changed=changed)
+    assert report == {"written": 2, "unchanged": 0, "skipped": 3, "failed": 0}  # all + macro
+    assert (tmp_path / "sector_events_shock.ics").read_bytes() == old_shock
+    assert b"Risk: 90/100" in (tmp_path / "sector_events_macro.ics").read_bytes()
+
+
+def test_merge_with_new_evidence_counts_as_change(db_conn):
+    changed = set()
+    stats = _upsert_pipeline(db_conn, [_event("m1")], AppConfig(), NOW, changed=changed)
+    assert stats["merged"] == 1 and changed == set()  # 同じsourceの再取得
+
+    newer = _event("m1", source_id="other", evidence="rescheduled per agency")
+    stats = _upsert_pipeline(db_conn, [newer], AppConfig(), NOW, changed=changed)
+    assert stats["merged"] == 1 and changed == {"m1"}
+
+
+def test_window_and_disk_changes_are_detected(db_conn, tmp_path):
+    _generate_ics_files(db_conn, str(tmp_path), NOW, changed=set())
+
+    # 窓から外れるイベントがあればkeyのダイジェストが変わる
+    report = _generate_ics_files(db_conn, str(tmp_path), NOW + timedelta(days=7), changed=set())
+    assert report["written"] == 3  # all + macro + shock。空のカテゴリは同じ
+
+    # ディスク上のファイルが消えた・書き換えられた場合は作り直す
+    (tmp_path / "sector_events_flows.ics").unlink()
+    (tmp_path / "sector_events_bellwether.ics").write_text("edited")
+    report = _generate_ics_files(db_conn, str(tmp_path), NOW + timedelta(days=7), changed=set())
+    assert report == {"written": 2, "unchanged": 0, "skipped": 3, "failed": 0}
+
+
+def test_cancel_removes_event_from_calendar(db_conn, tmp_path):
+    _generate_ics_files(db_conn, str(tmp_path), NOW, changed=set())
+    changed = set()
+    cancel = _event("s1", category="shock", action="cancel")
+    _upsert_pipeline(db_conn, [cancel], AppConfig(), NOW, changed=changed)
+    assert changed == {"s1"}
+    _generate_ics_files(db_conn, str(tmp_path), NOW, changed=changed)
+    assert b"UID:s1" not in (tmp_path / "sector_events_shock.ics").read_bytes()
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+def test_written_files_keep_regular_permissions(db_conn, tmp_path, monkeypatch):
+    # mkstemp の0600のままrenameすると、ics_dirを配信するWebサーバーから読めなくなる
+    monkeypatch.setattr(utils, "_NEW_FILE_MODE", 0o644)
+    # commit中にプロセスのumaskを触らない（締切超過collectorのスレッドが同時にファイルを作りうる）
+    monkeypatch.setattr(utils.os, "umask", lambda *a: pytest.fail("umask changed"))
+    _generate_ics_files(db_conn, str(tmp_path), NOW, changed=set())
+    assert stat.S_IMODE((tmp_path / "sector_events_all.ics").stat().st_mode) == 0o644
+
+    # 既存ファイルのモードは書き直しても変えない
+    macro = tmp_path / "sector_events_macro.ics"
+    macro.chmod(0o640)
+    changed = set()
+    _upsert_pipeline(db_conn, [_event("m1", risk=90)], AppConfig(), NOW, changed=changed)
+    _generate_ics_files(db_conn, str(tmp_path), NOW, changed=changed)
+    assert b"Risk: 90/100" in macro.read_bytes()
+    assert stat.S_IMODE(macro.stat().st_mode) == 0o640
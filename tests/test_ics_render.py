@@ -0,0 +1,122 @@
+"""1パス複数カレンダー描画（ics.write_calendars）と行の折り返し（ics._fold_line）のテスト"""
+from __future__ import annotations
+
+import io
+import random
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from sector_event_radar import ics
+from sector_event_radar.ics import _fold_line, events_to_ics, write_calendars
+from sector_event_radar.models import Event
+
+STAMP = datetime(2026, 2, 1, tzinfo=timezone.utc)
+CATEGORIES = ("macro", "bellwether", "flows", "shock")
+
+
+def _events(n=12):
+    return [
+        Event(
+            canonical_key=f"k{i}", title=f"イベント {i} " + "long title " * (i % 4),
+            start_at=datetime(2026, 3, 1, tzinfo=timezone.utc) + timedelta(hours=i),
+            category=CATEGORIES[i % 4], sector_tags=["semis", "NVDA"], risk_score=40 + i,
+            confidence=0.8, source_name="test", source_id=str(i),
+            source_url=f"https://example.com/{i}", evidence=f"evidence for event {i}", action="add",
+        )
+        for i in range(n)
+    ]
+
+
+def test_single_pass_matches_per_calendar_rendering():
+    evs = _events()
+    bufs = [io.BytesIO() for _ in range(5)]
+    targets = [("Sector Event Radar", None)] + [(f"SER - {c}", c) for c in CATEGORIES]
+    counts = write_calendars(evs, [(b, name, cat) for b, (name, cat) in zip(bufs, targets)], dtstamp=STAMP)
+
+    assert counts == [12, 3, 3, 3, 3]
+    for buf, (name, cat) in zip(bufs, targets):
+        expected = events_to_ics([e for e in evs if cat is None or e.category == cat], cal_name=name, dtstamp=STAMP)
+        assert buf.getvalue() == expected.encode("utf-8")
+
+
+def test_each_vevent_formatted_once():
+    evs = _events()
+    with patch("sector_event_radar.ics._vevent_block", wraps=ics._vevent_block) as block:
+        write_calendars(
+            evs,
+            [(io.BytesIO(), "all", None)] + [(io.BytesIO(), c, c) for c in CATEGORIES],
+            dtstamp=STAMP,
+        )
+    assert block.call_count == len(evs)
+
+
+def test_per_event_dtstamps_override_default():
+    evs = _events(2)
+    buf = io.BytesIO()
+    later = datetime(2026, 2, 3, 9, 0, tzinfo=timezone.utc)
+    write_calendars(evs, [(buf, "all", None)], dtstamp=STAMP, dtstamps={"k1": later})
+    out = buf.getvalue().decode("utf-8")
+    assert "DTSTAMP:20260201T000000Z" in out and "DTSTAMP:20260203T090000Z" in out
+
+
+def _fold_line_decode_retry(line: str) -> str:
+    """旧実装（75バイトごとにdecodeを試し、失敗したら1バイトずつ削る）。結果の比較用"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    pos = 0
+    first = True
+    while pos < len(encoded):
+        max_bytes = 75 if first else 74
+        end = min(pos + max_bytes, len(encoded))
+        chunk = encoded[pos:end]
+        if end < len(encoded):
+            while len(chunk) > 0:
+                try:
+                    chunk.decode("utf-8")
+                    break
+                except UnicodeDecodeError:
+                    chunk = chunk[:-1]
+        text = chunk.decode("utf-8")
+        if first:
+            parts.append(text)
+            first = False
+        else:
+            parts.append(" " + text)
+        pos += len(chunk)
+    return "\r\n".join(parts)
+
+
+# 1〜4バイトの文字を混ぜる（ASCII / Latin-1 / かな・漢字 / 絵文字 / 結合文字）
+_ALPHABET = "abcXYZ019 ,;:\\" + "éüñ" + "あいう漢字カナ" + "\U0001F4C8\U0001F680" + "\u0301"
+
+
+def test_fold_matches_decode_retry_on_seeded_random_lines():
+    rng = random.Random(20260301)
+    for _ in range(3000):
+        n = rng.randint(0, 260)
+        line = "".join(rng.choice(_ALPHABET) for _ in range(n))
+        if rng.random() < 0.3:
+            line = "DESCRIPTION:" + "x" * rng.randint(0, 80) + line
+        assert _fold_line(line) == _fold_line_decode_retry(line), repr(line)
+
+
+@pytest.mark.parametrize("n", [0, 74, 75, 76, 149, 150, 223, 224, 500])
+def test_fold_ascii_boundaries(n):
+    line = "A" * n
+    assert _fold_line(line) == _fold_line_decode_retry(line)
+
+
+def test_fold_matches_decode_retry_property():
+    hypothesis = pytest.importorskip("hypothesis")
+    st = hypothesis.strategies
+
+    @hypothesis.settings(max_examples=500, deadline=None)
+    @hypothesis.given(st.text(st.characters(blacklist_categories=("Cs",)), max_size=400))
+    def check(line):
+        assert _fold_line(line) == _fold_line_decode_retry(line)
+
+    check()
@@ -0,0 +1,109 @@
+"""impact.event_day_returns（フレーム全体の前日比 + 位置での抜き出し）のテスト"""
+from __future__ import annotations
+
+import math
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sector_event_radar.impact import event_day_return_matrix, event_day_returns
+
+
+def _loop_event_day_returns(prices, event_dates):
+    """旧実装（イベント × ticker の .loc ループ）。結果の比較用"""
+    idx = pd.to_datetime(prices.index).normalize()
+    prices2 = prices.copy()
+    prices2.index = idx
+    returns = {c: [] for c in prices2.columns}
+    for d in event_dates:
+        dts = pd.Timestamp(d)
+        if dts not in prices2.index:
+            continue
+        loc = prices2.index.get_loc(dts)
+        if isinstance(loc, slice) or isinstance(loc, np.ndarray):
+            continue
+        if loc == 0:
+            continue
+        prev_dt = prices2.index[loc - 1]
+        for c in prices2.columns:
+            prev = prices2.loc[prev_dt, c]
+            cur = prices2.loc[dts, c]
+            if pd.isna(prev) or pd.isna(cur) or prev == 0:
+                returns[c].append(float("nan"))
+            else:
+                returns[c].append(float(cur / prev - 1.0))
+    return returns
+
+
+def _same(a, b):
+    assert a.keys() == b.keys()
+    for k in a:
+        assert len(a[k]) == len(b[k]), k
+        for x, y in zip(a[k], b[k]):
+            assert (math.isnan(x) and math.isnan(y)) or x == y, (k, x, y)
+
+
+@pytest.fixture
+def prices():
+    idx = pd.to_datetime([
+        "2025-01-02", "2025-01-03", "2025-01-06", "2025-01-07", "2025-01-08", "2025-01-10",
+    ])
+    return pd.DataFrame(
+        {
+            "SOXX": [100.0, 102.0, 101.0, np.nan, 105.0, 106.0],
+            "NVDA": [50.0, 0.0, 55.0, 56.0, 57.0, 58.5],
+        },
+        index=idx,
+    )
+
+
+def test_matches_loop_implementation(prices):
+    events = [
+        date(2025, 1, 2),   # 先頭行 → スキップ
+        date(2025, 1, 3),
+        date(2025, 1, 6),   # NVDA 前日0 → NaN
+        date(2025, 1, 4),   # 土曜 → スキップ
+        date(2025, 1, 8),   # SOXX 前日NaN → NaN
+        date(2025, 1, 3),   # 重複イベントはそのまま2回
+        date(2025, 1, 9),   # 価格なし → スキップ
+        date(2025, 1, 10),
+    ]
+    got = event_day_returns(prices, events)
+    _same(got, _loop_event_day_returns(prices, events))
+    assert got["SOXX"][0] == pytest.approx(0.02)
+    assert math.isnan(got["NVDA"][1])
+
+
+def test_duplicate_price_dates_are_skipped(prices):
+    dup = pd.concat([prices, prices.iloc[[2]]]).sort_index()
+    _same(event_day_returns(dup, [date(2025, 1, 6)]), _loop_event_day_returns(dup, [date(2025, 1, 6)]))
+    # 前日が重複行でも当日が一意なら直前の行と比べる（旧実装は .loc がSeriesを返して落ちていた）
+    got = event_day_returns(dup, [date(2025, 1, 6), date(2025, 1, 8)])
+    assert got["NVDA"] == [pytest.approx(57.0 / 56.0 - 1)]
+
+
+def test_random_frame_matches_loop():
+    rng = np.random.default_rng(7)
+    idx = pd.bdate_range("2020-01-01", periods=300)
+    vals = rng.lognormal(0, 0.02, size=(300, 4)).cumprod(axis=0)
+    vals[rng.random(vals.shape) < 0.05] = np.nan
+    prices = pd.DataFrame(vals, index=idx, columns=list("ABCD"))
+    events = [d.date() for d in pd.date_range("2019-12-25", "2021-03-01", freq="9D")]
+    _same(event_day_returns(prices, events), _loop_event_day_returns(prices, events))
+
+
+def test_roll_to_next_session(prices):
+    events = [date(2025, 1, 4), date(2025, 1, 9), date(2025, 1, 1), date(2025, 1, 11)]
+    mat, used = event_day_return_matrix(prices, events, roll_to_next_session=True)
+    # 土曜 → 1/6、1/9 → 1/10。1/1 は先頭行(1/2)に丸まるので前日が無くスキップ、期間外もスキップ
+    assert list(used) == [pd.Timestamp("2025-01-06"), pd.Timestamp("2025-01-10")]
+    assert mat[0, 0] == pytest.approx(101.0 / 102.0 - 1)
+    assert mat[1, 1] == pytest.approx(58.5 / 57.0 - 1)
+    assert event_day_returns(prices, events)["SOXX"] == []
+
+
+def test_empty_inputs(prices):
+    assert event_day_returns(prices, []) == {"SOXX": [], "NVDA": []}
+    assert event_day_returns(prices.iloc[:0], [date(2025, 1, 3)]) == {"SOXX": [], "NVDA": []}
@@ -0,0 +1,78 @@
+"""CLI起動時間の回帰テスト（python -X importtime）
+
+run_daily の import で pandas / exchange_calendars / sklearn / numpy / feedparser を
+読み込まないこと（各ステージの初回使用まで遅延）と、起動の import 時間の予算を確認する。
+"""
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# run_daily の import 全体（依存込み）の予算。遅延importなしだと sklearn だけで約1秒
+STARTUP_BUDGET_SEC = 1.0
+
+HEAVY_MODULES = ("pandas", "exchange_calendars", "sklearn", "scipy", "numpy", "feedparser")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def _importtime(*args: str) -> dict:
+    """-X importtime の出力 → {モジュール名: 累積マイクロ秒}"""
+    env = {**os.environ, "PYTHONPATH": str(SRC) + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True, text=True, env=env, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    out = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            out[m.group(4)] = int(m.group(2))
+    return out
+
+
+def _heavy(modules: dict) -> list:
+    return sorted(n for n in modules if n.split(".")[0] in HEAVY_MODULES)
+
+
+def test_run_daily_import_skips_heavy_optional_dependencies():
+    modules = _importtime("-c", "import sector_event_radar.run_daily")
+    assert "sector_event_radar.run_daily" in modules
+    assert _heavy(modules) == []
+
+
+def test_run_daily_import_within_startup_budget():
+    # 初回はpycの生成が入るので2回目を測る
+    _importtime("-c", "import sector_event_radar.run_daily")
+    modules = _importtime("-c", "import sector_event_radar.run_daily")
+    sec = modules["sector_event_radar.run_daily"] / 1e6
+    assert sec < STARTUP_BUDGET_SEC, f"run_daily import took {sec:.2f}s"
+
+
+def test_cli_help_does_not_import_heavy_dependencies():
+    modules = _importtime("-m", "sector_event_radar.run_daily", "--help")
+    assert _heavy(modules) == []
+
+
+def test_capability_flags_and_lazy_loading():
+    from sector_event_radar import prefilter, session_calendar, stage_b_model
+    from sector_event_radar.collectors import rss
+
+    pytest.importorskip("sklearn")
+    assert prefilter._HAS_SKLEARN and prefilter._load_sklearn()
+    assert prefilter.TfidfVectorizer is not None
+    assert stage_b_model._load_sklearn() and stage_b_model.np is not None
+
+    pytest.importorskip("feedparser")
+    assert rss._HAS_FEEDPARSER and rss._load_feedparser() and rss.feedparser is not None
+
+    pytest.importorskip("exchange_calendars")
+    assert session_calendar._HAS_EXCHANGE_CAL
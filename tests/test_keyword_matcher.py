@@ -0,0 +1,72 @@
+"""KeywordMatcher（Aho–Corasick Stage A）と旧 _kw_score の等価性テスト"""
+import random
+import string
+
+import pytest
+
+from sector_event_radar.config import AppConfig
+from sector_event_radar.keyword_matcher import SCAN_MIN_PATTERNS, KeywordMatcher
+from sector_event_radar.prefilter import _kw_score
+
+
+def _both_paths(keywords):
+    """str.count経路とオートマトン経路の両方を通すため、ダミー語で水増しした版も返す。"""
+    padded = dict(keywords)
+    for i in range(SCAN_MIN_PATTERNS):
+        padded[f"zzqx{i:04d}qq"] = 1.0
+    return [keywords, padded]
+
+
+@pytest.mark.parametrize("keywords,text", [
+    # 重なり: str.countは "aa" in "aaaa" を2回と数える
+    ({"aa": 1.0}, "aaaa"),
+    ({"aa": 1.0, "aaa": 2.0}, "aaaaaaa"),
+    # ネスト: 長いキーワードの中に短いキーワード
+    ({"chip": 1.0, "chips act": 3.0, "act": 0.5}, "The CHIPS Act: chips act again, chip act"),
+    # 大文字小文字違いの重複キーは別々に加算
+    ({"TSMC": 2.0, "tsmc": 1.5}, "tsmc TSMC Tsmc"),
+    ({"A": 0.1, "b": 0.2, "a": 0.7}, "a b"),
+    # 空キーワードは無視
+    ({"": 5.0, "fed": 1.0}, "Fed fed FED fed"),
+    # 上限3回
+    ({"nvidia": 2.0}, "nvidia " * 10),
+    # unicode
+    ({"半導体": 2.0, "輸出規制": 3.0, "é": 1.0}, "半導体の輸出規制。半導体 café ÉCOLE"),
+    # ヒット無し
+    ({"export ban": 3.0}, "nothing here"),
+])
+def test_score_matches_reference(keywords, text):
+    for kws in _both_paths(keywords):
+        assert KeywordMatcher(kws).score(text) == _kw_score(text, kws)
+
+
+def test_counts_non_overlapping_like_str_count():
+    m = KeywordMatcher({"aba": 1.0, "b": 1.0, "ab": 1.0})
+    text = "abababab"
+    counts = m.counts(text)
+    for pid, pat in enumerate(m.patterns):
+        assert counts.get(pid, 0) == text.count(pat)
+
+
+def test_random_equivalence():
+    rng = random.Random(0)
+    alphabet = "abc D"
+    for _ in range(200):
+        kws = {
+            "".join(rng.choices(alphabet, k=rng.randint(0, 4))): round(rng.uniform(0.1, 3), 2)
+            for _ in range(rng.randint(1, 12))
+        }
+        text = "".join(rng.choices(alphabet + string.ascii_uppercase[:3], k=rng.randint(0, 60)))
+        for k in _both_paths(kws):
+            assert KeywordMatcher(k).score(text) == pytest.approx(_kw_score(text, k), abs=0)
+
+
+def test_app_config_caches_matcher():
+    cfg = AppConfig(keywords={"tsmc": 2.0})
+    m = cfg.keyword_matcher()
+    assert cfg.keyword_matcher() is m
+
+    cfg.keywords["nvidia"] = 1.0  # keywordsが変わったら作り直す
+    m2 = cfg.keyword_matcher()
+    assert m2 is not m
+    assert m2.score("NVIDIA and TSMC") == 3.0
@@ -0,0 +1,65 @@
+"""_list_events_from_db の最新source選択テスト"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from sector_event_radar.db import connect, init_db, upsert_events
+from sector_event_radar.models import Event
+from sector_event_radar.run_daily import _list_events_from_db
+
+START = datetime(2026, 3, 12, 12, 30, tzinfo=timezone.utc)
+
+
+def _event(key: str, source_id: str, url: str, start_at: datetime = START) -> Event:
+    return Event(
+        canonical_key=key, title=f"Event {key}", start_at=start_at,
+        category="shock", sector_tags=["semis"], risk_score=50, confidence=0.8,
+        source_name="claude_extract", source_url=url, source_id=source_id,
+        evidence=f"evidence {source_id}", action="add",
+    )
+
+
+def test_picks_latest_source_one_row_per_event():
+    conn = connect(":memory:")
+    init_db(conn)
+    conn.executescript("""
+        INSERT INTO events VALUES ('k1', 'E1', '2026-03-12T12:30:00+00:00', NULL, 'shock', '[]', 50, 0.8, 'active', 'x');
+        INSERT INTO events VALUES ('k2', 'E2', '2026-03-13T12:30:00+00:00', NULL, 'shock', '[]', 50, 0.8, 'active', 'x');
+        INSERT INTO events VALUES ('k3', 'E3', '2026-03-14T12:30:00+00:00', NULL, 'shock', '[]', 50, 0.8, 'cancelled', 'x');
+        INSERT INTO event_sources VALUES ('k1', 's', 'a', 'https://example.com/old', 'old', '2026-03-01T00:00:00+00:00');
+        INSERT INTO event_sources VALUES ('k1', 's', 'b', 'https://example.com/new', 'new', '2026-03-02T00:00:00+00:00');
+        INSERT INTO event_sources VALUES ('k1', 's', 'c', 'https://example.com/older', 'older', '2026-02-01T00:00:00+00:00');
+    """)
+
+    events = _list_events_from_db(conn, START - timedelta(days=1), START + timedelta(days=5))
+    assert [e.canonical_key for e in events] == ["k1", "k2"]
+    assert str(events[0].source_url) == "https://example.com/new"
+    assert events[0].evidence == "new"
+    # sourceが無いイベントもLEFT JOINで残る
+    assert events[1].source_url is None
+    assert events[1].evidence == "from database"
+
+
+def test_same_seen_at_does_not_duplicate_event():
+    """バッチupsertで同じkeyのsourceが同時刻になっても1イベント1行、後勝ち"""
+    conn = connect(":memory:")
+    init_db(conn)
+    upsert_events(conn, [
+        _event("k1", "a", "https://example.com/a"),
+        _event("k1", "b", "https://example.com/b"),
+    ])
+
+    events = _list_events_from_db(conn, START - timedelta(days=1), START + timedelta(days=1))
+    assert len(events) == 1
+    assert str(events[0].source_url) == "https://example.com/b"
+
+
+def test_query_uses_key_seen_index():
+    conn = connect(":memory:")
+    init_db(conn)
+    plan = conn.execute("""
+        EXPLAIN QUERY PLAN
+        SELECT canonical_key, ROW_NUMBER() OVER (PARTITION BY canonical_key ORDER BY seen_at DESC)
+          FROM event_sources WHERE canonical_key IN ('k1', 'k2')
+    """).fetchall()
+    assert any("idx_event_sources_key_seen" in r[-1] for r in plan)
@@ -0,0 +1,156 @@
+"""Claude抽出の並列化 / レートリミッタ / サーキットブレーカのテスト"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from sector_event_radar.config import AppConfig
+from sector_event_radar.db import connect, init_db, seen_urls
+from sector_event_radar.llm.claude_extract import (
+    ClaudeConfig, ClaudeExtractError, extract_events_from_article,
+)
+from sector_event_radar.llm.rate_limit import CircuitBreaker, RateLimiter, TokenBucket
+from sector_event_radar.models import Article, Event
+from sector_event_radar.prefilter import ScoredArticle
+from sector_event_radar.run_daily import _collect_unscheduled
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.t
+
+    def sleep(self, s):
+        self.sleeps.append(s)
+        self.t += s
+
+
+# ── TokenBucket / RateLimiter ──
+
+def test_token_bucket_waits_for_refill():
+    clk = FakeClock()
+    b = TokenBucket(60, clock=clk, sleep=clk.sleep)  # 1 token/sec, capacity 60
+    for _ in range(60):
+        assert b.acquire() == 0.0
+    assert b.acquire() == pytest.approx(1.0)
+    assert b.acquire(3) == pytest.approx(3.0)
+
+
+def test_token_bucket_clamps_oversized_request():
+    clk = FakeClock()
+    b = TokenBucket(100, clock=clk, sleep=clk.sleep)
+    assert b.acquire(1000) == 0.0  # 容量ぶんで打ち切り（永久に待たない）
+
+
+def test_rate_limiter_tracks_requests_and_tokens():
+    clk = FakeClock()
+    lim = RateLimiter(requests_per_min=600, input_tokens_per_min=6000, clock=clk, sleep=clk.sleep)
+    assert lim.acquire(6000) == 0.0
+    assert lim.acquire(100) == pytest.approx(1.0)  # tokenバケットが律速（100 tok/sec）
+    assert RateLimiter().acquire(10 ** 9) == 0.0  # 上限0 = 無制限
+
+
+# ── CircuitBreaker ──
+
+def test_breaker_pauses_all_waiters_once():
+    clk = FakeClock()
+    br = CircuitBreaker(clock=clk, sleep=clk.sleep)
+    br.trip(5.0)
+    br.trip(2.0)  # 既に開いている: 短い方は延長しない
+    assert br.trips == 1
+    assert br.wait() == pytest.approx(5.0)
+    assert br.wait() == 0.0
+    br.trip(1.0)
+    assert br.trips == 2
+
+
+def _resp(status, json_body=None, headers=None):
+    r = MagicMock()
+    r.status_code = status
+    r.headers = headers or {}
+    r.json.return_value = json_body or {}
+    r.text = ""
+    return r
+
+
+OK_BODY = {"content": [{"type": "tool_use", "name": "emit_events", "input": {"events": []}}]}
+
+
+def test_extract_trips_shared_breaker_on_529_instead_of_sleeping():
+    br = MagicMock()
+    lim = MagicMock()
+    with patch("sector_event_radar.llm.claude_extract.requests.post",
+               side_effect=[_resp(529), _resp(429, headers={"retry-after": "7"}), _resp(200, OK_BODY)]), \
+         patch("sector_event_radar.llm.claude_extract.time.sleep") as sleep:
+        out = extract_events_from_article(
+            ClaudeConfig(api_key="k"), "t", "2026-03-01", "https://e.com/a", "body",
+            limiter=lim, breaker=br,
+        )
+    assert out == []
+    sleep.assert_not_called()
+    assert [c.args[0] for c in br.trip.call_args_list] == [1.0, 7.0]
+    assert br.wait.call_count == 3
+    assert lim.acquire.call_count == 3
+    assert lim.acquire.call_args.args[0] > 100  # SYSTEM_PROMPT + tool schemaぶんの見積り
+
+
+# ── _collect_unscheduled: 並列でも順序・上限・seen条件は不変 ──
+
+def _article(i):
+    return Article(title=f"NVIDIA story {i}", body="body", url=f"https://e.com/{i}",
+                   published="2026-03-01")
+
+
+def _event_for(url):
+    return Event(
+        title=f"Event for {url}", start_at=datetime(2026, 4, 1, tzinfo=timezone.utc),
+        category="shock", sector_tags=["semis"], risk_score=50, confidence=0.8,
+        source_name="claude_extract", source_url=url, source_id=f"claude:{url}",
+        evidence="effective April 1, 2026", action="add",
+    )
+
+
+def test_parallel_extraction_preserves_order_cap_and_seen_semantics(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "k")
+    conn = connect(":memory:")
+    init_db(conn)
+    cfg = AppConfig(keywords={"nvidia": 5.0})
+    cfg.llm.workers = 4
+    cfg.llm.max_articles_per_run = 5
+    arts = [_article(i) for i in range(8)]
+    scored = [ScoredArticle(article=a, relevance_score=1.0 - i / 10) for i, a in enumerate(arts)]
+
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_extract(cfg, article_title, article_published, article_url, article_content, **kw):
+        with lock:
+            active.append(article_url)
+            peak.append(len(active))
+        # 後の記事ほど早く終わる → 完了順と投入順が逆
+        time.sleep(0.05 * (10 - int(article_url.rsplit("/", 1)[1])))
+        with lock:
+            active.remove(article_url)
+        if article_url.endswith("/2"):
+            raise ClaudeExtractError("boom")
+        return [_event_for(article_url)]
+
+    with patch("sector_event_radar.run_daily.prefilter", return_value=scored), \
+         patch("sector_event_radar.run_daily.extract_events_from_article", side_effect=fake_extract) as ex:
+        events, errors = _collect_unscheduled(cfg, conn, now=None, dry_run=False, articles=arts)
+
+    assert ex.call_count == 5  # max_articles_per_run
+    assert max(peak) > 1  # 実際に並列で走った
+    assert [str(e.source_url) for e in events] == [f"https://e.com/{i}" for i in (0, 1, 3, 4)]
+    assert all(e.category == "shock" for e in events)
+    assert len(errors) == 1 and "boom" in errors[0]
+    # 失敗した記事だけseenにならない（翌日再試行）
+    assert seen_urls(conn, [a.url for a in arts]) == {f"https://e.com/{i}" for i in (0, 1, 3, 4)}
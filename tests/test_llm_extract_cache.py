@@ -0,0 +1,140 @@
+"""Claude抽出キャッシュ（llm_cache）のテスト"""
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from sector_event_radar.llm.claude_extract import (
+    PROMPT_VERSION, ClaudeConfig, extract_events_from_article,
+)
+from sector_event_radar.llm.extract_cache import ExtractCache, normalized_content_hash
+
+TOOL_OUTPUT = {"events": [{
+    "title": "US chip export rule takes effect",
+    "start_at": "2026-04-01T00:00:00Z",
+    "category": "shock",
+    "sector_tags": ["semis"],
+    "risk_score": 60,
+    "confidence": 0.9,
+    "evidence": "The rule takes effect on April 1, 2026.",
+    "action": "add",
+}]}
+
+
+def _ok_response():
+    r = MagicMock()
+    r.status_code = 200
+    r.json.return_value = {"content": [{"type": "tool_use", "name": "emit_events", "input": TOOL_OUTPUT}]}
+    return r
+
+
+def _extract(cache, url, title="Export rule", body="The rule takes effect on April 1, 2026."):
+    return extract_events_from_article(
+        ClaudeConfig(api_key="k", model="m1"), title, "2026-03-01", url, body, cache=cache,
+    )
+
+
+def test_normalized_hash_ignores_case_and_whitespace():
+    assert normalized_content_hash("Export  Rule", "a\n\nb ") == normalized_content_hash("export rule", "a b")
+    assert normalized_content_hash("x", "a") != normalized_content_hash("x", "b")
+
+
+def test_hit_skips_api_and_rebuilds_source_per_article(tmp_path: Path):
+    cache = ExtractCache(str(tmp_path / "e.db"))
+    with patch("sector_event_radar.llm.claude_extract.requests.post",
+               return_value=_ok_response()) as post:
+        first = _extract(cache, "https://wire.example.com/a")
+        # 同じ配信記事が別URL・空白違いで再登場
+        second = _extract(cache, "https://mirror.example.com/b",
+                          title="EXPORT RULE", body="The rule  takes effect on April 1, 2026.\n")
+    assert post.call_count == 1
+    assert str(first[0].source_url) == "https://wire.example.com/a"
+    assert str(second[0].source_url) == "https://mirror.example.com/b"
+    assert second[0].source_id.startswith("claude:https://mirror.example.com/b#")
+    assert first[0].title == second[0].title
+
+    st = cache.stats()
+    assert (st["hits"], st["misses"], st["stores"], st["hit_rate"]) == (1, 1, 1, 0.5)
+
+
+def test_key_includes_model_and_prompt_version(tmp_path: Path):
+    cache = ExtractCache(str(tmp_path / "e.db"))
+    h = normalized_content_hash("t", "b")
+    cache.put("m1", PROMPT_VERSION, h, TOOL_OUTPUT)
+    assert cache.get("m1", PROMPT_VERSION, h) == TOOL_OUTPUT
+    assert cache.get("m2", PROMPT_VERSION, h) is None
+    assert cache.get("m1", "oldprompt", h) is None
+
+
+def test_ttl_and_size_eviction(tmp_path: Path):
+    path = str(tmp_path / "e.db")
+    cache = ExtractCache(path)
+    for i in range(5):
+        cache.put("m", "v", f"h{i}", {"events": []})
+    cache.close()
+
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE llm_cache SET created_at = '2000-01-01T00:00:00+00:00' WHERE content_hash = 'h0'")
+    for i in range(1, 5):  # used_at: h1 が最も古い
+        conn.execute("UPDATE llm_cache SET used_at = ? WHERE content_hash = ?",
+                     (f"2026-01-0{i}T00:00:00+00:00", f"h{i}"))
+    conn.commit()
+    conn.close()
+
+    cache = ExtractCache(path, ttl_days=30, max_entries=3)
+    assert cache.stats()["evicted"] == 2  # h0: TTL切れ, h1: 件数超過
+    assert cache.get("m", "v", "h0") is None
+    assert cache.get("m", "v", "h1") is None
+    assert cache.get("m", "v", "h4") == {"events": []}
+
+
+def test_missing_tool_block_is_not_cached(tmp_path: Path):
+    cache = ExtractCache(str(tmp_path / "e.db"))
+    r = MagicMock()
+    r.status_code = 200
+    r.json.return_value = {"content": [{"type": "text", "text": "hmm"}]}
+    with patch("sector_event_radar.llm.claude_extract.requests.post", return_value=r):
+        assert _extract(cache, "https://e.com/a") == []
+    assert cache.stats()["stores"] == 0
+
+
+def test_run_daily_does_not_open_cache_on_dry_run(tmp_path: Path):
+    from sector_event_radar.config import AppConfig
+    from sector_event_radar.run_daily import _open_llm_cache
+
+    path = str(tmp_path / "e.db")
+    cache = ExtractCache(path)
+    cache.put("m", "v", "h0", {"events": []})
+    cache.close()
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE llm_cache SET created_at = '2020-01-01T00:00:00+00:00'")
+    conn.commit()
+    conn.close()
+
+    errors = []
+    assert _open_llm_cache(AppConfig(), path, dry_run=True, errors=errors) is None
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] == 1  # TTL切れでも消さない
+    conn.close()
+
+    with patch("sector_event_radar.run_daily.ExtractCache", side_effect=sqlite3.OperationalError("locked")):
+        assert _open_llm_cache(AppConfig(), path, dry_run=False, errors=errors) is None
+    assert errors and "LLM cache unavailable" in errors[0]
+
+
+def test_cache_io_errors_keep_extraction_result(tmp_path: Path):
+    """キャッシュの読み書き失敗（database is locked 等）で課金済みの抽出結果を捨てない"""
+    cache = ExtractCache(str(tmp_path / "e.db"))
+    real_conn = cache._conn
+    cache._conn = MagicMock()
+    cache._conn.execute.side_effect = sqlite3.OperationalError("database is locked")
+    with patch("sector_event_radar.llm.claude_extract.requests.post",
+               return_value=_ok_response()) as post:
+        events = _extract(cache, "https://e.com/a")
+    assert post.call_count == 1
+    assert [e.title for e in events] == ["US chip export rule takes effect"]
+
+    st = cache.stats()
+    assert (st["hits"], st["misses"], st["stores"], st["errors"]) == (0, 1, 0, 2)
+    real_conn.close()
@@ -0,0 +1,86 @@
+"""プロンプトキャッシュ（cache_control）とトークン使用量集計のテスト"""
+from __future__ import annotations
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from sector_event_radar.llm.claude_extract import (
+    EMIT_EVENTS_TOOL, SYSTEM_PROMPT, ArticleInput, ClaudeConfig, build_payload,
+    extract_events_from_article,
+)
+from sector_event_radar.llm.claude_pack import PACKED_SYSTEM_PROMPT, build_packed_payload
+from sector_event_radar.llm.usage import TokenUsage
+
+
+def _response(usage):
+    r = MagicMock()
+    r.status_code = 200
+    r.json.return_value = {
+        "content": [{"type": "tool_use", "name": "emit_events", "input": {"events": []}}],
+        "usage": usage,
+    }
+    return r
+
+
+def test_payload_marks_system_and_tool_as_cacheable_prefix():
+    p = build_payload(ClaudeConfig(api_key="k"), "t", "2026-03-01", "https://e.com/a", "body")
+    assert p["system"] == [
+        {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}},
+    ]
+    assert p["tools"][0]["cache_control"] == {"type": "ephemeral"}
+    assert p["tools"][0]["input_schema"] == EMIT_EVENTS_TOOL["input_schema"]
+    # 記事ごとに変わるmessagesにはbreakpointを置かない
+    assert isinstance(p["messages"][0]["content"], str)
+    # 定数自体は書き換えない（PROMPT_VERSIONが変わらない）
+    assert "cache_control" not in EMIT_EVENTS_TOOL
+
+
+def test_prompt_cache_can_be_disabled():
+    p = build_payload(ClaudeConfig(api_key="k", prompt_cache=False), "t", "d", "https://e.com/a", "b")
+    assert p["system"] == SYSTEM_PROMPT
+    assert p["tools"] == [EMIT_EVENTS_TOOL]
+
+
+def test_packed_payload_is_cacheable_too():
+    arts = [ArticleInput("t", "2026-03-01", "https://e.com/a", "b")]
+    p = build_packed_payload(ClaudeConfig(api_key="k"), arts)
+    assert p["system"][0]["text"] == PACKED_SYSTEM_PROMPT
+    assert p["system"][0]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_usage_aggregated_from_responses():
+    usage = TokenUsage()
+    responses = [
+        _response({"input_tokens": 300, "cache_creation_input_tokens": 1500,
+                   "cache_read_input_tokens": 0, "output_tokens": 40}),
+        _response({"input_tokens": 250, "cache_creation_input_tokens": 0,
+                   "cache_read_input_tokens": 1500, "output_tokens": 30}),
+    ]
+    with patch("sector_event_radar.llm.claude_extract.requests.post", side_effect=responses) as post:
+        for url in ("https://e.com/a", "https://e.com/b"):
+            extract_events_from_article(
+                ClaudeConfig(api_key="k"), "t", "2026-03-01", url, "body", usage=usage,
+            )
+    sent = json.loads(post.call_args.kwargs["data"])
+    assert sent["system"][0]["cache_control"] == {"type": "ephemeral"}
+
+    st = usage.summary()
+    assert st == {
+        "responses": 2,
+        "input_tokens": 550,
+        "cache_creation_input_tokens": 1500,
+        "cache_read_input_tokens": 1500,
+        "output_tokens": 70,
+        "cache_read_ratio": round(1500 / 3550, 4),
+    }
+
+
+def test_usage_is_thread_safe_and_ignores_missing_fields():
+    usage = TokenUsage()
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        list(ex.map(lambda _: usage.add({"input_tokens": 1, "output_tokens": 2}), range(1000)))
+    usage.add(None)
+    st = usage.summary()
+    assert (st["responses"], st["input_tokens"], st["output_tokens"]) == (1000, 1000, 2000)
+    assert st["cache_read_input_tokens"] == 0 and st["cache_read_ratio"] == 0.0
@@ -0,0 +1,98 @@
+"""macro_title_map マッチャ（まとめた正規表現 + LRU）のテスト"""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import pytest
+
+from sector_event_radar.config import AppConfig, MacroTitleRule
+from sector_event_radar.macro_matcher import MacroMatcher, match_rule
+
+EXAMPLE = Path(__file__).resolve().parents[1] / "config.example.yaml"
+
+TITLES = [
+    "United States CPI YoY",
+    "Consumer Price Index",
+    "FOMC Minutes ahead of CPI",
+    "CPI ahead of FOMC",
+    "Nonfarm Payrolls",
+    "Non-Farm Payrolls",
+    "core pce price index",
+    "Fed Interest Rate Decision",
+    "Redbook YoY",
+    "line one\nFOMC on line two",
+    "",
+]
+
+
+def _linear(rules, title):
+    for pat, rule in rules:
+        if pat.search(title):
+            return rule
+    return None
+
+
+def _rules(mapping):
+    return [(p, MacroTitleRule(entity="us", sub_type=s)) for p, s in mapping]
+
+
+def test_combined_matches_linear_scan_on_example_config():
+    cfg = AppConfig.load(EXAMPLE)
+    m = cfg.macro_matcher()
+    assert m.is_combined
+    for title in TITLES:
+        assert m.match(title) is _linear(m.rules, title), title
+
+
+def test_first_rule_wins_not_leftmost_occurrence():
+    """pat0|pat1 の単純なalternationだとタイトル内で左に出た方が勝ってしまう"""
+    m = MacroMatcher(_rules([(r"(?i)\bCPI\b", "cpi"), (r"(?i)\bFOMC\b", "fomc")]))
+    assert m.is_combined
+    assert m.match("FOMC minutes, then CPI").sub_type == "cpi"
+    assert m.match("fomc only").sub_type == "fomc"
+    assert m.match("nothing here") is None
+
+
+def test_anchors_and_multiline_flags_keep_their_meaning():
+    m = MacroMatcher(_rules([(r"^GDP", "gdp"), (r"(?m)^ISM", "ism"), (r"(?i)payrolls$", "nfp")]))
+    assert m.is_combined
+    assert m.match("US GDP") is None
+    assert m.match("GDP Growth Rate").sub_type == "gdp"
+    assert m.match("headline\nISM Manufacturing").sub_type == "ism"
+    assert m.match("Nonfarm PAYROLLS").sub_type == "nfp"
+    assert m.match("Payrolls revised") is None
+
+
+@pytest.mark.parametrize("pattern", [r"(\w+) \1", r"(?x) CPI  # verbose"])
+def test_uncombinable_patterns_fall_back_to_linear(pattern):
+    m = MacroMatcher(_rules([(pattern, "x"), (r"CPI", "cpi")]))
+    assert not m.is_combined
+    for title in ("go go", "CPI", "none"):
+        assert m.match(title) is _linear(m.rules, title)
+
+
+def test_title_lookups_are_memoized():
+    m = MacroMatcher(_rules([(r"CPI", "cpi")]))
+    for _ in range(5):
+        m.match("CPI YoY")
+    info = m.cache_info()
+    assert (info.hits, info.misses) == (4, 1)
+
+
+def test_appconfig_builds_matcher_once_and_rebuilds_on_change():
+    cfg = AppConfig(macro_title_map={"CPI": {"entity": "us", "sub_type": "cpi"}})
+    m = cfg.macro_matcher()
+    assert cfg.macro_matcher() is m
+    pat, _ = cfg.macro_rules_compiled()[0]
+    assert pat is m.rules[0][0]  # 呼ぶたびに再コンパイルしない
+
+    cfg.macro_title_map["FOMC"] = MacroTitleRule(entity="us", sub_type="fomc")
+    assert cfg.macro_matcher() is not m
+    assert cfg.macro_matcher().match("FOMC").sub_type == "fomc"
+
+
+def test_match_rule_accepts_legacy_compiled_list():
+    rules = [(re.compile("CPI"), MacroTitleRule(entity="us", sub_type="cpi"))]
+    assert match_rule(rules, "CPI").sub_type == "cpi"
+    assert match_rule(rules, "GDP") is None
@@ -0,0 +1,133 @@
+"""近似重複（SimHash）による記事集約のテスト"""
+from __future__ import annotations
+
+import random
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from sector_event_radar.config import AppConfig
+from sector_event_radar.db import (
+    connect, init_db, is_article_seen, load_article_simhashes, record_article_simhashes,
+)
+from sector_event_radar.models import Article
+from sector_event_radar.near_dup import (
+    NearDupIndex, article_simhash, collapse, hamming, simhash,
+)
+from sector_event_radar.prefilter import ScoredArticle
+from sector_event_radar.run_daily import _collect_unscheduled
+
+STORY = (
+    "WASHINGTON, March 3 (Reuters) - The U.S. Commerce Department said on Tuesday it will "
+    "tighten export controls on advanced AI chips and chipmaking equipment bound for China, "
+    "with the new rules taking effect on April 1, 2026. Nvidia, AMD and Applied Materials "
+    "shares fell in premarket trading as analysts weighed the impact on data center revenue. "
+    "The rules expand the list of restricted high-bandwidth memory products and add licensing "
+    "requirements for subsidiaries headquartered outside the United States."
+)
+OTHER = (
+    "TSMC reported February revenue up 43% from a year earlier on strong demand for AI "
+    "accelerators, and said it expects capital spending to remain near the top of its guidance "
+    "range as it ramps advanced packaging capacity in Taiwan and Arizona."
+)
+NOW = datetime(2026, 3, 3, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db_conn():
+    conn = connect(":memory:")
+    init_db(conn)
+    return conn
+
+
+def test_syndicated_copies_are_close_and_unrelated_far():
+    a = article_simhash("US tightens AI chip export rules", STORY)
+    b = article_simhash("U.S. tightens AI chip export rules - Reuters",
+                        STORY.replace("(Reuters)", "(AP)") + " Reporting by Jane Doe.")
+    c = article_simhash("TSMC February revenue jumps", OTHER)
+    assert hamming(a, b) <= 8
+    assert hamming(a, c) > 16
+    assert simhash("") is None and simhash("  ,, ") is None
+
+
+def test_band_index_finds_every_fingerprint_within_distance():
+    """バンド分割（鳩の巣）で距離 <= max_distance を取りこぼさない: 総当たりと比較"""
+    rng = random.Random(7)
+    for max_distance in (0, 3, 5):
+        index: NearDupIndex[int] = NearDupIndex(max_distance)
+        stored = [rng.getrandbits(64) for _ in range(200)]
+        for i, fp in enumerate(stored):
+            index.add(i, fp)
+        for base in stored[:50]:
+            flips = rng.sample(range(64), rng.randint(0, max_distance))
+            probe = base
+            for bit in flips:
+                probe ^= 1 << bit
+            key = index.find(probe)
+            assert key is not None and hamming(stored[key], probe) <= max_distance
+        far = stored[0] ^ ((1 << (max_distance + 1)) - 1)
+        brute = [i for i, fp in enumerate(stored) if hamming(fp, far) <= max_distance]
+        assert (index.find(far) is None) == (not brute)
+
+
+def test_collapse_picks_longest_member_and_reports_sizes():
+    s = article_simhash("t", STORY)
+    o = article_simhash("t", OTHER)
+    seen: NearDupIndex[str] = NearDupIndex(3)
+    seen.add("https://old.example.com/x", o)
+    result = collapse([s, None, s, o, s], [100, 5, 300, 80, 300], seen=seen)
+
+    assert result.representatives == [2, 1]
+    assert result.members == {2: [0, 4], 1: []}
+    assert result.seen_duplicates == [3]
+    assert result.report() == {
+        "clusters": 1, "collapsed": 2, "seen_duplicates": 1, "cluster_sizes": {"3": 1},
+    }
+
+
+def test_simhash_roundtrip_through_signed_sqlite_integer(db_conn):
+    rows = [("https://e.com/a", (1 << 64) - 1), ("https://e.com/b", 1 << 63), ("https://e.com/c", 5)]
+    assert record_article_simhashes(db_conn, rows) == 3
+    assert sorted(load_article_simhashes(db_conn)) == rows
+    assert load_article_simhashes(db_conn, since=datetime(2999, 1, 1, tzinfo=timezone.utc)) == []
+
+
+def _article(i, title, body):
+    return Article(title=title, body=body, url=f"https://feed{i}.example.com/story", published="2026-03-03")
+
+
+def test_collect_unscheduled_sends_one_article_per_cluster(db_conn, monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "k")
+    cfg = AppConfig(keywords={"nvidia": 5.0})
+    cfg.near_dup.enabled = True
+    articles = [
+        _article(0, "US tightens AI chip export rules", STORY),
+        _article(1, "TSMC February revenue jumps", OTHER),
+        _article(2, "US tightens AI chip export rules (Reuters)", STORY + " Reporting by Jane Doe."),
+        _article(3, "US tightens AI chip export rules", STORY.replace("Tuesday", "Tuesday,")),
+    ]
+    report = {}
+
+    def _prefilter(arts, **kwargs):
+        return [ScoredArticle(article=a, relevance_score=1.0) for a in arts]
+
+    with patch("sector_event_radar.run_daily.prefilter", side_effect=_prefilter) as pf, \
+         patch("sector_event_radar.run_daily.extract_events_from_article", return_value=[]) as ex:
+        _collect_unscheduled(cfg, db_conn, NOW, False, articles, near_dup_report=report)
+
+    assert [a.url for a in pf.call_args[0][0]] == [articles[2].url, articles[1].url]
+    assert ex.call_count == 2
+    assert report["cluster_sizes"] == {"3": 1} and report["collapsed"] == 2
+    # 代表の抽出成功でクラスタ全員が既出・指紋保存
+    assert all(is_article_seen(db_conn, a.url) for a in articles)
+    assert len(load_article_simhashes(db_conn)) == 4
+
+    # 翌日、同じ記事がさらに別URLで届いても過去の処理済み記事の近似重複として落ちる
+    late = _article(9, "US tightens AI chip export rules", STORY + " (Updated)")
+    report = {}
+    with patch("sector_event_radar.run_daily.prefilter", side_effect=_prefilter) as pf:
+        _collect_unscheduled(cfg, db_conn, NOW, False, [late], near_dup_report=report)
+    pf.assert_not_called()
+    assert report["seen_duplicates"] == 1
+    assert is_article_seen(db_conn, late.url)
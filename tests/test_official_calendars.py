@@ -8,7 +8,9 @@ GPT review improvements covered:
 """
 from __future__ import annotations
 
+import io
 import logging
+import re
 import textwrap
 from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
@@ -17,12 +19,12 @@ from zoneinfo import ZoneInfo
 import pytest
 
 from src.sector_event_radar.collectors.official_calendars import (
-    _unfold_ics,
-    _parse_vevent_blocks,
     _parse_datetime_flexible,
-    _parse_dtstart,
-    _get_summary,
+    _parse_dtstart_prop,
+    _iter_unfolded_lines,
+    _iter_vevents,
     _match_and_build_event,
+    _parse_ics_response,
     fetch_ics_macro_events,
     generate_fomc_events,
     fetch_official_macro_events,
@@ -136,38 +138,68 @@ def date_range():
 
 # ── ICS Parser tests ──────────────────────────────────────
 
-class TestUnfoldIcs:
+def _vevents(text):
+    return list(_iter_vevents(io.StringIO(text)))
+
+
+def _vevent(*props):
+    return "\r\n".join(["BEGIN:VCALENDAR", "BEGIN:VEVENT", *props, "END:VEVENT", "END:VCALENDAR"]) + "\r\n"
+
+
+class TestIterUnfoldedLines:
     def test_unfold_crlf_space(self):
-        text = "SUMMARY:This is a long\r\n  description that wraps"
-        assert _unfold_ics(text) == "SUMMARY:This is a long description that wraps"
+        lines = ["SUMMARY:This is a long\r\n", "  description that wraps\r\n"]
+        assert list(_iter_unfolded_lines(lines)) == ["SUMMARY:This is a long description that wraps"]
 
     def test_unfold_tab_continuation(self):
-        text = "SUMMARY:Hello\r\n\tworld"
-        assert _unfold_ics(text) == "SUMMARY:Helloworld"
+        lines = ["SUMMARY:Hello\r\n", "\tworld\r\n"]
+        assert list(_iter_unfolded_lines(lines)) == ["SUMMARY:Helloworld"]
 
     def test_no_continuation(self):
-        text = "SUMMARY:Simple line"
-        assert _unfold_ics(text) == "SUMMARY:Simple line"
+        lines = ["SUMMARY:Simple line\r\n", "UID:x\r\n"]
+        assert list(_iter_unfolded_lines(lines)) == ["SUMMARY:Simple line", "UID:x"]
+
+    def test_folded_summary_in_vevent(self):
+        text = _vevent("DTSTART:20260327T123000Z", "SUMMARY:Gross Domestic", "  Product")
+        assert _vevents(text) == [("Gross Domestic Product", datetime(2026, 3, 27, 12, 30, tzinfo=UTC))]
 
 
-class TestParseVeventBlocks:
+class TestIterVevents:
     def test_bls_format(self):
-        blocks = _parse_vevent_blocks(SAMPLE_BLS_ICS)
-        assert len(blocks) == 4
+        got = _vevents(SAMPLE_BLS_ICS)
+        assert [s for s, _ in got] == [
+            "Consumer Price Index",
+            "Employment Situation",
+            "Producer Price Index",
+            "Job Openings and Labor Turnover Survey",
+        ]
+        assert got[0][1] == datetime(2026, 3, 10, 8, 30, tzinfo=ET)
 
     def test_bea_format(self):
-        blocks = _parse_vevent_blocks(SAMPLE_BEA_ICS)
-        assert len(blocks) == 3
+        got = _vevents(SAMPLE_BEA_ICS)
+        assert len(got) == 3
+        assert got[0] == ("Gross Domestic Product", datetime(2026, 3, 27, 12, 30, tzinfo=UTC))
 
     def test_empty_calendar(self):
-        ics = "BEGIN:VCALENDAR\nVERSION:2.0\nEND:VCALENDAR"
-        assert _parse_vevent_blocks(ics) == []
+        assert _vevents("BEGIN:VCALENDAR\nVERSION:2.0\nEND:VCALENDAR") == []
+
+    def test_summary_with_params(self):
+        text = _vevent("DTSTART:20260327T123000Z", "SUMMARY;LANGUAGE=en-US:GDP")
+        assert [s for s, _ in _vevents(text)] == ["GDP"]
+
+    def test_missing_summary_dropped(self):
+        assert _vevents(_vevent("DTSTART:20260101T000000Z")) == []
+
+    def test_missing_dtstart_dropped(self):
+        assert _vevents(_vevent("SUMMARY:No date")) == []
+
+    def test_tzid_dtstart(self):
+        text = _vevent("DTSTART;TZID=US-Eastern:20260310T083000", "SUMMARY:CPI")
+        assert _vevents(text) == [("CPI", datetime(2026, 3, 10, 8, 30, tzinfo=ET))]
 
-    def test_properties_extracted(self):
-        blocks = _parse_vevent_blocks(SAMPLE_BLS_ICS)
-        cpi = blocks[0]
-        assert "DTSTART;TZID=US-Eastern" in cpi
-        assert "SUMMARY" in cpi
+    def test_value_date_dtstart(self):
+        text = _vevent("DTSTART;VALUE=DATE:20260310", "SUMMARY:Something")
+        assert _vevents(text) == [("Something", datetime(2026, 3, 10, 8, 30, tzinfo=ET))]
 
 
 # ── _parse_datetime_flexible tests (GPT review: HHMM support) ──
@@ -198,63 +230,45 @@ class TestParseDatetimeFlexible:
         assert _parse_datetime_flexible("") is None
 
 
-class TestParseDtstart:
+class TestParseDtstartProp:
     def test_bls_eastern_timezone(self):
-        ve = {"DTSTART;TZID=US-Eastern": "20260310T083000", "SUMMARY": "CPI"}
-        dt = _parse_dtstart(ve)
+        dt = _parse_dtstart_prop("DTSTART;TZID=US-Eastern", "20260310T083000")
         assert dt is not None
         assert dt.year == 2026 and dt.month == 3 and dt.day == 10
         assert dt.hour == 8 and dt.minute == 30
         assert dt.tzinfo == ET
 
     def test_bea_utc(self):
-        ve = {"DTSTART": "20260327T123000Z", "SUMMARY": "GDP"}
-        dt = _parse_dtstart(ve)
+        dt = _parse_dtstart_prop("DTSTART", "20260327T123000Z")
         assert dt is not None
         assert dt.hour == 12 and dt.minute == 30
         assert dt.tzinfo == UTC
 
     def test_hhmm_no_seconds(self):
         """GPT review: HHMM format without seconds."""
-        ve = {"DTSTART;TZID=US-Eastern": "20260310T0830", "SUMMARY": "CPI"}
-        dt = _parse_dtstart(ve)
+        dt = _parse_dtstart_prop("DTSTART;TZID=US-Eastern", "20260310T0830")
         assert dt is not None
         assert dt.hour == 8 and dt.minute == 30
         assert dt.tzinfo == ET
 
     def test_date_only(self):
-        ve = {"DTSTART;VALUE=DATE": "20260310", "SUMMARY": "Something"}
-        dt = _parse_dtstart(ve)
+        dt = _parse_dtstart_prop("DTSTART;VALUE=DATE", "20260310")
         assert dt is not None
         assert dt.hour == 8 and dt.minute == 30
         assert dt.tzinfo == ET
 
-    def test_no_dtstart(self):
-        ve = {"SUMMARY": "No date"}
-        assert _parse_dtstart(ve) is None
+    def test_empty_value(self):
+        assert _parse_dtstart_prop("DTSTART", "") is None
 
     def test_invalid_format(self):
-        ve = {"DTSTART": "not-a-date", "SUMMARY": "Bad"}
-        assert _parse_dtstart(ve) is None
+        assert _parse_dtstart_prop("DTSTART", "not-a-date") is None
 
     def test_bare_datetime_assumes_et(self):
-        ve = {"DTSTART": "20260310T083000", "SUMMARY": "Test"}
-        dt = _parse_dtstart(ve)
+        dt = _parse_dtstart_prop("DTSTART", "20260310T083000")
         assert dt is not None
         assert dt.tzinfo == ET
 
 
-class TestGetSummary:
-    def test_basic(self):
-        assert _get_summary({"SUMMARY": "Consumer Price Index"}) == "Consumer Price Index"
-
-    def test_with_params(self):
-        assert _get_summary({"SUMMARY;LANGUAGE=en-US": "GDP"}) == "GDP"
-
-    def test_missing(self):
-        assert _get_summary({"DTSTART": "20260101T000000Z"}) == ""
-
-
 # ── Event matching tests (GPT review: uses precompiled rules) ──
 
 class TestMatchAndBuildEvent:
@@ -551,3 +565,98 @@ class TestFetchOfficialMacroEvents:
         fomc_events = [e for e in events if e.source_name == "frb"]
         assert len(fomc_events) == 0
         assert len(errors) == 0
+
+
+# ── Streaming VEVENT parser ───────────────────────────────
+
+def _multi_year_ics(years=range(2019, 2029)) -> str:
+    """BLS-like multi-year feed with folded lines, extra properties and odd VEVENTs."""
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0"]
+    for y in years:
+        for m in range(1, 13):
+            lines += [
+                "BEGIN:VEVENT",
+                f"DTSTART;TZID=US-Eastern:{y}{m:02d}12T083000",
+                "DURATION:PT1H",
+                "SUMMARY:Consumer Price Index for",
+                " All Urban Consumers",
+                "DESCRIPTION:Monthly release with a long description that the server",
+                "\tfolded onto a tab-continued line",
+                f"UID:bls-cpi-{y}{m:02d}@bls.gov",
+                "END:VEVENT",
+                "BEGIN:VEVENT",
+                f"DTSTART:{y}{m:02d}27T123000Z",
+                "SUMMARY;LANGUAGE=en-US:Gross Domestic Product",
+                "END:VEVENT",
+                "BEGIN:VEVENT",
+                f"DTSTART;VALUE=DATE:{y}{m:02d}05",
+                "SUMMARY:Employment Situation",
+                "END:VEVENT",
+                "BEGIN:VEVENT",  # SUMMARY無し → 捨てる
+                f"DTSTART:{y}{m:02d}20T123000Z",
+                "END:VEVENT",
+                "BEGIN:VEVENT",  # 解釈できないDTSTART → 捨てる
+                "DTSTART:not-a-date",
+                "SUMMARY:Broken",
+                "END:VEVENT",
+            ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+class TestStreamingVeventParser:
+    @staticmethod
+    def _dict_pipeline(text):
+        """旧パイプライン（全文unfold → splitlines → VEVENTごとのdict）。突き合わせ用オラクル"""
+        out = []
+        vevent = None
+        for line in re.sub(r"\r?\n[ \t]", "", text).splitlines():
+            line = line.strip()
+            if line == "BEGIN:VEVENT":
+                vevent = {}
+            elif line == "END:VEVENT":
+                if vevent:
+                    summary = next((v.strip() for k, v in vevent.items() if k.startswith("SUMMARY")), "")
+                    dt = next((_parse_dtstart_prop(k, v) for k, v in vevent.items() if k.startswith("DTSTART")), None)
+                    if summary and dt:
+                        out.append((summary, dt))
+                vevent = None
+            elif vevent is not None and ":" in line:
+                key, _, value = line.partition(":")
+                vevent[key] = value
+        return out
+
+    def test_matches_dict_pipeline(self):
+        text = _multi_year_ics()
+        streamed = list(_iter_vevents(io.StringIO(text)))
+        assert streamed == self._dict_pipeline(text)
+        assert streamed[0] == ("Consumer Price Index forAll Urban Consumers", datetime(2019, 1, 12, 8, 30, tzinfo=ET))
+        assert len(streamed) == 10 * 12 * 3
+
+    def test_matches_dict_pipeline_on_samples(self):
+        for text in (SAMPLE_BLS_ICS, SAMPLE_BEA_ICS, SAMPLE_HHMM_ICS):
+            assert list(_iter_vevents(io.StringIO(text))) == self._dict_pipeline(text)
+
+    def test_date_window_applied_while_streaming(self):
+        text = _multi_year_ics()
+        start = datetime(2026, 3, 1, tzinfo=UTC)
+        end = datetime(2026, 6, 30, tzinfo=UTC)
+        got = list(_iter_vevents(io.StringIO(text), start=start, end=end))
+        assert got == [(s, dt) for s, dt in self._dict_pipeline(text) if start <= dt <= end]
+        assert len(got) == 12
+
+    def test_bare_cr_line_endings(self):
+        """CRだけの改行でも、CRLF版と同じVEVENTが取れる（折り返しも含めて）"""
+        text = _multi_year_ics()
+        resp = MagicMock()
+        resp.text = text.replace("\r\n", "\r")
+        assert _parse_ics_response(resp) == self._dict_pipeline(text)
+
+    def test_cached_payload_filtered_by_start_only(self):
+        """HTTPキャッシュに残すパース結果は過去だけ落とす（翌日以降の窓でも304から答えられる）"""
+        resp = MagicMock()
+        resp.text = _multi_year_ics()
+        start = datetime(2026, 3, 1, tzinfo=UTC)
+        got = _parse_ics_response(resp, start=start)
+        assert min(dt for _, dt in got) >= start
+        assert max(dt for _, dt in got).year == 2028
@@ -203,3 +203,21 @@ def test_run_daily_partial_failure_still_generates_ics(tmp_path: Path):
 
     # エラーは記録されているがクラッシュしていない
     assert isinstance(summary["errors"], list)
+
+
+def test_run_daily_http_cache_open_failure_still_generates_ics(tmp_path: Path):
+    """HTTPキャッシュが開けない（ロック・破損）ときはキャッシュ無しで続け、ICSまで到達する"""
+    import sqlite3
+    from unittest.mock import patch
+
+    from sector_event_radar.run_daily import run_daily
+
+    cfg_path = tmp_path / "cfg.yaml"
+    cfg_path.write_text("keywords: {}\nmacro_title_map: {}\nsources: {rss: []}\n", encoding="utf-8")
+    ics_dir = tmp_path / "ics"
+    with patch("sector_event_radar.run_daily.HttpCache", side_effect=sqlite3.OperationalError("database is locked")):
+        summary = run_daily(str(cfg_path), str(tmp_path / "events.db"), str(ics_dir), dry_run=True)
+
+    assert (ics_dir / "sector_events_all.ics").exists()
+    assert summary["http_cache"] == {}
+    assert any("HTTP cache unavailable" in e for e in summary["errors"])
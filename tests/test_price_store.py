@@ -0,0 +1,168 @@
+"""ローカル価格ストア（足りない期間だけ取得 + オフラインfixture）のテスト"""
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sector_event_radar.audit import reaction_ratio, reaction_ratios
+from sector_event_radar.db import connect, init_db
+from sector_event_radar.impact import build_impact_summary
+from sector_event_radar.price_store import PriceStore, _missing_ranges, load_fixture_prices
+
+TODAY = date(2025, 3, 31)
+
+
+@pytest.fixture
+def db_conn():
+    conn = connect(":memory:")
+    init_db(conn)
+    return conn
+
+
+@pytest.fixture
+def fixture_dir(tmp_path):
+    idx = pd.bdate_range("2024-01-01", "2025-03-31")
+    rng = np.random.default_rng(1)
+    for t in ("SOXX", "NVDA"):
+        close = 100 * rng.lognormal(0, 0.01, size=len(idx)).cumprod()
+        pd.DataFrame({"date": idx.strftime("%Y-%m-%d"), "close": close}).to_csv(
+            tmp_path / f"{t}.csv", index=False,
+        )
+    return tmp_path
+
+
+class _Recording:
+    """fixtureを読みつつ (tickers, start, end) を記録する取得関数"""
+
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+        self.calls = []
+
+    def __call__(self, tickers, start, end):
+        self.calls.append((tuple(tickers), start, end))
+        return load_fixture_prices(self.fixture_dir, tickers, start, end)
+
+
+def test_missing_ranges_keep_coverage_contiguous():
+    cov = (date(2024, 6, 1), date(2024, 6, 30))
+    assert _missing_ranges(None, date(2024, 1, 1), date(2024, 2, 1)) == [(date(2024, 1, 1), date(2024, 2, 1))]
+    assert _missing_ranges(cov, date(2024, 6, 5), date(2024, 6, 20)) == []
+    assert _missing_ranges(cov, date(2024, 5, 1), date(2024, 7, 10)) == [
+        (date(2024, 5, 1), date(2024, 5, 31)), (date(2024, 7, 1), date(2024, 7, 10)),
+    ]
+    # 離れた範囲は間も埋める
+    assert _missing_ranges(cov, date(2024, 9, 1), date(2024, 9, 30)) == [(date(2024, 7, 1), date(2024, 9, 30))]
+
+
+def test_only_missing_ranges_are_fetched(db_conn, fixture_dir):
+    fetch = _Recording(fixture_dir)
+    store = PriceStore(db_conn, fetch=fetch)
+
+    first = store.get_prices(["SOXX", "NVDA"], date(2024, 6, 1), date(2024, 12, 31), today=TODAY)
+    again = store.get_prices(["SOXX", "NVDA"], date(2024, 7, 1), date(2024, 9, 30), today=TODAY)
+    wider = store.get_prices(["NVDA", "SOXX"], date(2024, 1, 1), date(2025, 2, 28), today=TODAY)
+
+    # 足りない期間 + 隣接する保存済みの1行（のりしろ: 6/1は土曜なので6/3、12/31）
+    assert fetch.calls == [
+        (("SOXX", "NVDA"), date(2024, 6, 1), date(2024, 12, 31)),
+        (("NVDA", "SOXX"), date(2024, 1, 1), date(2024, 6, 3)),
+        (("NVDA", "SOXX"), date(2024, 12, 31), date(2025, 2, 28)),
+    ]
+    assert list(first.columns) == ["SOXX", "NVDA"] and list(wider.columns) == ["NVDA", "SOXX"]
+    pd.testing.assert_frame_equal(again, first.loc["2024-07-01":"2024-09-30"])
+    ref = load_fixture_prices(fixture_dir, ["NVDA", "SOXX"], date(2024, 1, 1), date(2025, 2, 28))
+    np.testing.assert_allclose(wider.to_numpy(), ref.to_numpy())
+    assert (wider.index == ref.index).all()
+
+
+def test_new_ticker_fetched_alone(db_conn, fixture_dir):
+    fetch = _Recording(fixture_dir)
+    store = PriceStore(db_conn, fetch=fetch)
+    store.get_prices(["SOXX"], date(2024, 6, 1), date(2024, 6, 30), today=TODAY)
+    store.get_prices(["SOXX", "NVDA"], date(2024, 6, 1), date(2024, 6, 30), today=TODAY)
+    assert [c[0] for c in fetch.calls] == [("SOXX",), ("NVDA",)]
+
+
+def test_today_is_refetched_until_it_closes(db_conn, fixture_dir):
+    fetch = _Recording(fixture_dir)
+    store = PriceStore(db_conn, fetch=fetch)
+    store.get_prices(["SOXX"], date(2025, 3, 1), date(2025, 12, 31), today=date(2025, 3, 28))
+    store.get_prices(["SOXX"], date(2025, 3, 1), date(2025, 12, 31), today=date(2025, 3, 28))
+    assert [c[1:] for c in fetch.calls] == [
+        (date(2025, 3, 1), date(2025, 3, 28)),
+        (date(2025, 3, 27), date(2025, 3, 28)),
+    ]
+    assert store.covered(["SOXX"])["SOXX"] == (date(2025, 3, 1), date(2025, 3, 27))
+
+
+def test_failed_fetch_is_not_marked_covered(db_conn, fixture_dir):
+    def _boom(tickers, start, end):
+        raise RuntimeError("rate limited")
+
+    store = PriceStore(db_conn, fetch=_boom)
+    df = store.get_prices(["SOXX"], date(2024, 6, 1), date(2024, 6, 30), today=TODAY)
+    assert df.empty and list(df.columns) == ["SOXX"]
+    assert store.covered(["SOXX"]) == {}
+
+
+def test_ticker_without_rows_is_not_marked_covered(db_conn, fixture_dir):
+    # yf.download はticker単位の失敗を例外にせず全部NaNの列で返す
+    calls = []
+
+    def _flaky(tickers, start, end):
+        calls.append(tuple(tickers))
+        df = load_fixture_prices(fixture_dir, tickers, start, end)
+        if len(calls) == 1:
+            df["NVDA"] = np.nan
+        return df
+
+    store = PriceStore(db_conn, fetch=_flaky)
+    store.get_prices(["SOXX", "NVDA"], date(2024, 1, 1), date(2024, 3, 31), today=TODAY)
+    assert set(store.covered(["SOXX", "NVDA"])) == {"SOXX"}
+    df = store.get_prices(["SOXX", "NVDA"], date(2024, 1, 1), date(2024, 3, 31), today=TODAY)
+    assert calls == [("SOXX", "NVDA"), ("NVDA",)]
+    assert df["NVDA"].notna().all()
+
+
+def test_adjustment_change_refetches_full_history(db_conn, fixture_dir):
+    # 2024-07-01に1:2分割があった想定。以後の取得は過去分も半分に調整されて返る
+    split = {"on": False}
+    calls = []
+
+    def _adjusted(tickers, start, end):
+        calls.append((tuple(tickers), start, end))
+        df = load_fixture_prices(fixture_dir, tickers, start, end)
+        return df / 2 if split["on"] else df
+
+    store = PriceStore(db_conn, fetch=_adjusted)
+    store.get_prices(["SOXX", "NVDA"], date(2024, 1, 1), date(2024, 6, 28), today=TODAY)
+    split["on"] = True
+    got = store.get_prices(["SOXX", "NVDA"], date(2024, 1, 1), date(2024, 9, 30), today=TODAY)
+
+    assert calls[1:] == [
+        (("SOXX", "NVDA"), date(2024, 6, 28), date(2024, 9, 30)),
+        (("SOXX", "NVDA"), date(2024, 1, 1), date(2024, 9, 30)),
+    ]
+    ref = load_fixture_prices(fixture_dir, ["SOXX", "NVDA"], date(2024, 1, 1), date(2024, 9, 30)) / 2
+    np.testing.assert_allclose(got.to_numpy(), ref.to_numpy())
+    assert store.covered(["SOXX"])["SOXX"] == (date(2024, 1, 1), date(2024, 9, 30))
+
+
+def test_offline_mode_feeds_impact_and_audit(db_conn, fixture_dir):
+    store = PriceStore(db_conn, fixture_dir=fixture_dir)
+    events = [date(2024, 2, 13), date(2024, 3, 12), date(2024, 4, 10)]
+    summary = build_impact_summary(
+        ["SOXX", "NVDA"], events, date(2024, 1, 1), date(2024, 6, 30), store=store,
+    )
+    assert summary.historical_stats["SOXX"]["n"] == 3
+
+    prices = store.get_prices(["SOXX", "NVDA"], date(2024, 1, 1), date(2024, 6, 30))
+    ratios = reaction_ratios(prices, events)
+    assert ratios["NVDA"] == reaction_ratio(prices["NVDA"], events)
+    r = prices["SOXX"].pct_change().abs()
+    on_event = r.index.isin(pd.to_datetime(events))
+    assert ratios["SOXX"] == pytest.approx(r[on_event].mean() / r[~on_event].dropna().mean())
+    assert store.fetch_calls == 1
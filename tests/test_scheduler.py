@@ -0,0 +1,142 @@
+"""scheduler.py — collector並列実行のテスト
+
+- 部分失敗: 1collectorの例外は他に波及しない（errorsに記録）
+- 締切超過: timeoutとして記録し、結果は捨てる
+- 戻り値は投入順、(items, errors) 契約を維持
+"""
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+from sector_event_radar.scheduler import CollectorTask, run_collectors
+
+
+def test_results_keep_submission_order():
+    def slow():
+        time.sleep(0.2)
+        return ["a"], []
+
+    def fast():
+        return ["b", "c"], ["warn"]
+
+    results = run_collectors([
+        CollectorTask(name="slow", fn=slow),
+        CollectorTask(name="fast", fn=fast),
+    ])
+    assert [r.name for r in results] == ["slow", "fast"]
+    assert results[0].items == ["a"]
+    assert results[1].items == ["b", "c"]
+    assert results[1].errors == ["warn"]
+    assert all(r.status == "ok" for r in results)
+
+
+def test_exception_is_isolated():
+    def boom():
+        raise ConnectionError("refused")
+
+    results = run_collectors([
+        CollectorTask(name="te", fn=boom, label="TE collector"),
+        CollectorTask(name="opex", fn=lambda: (["x"], [])),
+    ])
+    assert results[0].status == "failed"
+    assert results[0].errors == ["TE collector failed: refused"]
+    assert results[1].items == ["x"]
+
+
+def test_deadline_exceeded_is_recorded():
+    release = threading.Event()
+
+    def hang():
+        release.wait(5)
+        return ["late"], []
+
+    try:
+        results = run_collectors([
+            CollectorTask(name="hang", fn=hang, label="Hang collector", deadline_sec=0.2),
+            CollectorTask(name="ok", fn=lambda: (["x"], [])),
+        ])
+    finally:
+        release.set()
+
+    assert results[0].status == "timeout"
+    assert results[0].items == []
+    assert "timed out" in results[0].errors[0]
+    assert results[1].status == "ok"
+
+
+def test_collectors_run_concurrently():
+    def sleeper():
+        time.sleep(0.3)
+        return [], []
+
+    t0 = time.monotonic()
+    results = run_collectors(
+        [CollectorTask(name=f"s{i}", fn=sleeper) for i in range(4)], max_workers=4,
+    )
+    elapsed = time.monotonic() - t0
+    assert len(results) == 4
+    assert elapsed < 1.0  # 直列なら1.2s
+    assert all(r.wall_sec >= 0.25 for r in results)
+
+
+def test_empty_task_list():
+    assert run_collectors([]) == []
+
+
+def test_run_daily_summary_has_collector_timings(tmp_path: Path):
+    from sector_event_radar.run_daily import run_daily
+
+    cfg_path = tmp_path / "cfg.yaml"
+    cfg_path.write_text(
+        "keywords: {}\n"
+        "macro_title_map: {}\n"
+        "sources: {rss: []}\n",
+        encoding="utf-8",
+    )
+    summary = run_daily(str(cfg_path), str(tmp_path / "events.db"), str(tmp_path / "ics"), dry_run=True)
+
+    assert summary["collectors"]["opex"]["status"] == "ok"
+    assert summary["collectors"]["opex"]["items"] > 0
+    assert "wall_sec" in summary["collectors"]["opex"]
+    assert "collect_sec" in summary["timings"]
+
+
+def test_timed_out_task_is_reported_as_straggler():
+    from sector_event_radar.run_daily import _wait_stragglers
+
+    release = threading.Event()
+
+    def hang():
+        release.wait(5)
+        return [], []
+
+    stragglers = {}
+    try:
+        results = run_collectors(
+            [CollectorTask(name="hang", fn=hang, deadline_sec=0.1)], stragglers=stragglers,
+        )
+        assert results[0].status == "timeout"
+        assert list(stragglers) == ["hang"]
+
+        errors = []
+        assert _wait_stragglers(stragglers, 0.05, errors) == ["hang"]
+        assert "do not bound total wall time" in errors[0]
+    finally:
+        release.set()
+
+    errors = []
+    assert _wait_stragglers(stragglers, 5, errors) == [] and errors == []
+
+
+def test_closed_http_cache_degrades_to_miss(tmp_path: Path):
+    # 締切超過で走り続けるcollectorは、run_dailyが閉じたキャッシュに触っても落ちない
+    from sector_event_radar.http_cache import HttpCache
+
+    cache = HttpCache(str(tmp_path / "events.db"))
+    cache.put("https://example.com/a", "a", '"v1"', None, b"body", parsed=["x"])
+    cache.close()
+    assert cache.get("https://example.com/a") is None
+    cache.put("https://example.com/a", "a", '"v2"', None, b"body")
+    cache.put_parsed("https://example.com/a", ["y"])
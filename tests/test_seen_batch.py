@@ -0,0 +1,84 @@
+"""既出記事のバッチ照会 / バッチ記録 / Bloomフィルタのテスト"""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+
+from sector_event_radar.bloom import BloomFilter
+from sector_event_radar.config import AppConfig
+from sector_event_radar.db import (
+    build_seen_bloom, connect, init_db, is_article_seen, mark_articles_seen, seen_urls,
+)
+from sector_event_radar.models import Article
+from sector_event_radar.run_daily import _collect_unscheduled
+
+
+@pytest.fixture
+def db_conn():
+    conn = connect(":memory:")
+    init_db(conn)
+    return conn
+
+
+def _urls(n):
+    return [f"https://example.com/a{i}" for i in range(n)]
+
+
+def test_seen_urls_chunks_large_batches(db_conn):
+    """IN句のチャンク境界（500件）をまたいでも正しく引ける"""
+    marked = _urls(1200)[::2]
+    mark_articles_seen(db_conn, [(u, "h", 0.5) for u in marked])
+
+    found = seen_urls(db_conn, _urls(1200) + ["https://example.com/new"])
+    assert found == set(marked)
+
+
+def test_mark_articles_seen_single_commit_and_upsert(db_conn):
+    assert mark_articles_seen(db_conn, []) == 0
+    stmts = []
+    db_conn.set_trace_callback(stmts.append)
+    mark_articles_seen(db_conn, [(u, "h1", 0.1) for u in _urls(3)])
+    db_conn.set_trace_callback(None)
+    # 3件を1トランザクションで書く（記事ごとのcommitは無い）
+    assert [s for s in stmts if s.upper().startswith(("BEGIN", "COMMIT"))] == ["BEGIN ", "COMMIT"]
+    assert all(is_article_seen(db_conn, u) for u in _urls(3))
+
+    mark_articles_seen(db_conn, [(_urls(1)[0], "h2", 0.9)])
+    row = db_conn.execute(
+        "SELECT content_hash, relevance_score FROM articles WHERE url = ?", (_urls(1)[0],)
+    ).fetchone()
+    assert (row[0], row[1]) == ("h2", 0.9)
+    assert db_conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 3
+
+
+def test_bloom_no_false_negatives():
+    bloom = BloomFilter(capacity=5000, error_rate=1e-4)
+    bloom.update(_urls(5000))
+    assert all(u in bloom for u in _urls(5000))
+    fp = sum(f"https://other.example.com/{i}" in bloom for i in range(20000))
+    assert fp <= 10
+
+
+def test_build_seen_bloom_from_articles_table(db_conn):
+    mark_articles_seen(db_conn, [(u, "h", 0.5) for u in _urls(100)])
+    bloom = build_seen_bloom(db_conn)
+    assert all(u in bloom for u in _urls(100))
+    assert "https://example.com/fresh" not in bloom
+
+
+@pytest.mark.parametrize("use_bloom", [False, True])
+def test_collect_unscheduled_skips_seen_articles(db_conn, use_bloom):
+    mark_articles_seen(db_conn, [("https://example.com/a0", "h", 0.5)])
+    cfg = AppConfig(keywords={"nvidia": 5.0})
+    cfg.db.seen_bloom = use_bloom
+    articles = [
+        Article(title=f"NVIDIA news {i}", url=u, published="2026-03-01")
+        for i, u in enumerate(_urls(3))
+    ]
+
+    with patch("sector_event_radar.run_daily.prefilter", return_value=[]) as pf:
+        _collect_unscheduled(cfg, db_conn, now=None, dry_run=True, articles=articles)
+
+    passed = [a.url for a in pf.call_args[0][0]]
+    assert passed == _urls(3)[1:]
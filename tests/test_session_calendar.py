@@ -0,0 +1,90 @@
+"""営業日カレンダー（休場日セット + events.dbキャッシュ）のテスト"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from sector_event_radar.db import connect, init_db
+from sector_event_radar.flows import generate_opex_events
+from sector_event_radar.session_calendar import (
+    SessionCalendar, build_from_exchange_calendars, get_session_calendar, load_session_calendar,
+)
+
+GOOD_FRIDAY_2025 = date(2025, 4, 18)  # 第3金曜 = Good Friday（休場）
+
+
+@pytest.fixture
+def db_conn():
+    conn = connect(":memory:")
+    init_db(conn)
+    return conn
+
+
+def _cal(holidays=(GOOD_FRIDAY_2025,), start=date(2025, 1, 1), end=date(2025, 12, 31)):
+    return SessionCalendar("XNYS", start, end, frozenset(holidays))
+
+
+def test_set_lookups_and_session_navigation():
+    cal = _cal()
+    assert not cal.is_session(GOOD_FRIDAY_2025)
+    assert not cal.is_session(date(2025, 4, 19))  # 土曜
+    assert cal.previous_session(GOOD_FRIDAY_2025) == date(2025, 4, 17)
+    assert cal.next_session(GOOD_FRIDAY_2025) == date(2025, 4, 21)
+    assert cal.previous_session(date(2025, 4, 16)) == date(2025, 4, 16)
+    with pytest.raises(ValueError):
+        cal.is_session(date(2026, 1, 2))
+
+
+def test_build_matches_exchange_calendars():
+    ecals = pytest.importorskip("exchange_calendars")
+    start, end = date(2025, 1, 1), date(2027, 12, 31)
+    cal = build_from_exchange_calendars("XNYS", start, end)
+    ref = ecals.get_calendar("XNYS", start=start.isoformat(), end=end.isoformat())
+    sessions = {ts.date() for ts in ref.sessions}
+    d = start
+    while d <= end:
+        assert cal.is_session(d) == (d in sessions), d
+        d += timedelta(days=1)
+    assert {GOOD_FRIDAY_2025, date(2026, 7, 3), date(2026, 11, 26)} <= cal.holidays
+
+
+def test_cached_window_reused_until_it_expires(db_conn):
+    built = []
+
+    def _fake_build(name, start, end):
+        built.append((start, end))
+        return SessionCalendar(name, start, end, frozenset({GOOD_FRIDAY_2025}))
+
+    with patch("sector_event_radar.session_calendar._HAS_EXCHANGE_CAL", True), \
+         patch("sector_event_radar.session_calendar.build_from_exchange_calendars",
+               side_effect=_fake_build):
+        first = get_session_calendar(db_conn, today=date(2025, 3, 1), need_until=date(2025, 10, 1))
+        again = get_session_calendar(db_conn, today=date(2026, 6, 1), need_until=date(2027, 1, 1))
+        # 窓（2024-01-01..2028-12-31）を越える範囲が必要になったら作り直す
+        later = get_session_calendar(db_conn, today=date(2028, 9, 1), need_until=date(2029, 4, 1))
+
+    assert built == [(date(2024, 1, 1), date(2028, 12, 31)), (date(2027, 1, 1), date(2031, 12, 31))]
+    assert first == again
+    assert later.end == date(2031, 12, 31)
+    assert load_session_calendar(db_conn, "XNYS") == later
+
+
+def test_expired_window_kept_when_exchange_calendars_missing(db_conn):
+    with patch("sector_event_radar.session_calendar._HAS_EXCHANGE_CAL", False):
+        assert get_session_calendar(db_conn, today=date(2025, 3, 1)) is None
+
+
+def test_opex_uses_given_calendar_without_exchange_calendars():
+    with patch("sector_event_radar.session_calendar.build_from_exchange_calendars",
+               side_effect=AssertionError("hot path must not build a calendar")):
+        evs = generate_opex_events(2025, 4, months=2, calendar=_cal())
+    assert [e.start_at.date() for e in evs] == [date(2025, 4, 17), date(2025, 5, 16)]
+    assert evs[0].source_id == "opex:2025-04"
+
+
+def test_opex_outside_window_left_unadjusted():
+    cal = _cal(holidays=(), end=date(2025, 4, 30))
+    evs = generate_opex_events(2025, 4, months=2, calendar=cal)
+    assert [e.start_at.date() for e in evs] == [date(2025, 4, 18), date(2025, 5, 16)]
@@ -0,0 +1,162 @@
+"""Stage B 永続TF-IDFモデルのテスト"""
+import logging
+
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sklearn.feature_extraction.text import TfidfVectorizer  # noqa: E402
+
+from sector_event_radar.db import connect, init_db  # noqa: E402
+from sector_event_radar.models import Article  # noqa: E402
+from sector_event_radar.prefilter import prefilter  # noqa: E402
+from sector_event_radar.stage_b_model import StageBModel, compare_rankings  # noqa: E402
+
+DOCS = [
+    ("u1", "TSMC raises capex on strong AI chip demand"),
+    ("u2", "US tightens export controls on advanced semiconductor equipment"),
+    ("u3", "Local bakery opens new store downtown"),
+    ("u4", "Nvidia earnings beat as data center demand surges"),
+]
+QUERY = "tsmc nvidia export controls semiconductor"
+
+
+@pytest.fixture
+def conn(tmp_path):
+    c = connect(str(tmp_path / "t.db"))
+    init_db(c)
+    yield c
+    c.close()
+
+
+def _article(url, title):
+    return Article(title=title, url=f"https://example.com/{url}", published="2026-03-01T00:00:00Z")
+
+
+def test_ranking_matches_refit_tfidf():
+    model = StageBModel()
+    model.update(DOCS)
+    sims = model.score([t for _, t in DOCS], QUERY)
+
+    ref = TfidfVectorizer().fit([t for _, t in DOCS])
+    X = ref.transform([t for _, t in DOCS])
+    q = ref.transform([QUERY])
+    ref_sims = (X @ q.T).toarray().ravel()
+
+    assert list(sims.argsort()) == list(ref_sims.argsort())
+    assert sims[2] == 0.0  # 無関係記事
+
+
+def test_update_skips_known_doc_keys():
+    model = StageBModel()
+    assert model.update(DOCS) == 4
+    df_before = model.df.copy()
+    assert model.update(DOCS[:2]) == 0
+    assert model.n_docs == 4
+    assert (model.df == df_before).all()
+
+
+def test_save_load_roundtrip_is_incremental(conn):
+    model = StageBModel.load(conn)
+    model.update(DOCS[:2])
+    model.save(conn)
+
+    model2 = StageBModel.load(conn)
+    assert model2.n_docs == 2
+    assert (model2.df == model.df).all()
+    assert model2.update(DOCS) == 2  # u1/u2は前runで計上済み
+    model2.save(conn)
+
+    model3 = StageBModel.load(conn)
+    assert model3.n_docs == 4
+    assert (model3.df == model2.df).all()
+
+
+def test_n_features_change_resets(conn):
+    model = StageBModel.load(conn, n_features=2 ** 10)
+    model.update(DOCS)
+    model.save(conn)
+
+    model2 = StageBModel.load(conn, n_features=2 ** 12)
+    assert model2.n_docs == 0
+    assert model2.df.sum() == 0
+
+
+def test_prefilter_with_model_and_compare(caplog):
+    arts = [_article(k, t) for k, t in DOCS]
+    kws = {"tsmc": 3.0, "nvidia": 3.0, "export controls": 3.0, "semiconductor": 2.0, "chip": 1.0}
+    model = StageBModel()
+    model.update((a.url, f"{a.title}\n{a.body}") for a in arts)
+
+    with caplog.at_level(logging.INFO, logger="sector_event_radar.prefilter"):
+        out = prefilter(arts, kws, stage_a_threshold=1.0, stage_b_top_k=10,
+                        stage_b_model=model, compare_stage_b=True)
+    assert [sa.article.url for sa in out][-1] != "https://example.com/u3"
+    assert all(0.0 < sa.relevance_score <= 1.0 for sa in out)
+    assert "Stage B compare" in caplog.text
+
+
+def test_compare_rankings():
+    ref = [("a", 0.9), ("b", 0.5), ("c", 0.1)]
+    cand = [("a", 0.8), ("b", 0.05), ("c", 0.2)]
+    cmp = compare_rankings(ref, cand, top_k=2)
+    assert cmp == {"overlap_at_k": 0.5, "max_rank_shift": 1, "k": 2}
+
+
+def test_doc_keys_are_looked_up_not_preloaded(conn):
+    model = StageBModel.load(conn)
+    model.update(DOCS)
+    model.save(conn)
+
+    model2 = StageBModel.load(conn)
+    assert model2._known == set()
+    assert model2.update(DOCS[:1] + [("u5", "Samsung memory prices rise")]) == 1
+    assert model2._known == {"u1", "u5"}
+
+
+def test_prune_docs_drops_keys_not_seen_recently(conn):
+    from datetime import datetime, timedelta, timezone
+
+    model = StageBModel.load(conn)
+    model.update(DOCS)
+    model.save(conn)
+    conn.execute("UPDATE stage_b_docs SET seen_at = '2020-01-01T00:00:00+00:00'")
+    conn.commit()
+
+    # 再び見かけたキーは seen_at が更新されて残る
+    model2 = StageBModel.load(conn)
+    assert model2.update(DOCS[:2]) == 0
+    model2.save(conn)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=90)
+    assert model2.prune_docs(conn, cutoff) == 2
+    assert {r[0] for r in conn.execute("SELECT doc_key FROM stage_b_docs")} == {"u1", "u2"}
+
+
+def test_schema_upgrade_keeps_old_doc_keys(tmp_path):
+    c = connect(str(tmp_path / "old.db"))
+    c.executescript(
+        "CREATE TABLE stage_b_docs (doc_key TEXT PRIMARY KEY);"
+        "INSERT INTO stage_b_docs VALUES ('u1');"
+        "PRAGMA user_version = 8;"
+    )
+    init_db(c)
+    rows = c.execute("SELECT doc_key, seen_at FROM stage_b_docs").fetchall()
+    assert [r[0] for r in rows] == ["u1"] and rows[0][1]
+    assert StageBModel.load(c).update(DOCS) == 3
+    c.close()
+
+
+def test_shadow_model_is_compared_but_not_used_for_ranking(caplog):
+    arts = [_article(k, t) for k, t in DOCS]
+    kws = {"tsmc": 3.0, "nvidia": 3.0, "export controls": 3.0, "semiconductor": 2.0, "chip": 1.0}
+    model = StageBModel()
+    model.update((a.url, f"{a.title}\n{a.body}") for a in arts[:1])  # refitとずれたIDF
+
+    refit = prefilter(arts, kws, stage_a_threshold=1.0, stage_b_top_k=10)
+    with caplog.at_level(logging.INFO, logger="sector_event_radar.prefilter"):
+        shadow = prefilter(arts, kws, stage_a_threshold=1.0, stage_b_top_k=10,
+                           stage_b_model=model, compare_stage_b=True, shadow_stage_b=True)
+    assert [(sa.article.url, sa.relevance_score) for sa in shadow] == [
+        (sa.article.url, sa.relevance_score) for sa in refit
+    ]
+    assert "Stage B compare" in caplog.text
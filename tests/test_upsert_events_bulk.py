@@ -0,0 +1,132 @@
+"""db.upsert_events（バッチ版）と upsert_event（1件ずつ）の等価性テスト"""
+from __future__ import annotations
+
+import itertools
+import random
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from sector_event_radar.db import connect, init_db, latest_sources, upsert_event, upsert_events
+from sector_event_radar.models import Event
+
+BASE = datetime(2026, 3, 12, 12, 30, tzinfo=timezone.utc)
+
+
+def _event(key: str, i: int, **kw) -> Event:
+    fields = dict(
+        canonical_key=key,
+        title=f"Event {key} #{i}",
+        start_at=BASE,
+        end_at=None,
+        category="macro",
+        sector_tags=["semis"],
+        risk_score=50,
+        confidence=0.8,
+        source_name="src",
+        source_id=f"id{i}",
+        source_url=f"https://example.com/{i}",
+        evidence="scheduled for March 12, 2026",
+        action="add",
+    )
+    fields.update(kw)
+    return Event(**fields)
+
+
+def _random_events(rng: random.Random, n: int, offset: int = 0):
+    keys = [f"macro:us:k{j}:2026-03-12" for j in range(8)]
+    out = []
+    for i in range(offset, offset + n):
+        kw = {}
+        r = rng.random()
+        if r < 0.1:
+            kw["action"] = "ignore"
+        elif r < 0.2:
+            kw["action"] = "cancel"
+        elif r < 0.35:
+            kw["start_at"] = BASE + timedelta(days=rng.randint(1, 3))
+        elif r < 0.45:
+            kw["end_at"] = BASE + timedelta(hours=rng.randint(1, 3))
+        kw["risk_score"] = rng.choice([10, 25, 50, 69, 70, 90])
+        # 同じsource_idが別イベントで再登場するケース（event_sourcesのON CONFLICT）
+        kw["source_id"] = f"id{rng.randint(0, n)}"
+        out.append(_event(rng.choice(keys), i, **kw))
+    return out
+
+
+def _snapshot(conn):
+    events = conn.execute(
+        "SELECT canonical_key, title, start_at, end_at, category, sector_tags, "
+        "risk_score, confidence, status FROM events ORDER BY canonical_key"
+    ).fetchall()
+    sources = conn.execute(
+        "SELECT canonical_key, source_name, source_id, source_url, evidence "
+        "FROM event_sources ORDER BY source_name, source_id"
+    ).fetchall()
+    keys = [r[0] for r in events]
+    return [tuple(r) for r in events], [tuple(r) for r in sources], latest_sources(conn, keys)
+
+
+def _ticking_clock():
+    """呼ぶたびに1秒進む時計（1件ずつの upsert_event でも seen_at が必ず増える）"""
+    ticks = itertools.count()
+    return lambda: BASE + timedelta(seconds=next(ticks))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_bulk_matches_per_event(seed):
+    rng = random.Random(seed)
+    preexisting = _random_events(rng, 10)
+    batch = _random_events(rng, 40, offset=100)
+
+    conn_a = connect(":memory:")
+    conn_b = connect(":memory:")
+    with patch("sector_event_radar.db._now", _ticking_clock()):
+        for c in (conn_a, conn_b):
+            init_db(c)
+            for ev in preexisting:
+                upsert_event(c, ev)
+
+        stats_a = {"inserted": 0, "updated": 0, "merged": 0, "cancelled": 0, "ignored": 0}
+        for ev in batch:
+            stats_a[upsert_event(conn_a, ev)] += 1
+        stats_b = upsert_events(conn_b, batch)
+
+    assert stats_a == stats_b
+    assert _snapshot(conn_a) == _snapshot(conn_b)
+
+
+def test_bulk_latest_source_follows_input_order():
+    # 既存のsource A のあとに [B, A] が来たら、最新は後に処理した A
+    conn = connect(":memory:")
+    init_db(conn)
+    upsert_event(conn, _event("k1", 1))
+    upsert_events(conn, [_event("k1", 2), _event("k1", 1, evidence="rescheduled for March 13")])
+    assert latest_sources(conn, ["k1"]) == {
+        "k1": ("https://example.com/1", "rescheduled for March 13"),
+    }
+
+
+def test_bulk_single_transaction_and_requires_key():
+    conn = connect(":memory:")
+    init_db(conn)
+    stmts = []
+    conn.set_trace_callback(stmts.append)
+    stats = upsert_events(conn, [_event("k1", 1), _event("k1", 2, risk_score=90), _event("k2", 3)])
+    conn.set_trace_callback(None)
+
+    assert stats == {"inserted": 2, "updated": 1, "merged": 0, "cancelled": 0, "ignored": 0}
+    assert sum(s.upper().startswith("COMMIT") for s in stmts) == 1
+    assert conn.execute("SELECT risk_score FROM events WHERE canonical_key='k1'").fetchone()[0] == 90
+
+    with pytest.raises(ValueError):
+        upsert_events(conn, [_event("", 4)])
+
+
+def test_bulk_empty():
+    conn = connect(":memory:")
+    init_db(conn)
+    assert upsert_events(conn, []) == {
+        "inserted": 0, "updated": 0, "merged": 0, "cancelled": 0, "ignored": 0,
+    }